@@ -43,6 +43,14 @@ config.set_main_option("sqlalchemy.url", db_url)
 from app.database import Base
 from app.models.pagespeed_analysis import PageSpeedAnalysis  # noqa: F401
 from app.models.user import User  # noqa: F401
+from app.models.analysis_job import AnalysisJob, AnalysisBatch  # noqa: F401
+from app.models.psi_quota import PsiQuotaBucket  # noqa: F401
+from app.models.analysis_rollup import AnalysisRollup  # noqa: F401
+from app.models.monitored_url import MonitoredUrl  # noqa: F401
+from app.models.audit_summary import AuditSummary  # noqa: F401
+from app.models.rate_limit import RateLimitCounter  # noqa: F401
+from app.models.stored_session import StoredSession  # noqa: F401
+from app.models.email_outbox import EmailOutbox  # noqa: F401
 
 # Metadata for autogenerate support
 target_metadata = Base.metadata
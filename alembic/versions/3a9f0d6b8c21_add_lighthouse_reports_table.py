@@ -0,0 +1,53 @@
+"""Add lighthouse_reports table
+
+Revision ID: 3a9f0d6b8c21
+Revises: 7e2c4b9a1f05
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a9f0d6b8c21'
+down_revision: Union[str, Sequence[str], None] = '7e2c4b9a1f05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'lighthouse_reports',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('codec', sa.String(), nullable=False),
+        sa.Column('raw_size', sa.Integer(), nullable=False),
+        sa.Column('compressed_size', sa.Integer(), nullable=False),
+        sa.Column('screenshots_stripped', sa.Boolean(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('content_hash')
+    )
+    op.create_index(op.f('ix_lighthouse_reports_id'), 'lighthouse_reports', ['id'], unique=False)
+
+    op.add_column('pagespeed_analyses', sa.Column('report_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'pagespeed_analyses_report_id_fkey', 'pagespeed_analyses', 'lighthouse_reports',
+        ['report_id'], ['id']
+    )
+    op.create_index(op.f('ix_pagespeed_analyses_report_id'), 'pagespeed_analyses', ['report_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_pagespeed_analyses_report_id'), table_name='pagespeed_analyses')
+    op.drop_constraint('pagespeed_analyses_report_id_fkey', 'pagespeed_analyses', type_='foreignkey')
+    op.drop_column('pagespeed_analyses', 'report_id')
+
+    op.drop_index(op.f('ix_lighthouse_reports_id'), table_name='lighthouse_reports')
+    op.drop_table('lighthouse_reports')
@@ -0,0 +1,59 @@
+"""Add analysis_batches and link jobs and analyses
+
+Revision ID: 5c7d2e8f4a13
+Revises: e81b5c3d9a62
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c7d2e8f4a13'
+down_revision: Union[str, Sequence[str], None] = 'e81b5c3d9a62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'analysis_batches',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('sitemap_url', sa.String(), nullable=True),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_analysis_batches_id'), 'analysis_batches', ['id'], unique=False)
+
+    op.add_column('analysis_jobs', sa.Column('batch_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'analysis_jobs_batch_id_fkey', 'analysis_jobs', 'analysis_batches', ['batch_id'], ['id']
+    )
+    op.create_index(op.f('ix_analysis_jobs_batch_id'), 'analysis_jobs', ['batch_id'], unique=False)
+
+    op.add_column('pagespeed_analyses', sa.Column('job_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'pagespeed_analyses_job_id_fkey', 'pagespeed_analyses', 'analysis_jobs', ['job_id'], ['id']
+    )
+    op.create_index(op.f('ix_pagespeed_analyses_job_id'), 'pagespeed_analyses', ['job_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_pagespeed_analyses_job_id'), table_name='pagespeed_analyses')
+    op.drop_constraint('pagespeed_analyses_job_id_fkey', 'pagespeed_analyses', type_='foreignkey')
+    op.drop_column('pagespeed_analyses', 'job_id')
+
+    op.drop_index(op.f('ix_analysis_jobs_batch_id'), table_name='analysis_jobs')
+    op.drop_constraint('analysis_jobs_batch_id_fkey', 'analysis_jobs', type_='foreignkey')
+    op.drop_column('analysis_jobs', 'batch_id')
+
+    op.drop_index(op.f('ix_analysis_batches_id'), table_name='analysis_batches')
+    op.drop_table('analysis_batches')
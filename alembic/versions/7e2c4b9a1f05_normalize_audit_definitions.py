@@ -0,0 +1,130 @@
+"""Normalize audit titles and descriptions into audit_definitions
+
+Revision ID: 7e2c4b9a1f05
+Revises: c5a8e2f01d44
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e2c4b9a1f05'
+down_revision: Union[str, Sequence[str], None] = 'c5a8e2f01d44'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+# Older rows never stored the Lighthouse audit id
+LEGACY_AUDIT_KEY = 'legacy'
+
+audits = sa.table(
+    'pagespeed_audits',
+    sa.column('id', sa.Integer),
+    sa.column('title', sa.String),
+    sa.column('description', sa.String),
+    sa.column('definition_id', sa.Integer),
+)
+definitions = sa.table(
+    'audit_definitions',
+    sa.column('id', sa.Integer),
+    sa.column('audit_key', sa.String),
+    sa.column('content_hash', sa.String),
+    sa.column('title', sa.String),
+    sa.column('description', sa.String),
+)
+
+
+def _content_hash(title, description) -> str:
+    return hashlib.sha256(f"{title or ''}\x00{description or ''}".encode()).hexdigest()
+
+
+def _backfill(conn) -> None:
+    """Create definitions for existing rows and point the rows at them, BATCH_SIZE rows at a time."""
+    known = {}
+    max_id = conn.execute(sa.select(sa.func.max(audits.c.id))).scalar() or 0
+
+    for start in range(0, max_id + 1, BATCH_SIZE):
+        rows = conn.execute(
+            sa.select(audits.c.id, audits.c.title, audits.c.description)
+            .where(audits.c.id >= start, audits.c.id < start + BATCH_SIZE)
+        ).all()
+        if not rows:
+            continue
+
+        updates = []
+        for row in rows:
+            key = _content_hash(row.title, row.description)
+            if key not in known:
+                known[key] = conn.execute(
+                    sa.insert(definitions)
+                    .values(audit_key=LEGACY_AUDIT_KEY, content_hash=key, title=row.title, description=row.description)
+                    .returning(definitions.c.id)
+                ).scalar_one()
+            updates.append({'audit_id': row.id, 'definition_id': known[key]})
+
+        conn.execute(
+            sa.update(audits)
+            .where(audits.c.id == sa.bindparam('audit_id'))
+            .values(definition_id=sa.bindparam('definition_id')),
+            updates
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'audit_definitions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('audit_key', sa.String(), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('title', sa.String(), nullable=True),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('audit_key', 'content_hash', name='uq_audit_definitions_key_hash')
+    )
+    op.create_index(op.f('ix_audit_definitions_id'), 'audit_definitions', ['id'], unique=False)
+
+    op.add_column('pagespeed_audits', sa.Column('definition_id', sa.Integer(), nullable=True))
+    op.add_column('pagespeed_audits', sa.Column('numeric_value', sa.Float(), nullable=True))
+
+    _backfill(op.get_bind())
+
+    with op.batch_alter_table('pagespeed_audits') as batch_op:
+        batch_op.alter_column('definition_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key(
+            'pagespeed_audits_definition_id_fkey', 'audit_definitions', ['definition_id'], ['id']
+        )
+        batch_op.create_index(batch_op.f('ix_pagespeed_audits_definition_id'), ['definition_id'], unique=False)
+        batch_op.drop_column('title')
+        batch_op.drop_column('description')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('pagespeed_audits') as batch_op:
+        batch_op.add_column(sa.Column('title', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('description', sa.String(), nullable=True))
+
+    conn = op.get_bind()
+    conn.execute(
+        sa.update(audits).values(
+            title=sa.select(definitions.c.title).where(definitions.c.id == audits.c.definition_id).scalar_subquery(),
+            description=sa.select(definitions.c.description).where(definitions.c.id == audits.c.definition_id).scalar_subquery(),
+        )
+    )
+
+    with op.batch_alter_table('pagespeed_audits') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_pagespeed_audits_definition_id'))
+        batch_op.drop_constraint('pagespeed_audits_definition_id_fkey', type_='foreignkey')
+        batch_op.drop_column('numeric_value')
+        batch_op.drop_column('definition_id')
+
+    op.drop_index(op.f('ix_audit_definitions_id'), table_name='audit_definitions')
+    op.drop_table('audit_definitions')
@@ -0,0 +1,35 @@
+"""Add source_analysis_id to PageSpeedAnalysis
+
+Revision ID: 9d3e61a4c2b7
+Revises: 4b1f9c2d7e10
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3e61a4c2b7'
+down_revision: Union[str, Sequence[str], None] = '4b1f9c2d7e10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('pagespeed_analyses', sa.Column('source_analysis_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'pagespeed_analyses_source_analysis_id_fkey', 'pagespeed_analyses', 'pagespeed_analyses',
+        ['source_analysis_id'], ['id']
+    )
+    op.create_index(op.f('ix_pagespeed_analyses_source_analysis_id'), 'pagespeed_analyses', ['source_analysis_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_pagespeed_analyses_source_analysis_id'), table_name='pagespeed_analyses')
+    op.drop_constraint('pagespeed_analyses_source_analysis_id_fkey', 'pagespeed_analyses', type_='foreignkey')
+    op.drop_column('pagespeed_analyses', 'source_analysis_id')
@@ -0,0 +1,55 @@
+"""Add monitored_urls and link scheduled jobs
+
+Revision ID: a2f6c81e3b57
+Revises: 5c7d2e8f4a13
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2f6c81e3b57'
+down_revision: Union[str, Sequence[str], None] = '5c7d2e8f4a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'monitored_urls',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('url', sa.String(), nullable=False),
+        sa.Column('interval', sa.String(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), server_default='true', nullable=False),
+        sa.Column('next_run_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_enqueued_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'url', name='uq_monitored_urls_user_url')
+    )
+    op.create_index(op.f('ix_monitored_urls_id'), 'monitored_urls', ['id'], unique=False)
+    op.create_index('ix_monitored_urls_active_next_run', 'monitored_urls', ['is_active', 'next_run_at'], unique=False)
+
+    op.add_column('analysis_jobs', sa.Column('monitor_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'analysis_jobs_monitor_id_fkey', 'analysis_jobs', 'monitored_urls', ['monitor_id'], ['id']
+    )
+    op.create_index(op.f('ix_analysis_jobs_monitor_id'), 'analysis_jobs', ['monitor_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_analysis_jobs_monitor_id'), table_name='analysis_jobs')
+    op.drop_constraint('analysis_jobs_monitor_id_fkey', 'analysis_jobs', type_='foreignkey')
+    op.drop_column('analysis_jobs', 'monitor_id')
+
+    op.drop_index('ix_monitored_urls_active_next_run', table_name='monitored_urls')
+    op.drop_index(op.f('ix_monitored_urls_id'), table_name='monitored_urls')
+    op.drop_table('monitored_urls')
@@ -0,0 +1,50 @@
+"""Add per-user history indexes on pagespeed_analyses and pagespeed_audits.analysis_id
+
+Revision ID: b7d3e9a4c2f8
+Revises: a2f6c81e3b57
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d3e9a4c2f8'
+down_revision: Union[str, Sequence[str], None] = 'a2f6c81e3b57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY on PostgreSQL, so the tables stay writable while the indexes build.
+    # That cannot run inside a transaction, hence the autocommit block.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_pagespeed_analyses_user_created', 'pagespeed_analyses',
+            ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_pagespeed_analyses_user_strategy_created', 'pagespeed_analyses',
+            ['user_id', 'strategy', sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            op.f('ix_pagespeed_audits_analysis_id'), 'pagespeed_audits', ['analysis_id'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_pagespeed_audits_analysis_id'), table_name='pagespeed_audits',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_pagespeed_analyses_user_strategy_created', table_name='pagespeed_analyses',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_pagespeed_analyses_user_created', table_name='pagespeed_analyses',
+                      postgresql_concurrently=True, if_exists=True)
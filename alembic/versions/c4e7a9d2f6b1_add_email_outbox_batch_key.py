@@ -0,0 +1,30 @@
+"""Add email_outbox.batch_key
+
+Revision ID: c4e7a9d2f6b1
+Revises: 6d2b8f1e4a90
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e7a9d2f6b1'
+down_revision: Union[str, Sequence[str], None] = '6d2b8f1e4a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('email_outbox', sa.Column('batch_key', sa.String(length=64), nullable=True))
+    op.create_index('ix_email_outbox_batch_key', 'email_outbox', ['batch_key'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_email_outbox_batch_key', table_name='email_outbox')
+    op.drop_column('email_outbox', 'batch_key')
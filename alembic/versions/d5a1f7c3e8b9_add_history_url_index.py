@@ -0,0 +1,35 @@
+"""Add (user_id, url, created_at) index for URL-filtered history
+
+Revision ID: d5a1f7c3e8b9
+Revises: b7d3e9a4c2f8
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a1f7c3e8b9'
+down_revision: Union[str, Sequence[str], None] = 'b7d3e9a4c2f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_pagespeed_analyses_user_url_created', 'pagespeed_analyses',
+            ['user_id', 'url', sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_pagespeed_analyses_user_url_created', table_name='pagespeed_analyses',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,59 @@
+"""Add metric columns and analysis_rollups table
+
+Revision ID: e81b5c3d9a62
+Revises: 3a9f0d6b8c21
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e81b5c3d9a62'
+down_revision: Union[str, Sequence[str], None] = '3a9f0d6b8c21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+METRIC_COLUMNS = ('lcp', 'cls', 'tbt', 'fcp', 'speed_index', 'tti')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column in METRIC_COLUMNS:
+        op.add_column('pagespeed_analyses', sa.Column(column, sa.Float(), nullable=True))
+
+    op.create_table(
+        'analysis_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('url', sa.String(), nullable=False),
+        sa.Column('strategy', sa.String(), nullable=False),
+        sa.Column('granularity', sa.String(), nullable=False),
+        sa.Column('bucket_start', sa.Date(), nullable=False),
+        sa.Column('metric', sa.String(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('min_value', sa.Float(), nullable=False),
+        sa.Column('max_value', sa.Float(), nullable=False),
+        sa.Column('avg_value', sa.Float(), nullable=False),
+        sa.Column('p75_value', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'user_id', 'url', 'strategy', 'granularity', 'bucket_start', 'metric',
+            name='uq_analysis_rollups_bucket'
+        )
+    )
+    op.create_index(op.f('ix_analysis_rollups_id'), 'analysis_rollups', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_analysis_rollups_id'), table_name='analysis_rollups')
+    op.drop_table('analysis_rollups')
+
+    for column in reversed(METRIC_COLUMNS):
+        op.drop_column('pagespeed_analyses', column)
@@ -0,0 +1,80 @@
+"""Add audit retention: users.plan, audit_summaries and cascading audit deletes
+
+Revision ID: f3c8a2d6b4e1
+Revises: d5a1f7c3e8b9
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c8a2d6b4e1'
+down_revision: Union[str, Sequence[str], None] = 'd5a1f7c3e8b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('plan', sa.String(), server_default='free', nullable=False))
+    op.add_column('pagespeed_analyses', sa.Column('audits_purged_at', sa.DateTime(timezone=True), nullable=True))
+
+    op.create_table(
+        'audit_summaries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('url', sa.String(), nullable=False),
+        sa.Column('strategy', sa.String(), nullable=False),
+        sa.Column('bucket_start', sa.Date(), nullable=False),
+        sa.Column('definition_id', sa.Integer(), nullable=False),
+        sa.Column('sample_count', sa.Integer(), nullable=False),
+        sa.Column('score_count', sa.Integer(), nullable=False),
+        sa.Column('score_sum', sa.Float(), nullable=False),
+        sa.Column('min_score', sa.Float(), nullable=True),
+        sa.Column('numeric_count', sa.Integer(), nullable=False),
+        sa.Column('numeric_sum', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['definition_id'], ['audit_definitions.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'url', 'strategy', 'bucket_start', 'definition_id', name='uq_audit_summaries_bucket')
+    )
+    op.create_index(op.f('ix_audit_summaries_id'), 'audit_summaries', ['id'], unique=False)
+
+    # Re-created with ON DELETE CASCADE. NOT VALID + VALIDATE avoids blocking writes while existing rows are checked.
+    op.drop_constraint('pagespeed_audits_analysis_id_fkey', 'pagespeed_audits', type_='foreignkey')
+    op.create_foreign_key(
+        'pagespeed_audits_analysis_id_fkey', 'pagespeed_audits', 'pagespeed_analyses',
+        ['analysis_id'], ['id'], ondelete='CASCADE', postgresql_not_valid=True,
+    )
+
+    # Outside the migration's transaction: it would otherwise keep the ACCESS EXCLUSIVE lock
+    # taken by the ALTERs above for the whole validation scan
+    with op.get_context().autocommit_block():
+        op.execute('ALTER TABLE pagespeed_audits VALIDATE CONSTRAINT pagespeed_audits_analysis_id_fkey')
+        op.create_index(
+            'ix_pagespeed_analyses_unpurged_created', 'pagespeed_analyses', ['created_at', 'id'],
+            unique=False, postgresql_where=sa.text('audits_purged_at IS NULL'),
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_pagespeed_analyses_unpurged_created', table_name='pagespeed_analyses',
+                      postgresql_concurrently=True, if_exists=True)
+
+    op.drop_constraint('pagespeed_audits_analysis_id_fkey', 'pagespeed_audits', type_='foreignkey')
+    op.create_foreign_key(
+        'pagespeed_audits_analysis_id_fkey', 'pagespeed_audits', 'pagespeed_analyses', ['analysis_id'], ['id'],
+    )
+
+    op.drop_index(op.f('ix_audit_summaries_id'), table_name='audit_summaries')
+    op.drop_table('audit_summaries')
+    op.drop_column('pagespeed_analyses', 'audits_purged_at')
+    op.drop_column('users', 'plan')
@@ -0,0 +1,122 @@
+# app/commands/email_sender.py
+#
+# E-mail sender – drains the email_outbox table over one pooled Resend client.
+# Run with:  python -m app.commands.email_sender [--concurrency 2] [--once] [--retry-dead]
+
+import os
+import socket
+import asyncio
+import logging
+import argparse
+
+from app.database import SessionLocal
+from app.services.email_outbox import (
+    OutboxMessage, claim_emails, deliver, mark_sent, mark_failed, requeue_stale_emails, retry_dead_emails,
+)
+from app.services.mail import close_resend_client, get_resend_client, RESEND_BATCH_LIMIT
+
+# Import all models so relationships resolve
+import app.models.user  # noqa: F401
+import app.models.pagespeed_analysis  # noqa: F401
+
+logging.basicConfig(level=logging.INFO)
+
+SENDER_CONCURRENCY = int(os.getenv("EMAIL_SENDER_CONCURRENCY", "2"))
+POLL_INTERVAL = float(os.getenv("EMAIL_SENDER_POLL_INTERVAL", "1.0"))
+STALE_CHECK_INTERVAL = 60
+
+
+def _claim(worker_id: str, limit: int) -> list[OutboxMessage]:
+    with SessionLocal() as db:
+        return claim_emails(db, worker_id, limit)
+
+
+def _record(sent, failed):
+    with SessionLocal() as db:
+        mark_sent(db, sent)
+        mark_failed(db, failed)
+
+
+def _requeue_stale():
+    with SessionLocal() as db:
+        requeue_stale_emails(db)
+
+
+async def sender_loop(worker_id: str, stop: asyncio.Event, batch_size: int, once: bool) -> int:
+    """Claim, send and record batches until `stop` is set (or, with `once`, the outbox is empty)."""
+    delivered = 0
+    while not stop.is_set():
+        messages = await asyncio.to_thread(_claim, worker_id, batch_size)
+        if not messages:
+            if once:
+                break
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        sent, failed = await deliver(messages)
+        await asyncio.to_thread(_record, sent, failed)
+        delivered += len(sent)
+        if failed:
+            logging.warning(f"📭 {len(failed)} of {len(messages)} e-mail(s) failed: {failed[0][1]}")
+    return delivered
+
+
+async def stale_loop(stop: asyncio.Event):
+    while not stop.is_set():
+        await asyncio.to_thread(_requeue_stale)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=STALE_CHECK_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_sender(
+    concurrency: int = SENDER_CONCURRENCY,
+    batch_size: int = RESEND_BATCH_LIMIT,
+    once: bool = False,
+    stop: asyncio.Event | None = None,
+) -> int:
+    """
+    Run `concurrency` sender loops in this process; returns the number of e-mails delivered.
+    With `once` the loops stop when nothing is due, otherwise when `stop` is set.
+    """
+    stop = stop or asyncio.Event()
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    get_resend_client()  # fail at start-up, not per e-mail, if RESEND_API_KEY is missing
+    logging.info(f"📮 E-mail sender {prefix} started with concurrency {concurrency}")
+
+    loops = [sender_loop(f"{prefix}:{n}", stop, batch_size, once) for n in range(concurrency)]
+    try:
+        if once:
+            await asyncio.to_thread(_requeue_stale)
+            return sum(await asyncio.gather(*loops))
+        results = await asyncio.gather(stale_loop(stop), *loops)
+        return sum(results[1:])
+    finally:
+        await close_resend_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send the e-mails waiting in email_outbox.")
+    parser.add_argument("--concurrency", type=int, default=SENDER_CONCURRENCY)
+    parser.add_argument("--batch-size", type=int, default=RESEND_BATCH_LIMIT, help=f"e-mails per Resend call (max {RESEND_BATCH_LIMIT})")
+    parser.add_argument("--once", action="store_true", help="send what is due and exit (for cron)")
+    parser.add_argument("--retry-dead", action="store_true", help="re-queue dead-lettered e-mails first")
+    args = parser.parse_args()
+
+    if args.retry_dead:
+        with SessionLocal() as db:
+            logging.info(f"♻️ Re-queued {retry_dead_emails(db)} dead-lettered e-mail(s)")
+
+    try:
+        delivered = asyncio.run(run_sender(args.concurrency, min(args.batch_size, RESEND_BATCH_LIMIT), args.once))
+        logging.info(f"✅ Delivered {delivered} e-mail(s)")
+    except KeyboardInterrupt:
+        logging.info("👋 E-mail sender stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# app/commands/rebuild_rollups.py
+#
+# Recompute analysis_rollups from stored analyses, e.g. after the table was added
+# or metrics were backfilled with app.commands.reextract.
+# Run with:  python -m app.commands.rebuild_rollups [--user-id 3]
+
+import logging
+import argparse
+
+from sqlalchemy import select
+
+from app.database import SessionLocal
+from app.models.pagespeed_analysis import PageSpeedAnalysis
+from app.models.analysis_rollup import GRANULARITY_DAY
+from app.services.rollups import refresh_rollups, bucket_start
+
+# Import all models so relationships resolve
+import app.models.user  # noqa: F401
+
+logging.basicConfig(level=logging.INFO)
+
+
+def rebuild_rollups(user_id: int | None = None, batch_size: int = 500) -> int:
+    """
+    Refresh every (user, URL, strategy, day) bucket that has analyses – each refresh
+    also recomputes the surrounding week. Commits once per batch of buckets.
+    Returns the number of day buckets refreshed.
+    """
+    db = SessionLocal()
+    try:
+        query = (
+            select(PageSpeedAnalysis.user_id, PageSpeedAnalysis.url, PageSpeedAnalysis.strategy, PageSpeedAnalysis.created_at)
+            .where(PageSpeedAnalysis.user_id.is_not(None))
+            .order_by(PageSpeedAnalysis.user_id, PageSpeedAnalysis.url, PageSpeedAnalysis.strategy, PageSpeedAnalysis.created_at)
+        )
+        if user_id is not None:
+            query = query.where(PageSpeedAnalysis.user_id == user_id)
+
+        buckets = {}
+        for row in db.execute(query):
+            key = (row.user_id, row.url, row.strategy, bucket_start(row.created_at, GRANULARITY_DAY))
+            buckets.setdefault(key, row.created_at)
+
+        for n, ((bucket_user_id, url, strategy, _), created_at) in enumerate(buckets.items(), start=1):
+            refresh_rollups(db, bucket_user_id, url, strategy, created_at)
+            if n % batch_size == 0:
+                db.commit()
+                logging.info(f"📈 {n}/{len(buckets)} buckets refreshed")
+        db.commit()
+        return len(buckets)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute analysis rollups from stored analyses.")
+    parser.add_argument("--user-id", type=int)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    count = rebuild_rollups(args.user_id, args.batch_size)
+    logging.info(f"✅ Rollups rebuilt for {count} day buckets")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# app/commands/reextract.py
+#
+# Rebuild audits and metrics from archived Lighthouse reports – no PSI calls.
+# Run with:  python -m app.commands.reextract [--analysis-id 12 ...] [--batch-size 100]
+
+import logging
+import argparse
+
+from sqlalchemy import select
+
+from app.database import SessionLocal
+from app.models.pagespeed_analysis import PageSpeedAnalysis
+from app.services.analysis_store import rebuild_analysis
+from app.services.lighthouse_parser import extract_lighthouse
+from app.services.report_archive import load_report_bytes
+
+# Import all models so relationships resolve
+import app.models.user  # noqa: F401
+
+logging.basicConfig(level=logging.INFO)
+
+
+def reextract(analysis_ids: list[int] | None = None, batch_size: int = 100) -> tuple[int, int]:
+    """
+    Re-run extraction for every analysis with an archived report (or only analysis_ids),
+    committing once per batch. Returns (rebuilt, skipped).
+    """
+    rebuilt = skipped = 0
+    last_id = 0
+    db = SessionLocal()
+    try:
+        while True:
+            query = (
+                select(PageSpeedAnalysis.id, PageSpeedAnalysis.report_id)
+                .where(PageSpeedAnalysis.report_id.is_not(None), PageSpeedAnalysis.id > last_id)
+                .order_by(PageSpeedAnalysis.id)
+                .limit(batch_size)
+            )
+            if analysis_ids:
+                query = query.where(PageSpeedAnalysis.id.in_(analysis_ids))
+            rows = db.execute(query).all()
+            if not rows:
+                break
+
+            for row in rows:
+                data = extract_lighthouse(load_report_bytes(db, row.report_id))
+                if data["lighthouseResult"]["categories"].get("performance", {}).get("score") is None:
+                    logging.warning(f"⚠️ Report {row.report_id} for analysis {row.id} has no performance score – skipped")
+                    skipped += 1
+                    continue
+                rebuild_analysis(db, row.id, data)
+                rebuilt += 1
+
+            db.commit()
+            last_id = rows[-1].id
+            logging.info(f"🔁 Re-extracted up to analysis {last_id} ({rebuilt} rebuilt)")
+    finally:
+        db.close()
+
+    return rebuilt, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild audits and metrics from archived Lighthouse reports.")
+    parser.add_argument("--analysis-id", type=int, action="append", dest="analysis_ids")
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    rebuilt, skipped = reextract(args.analysis_ids, args.batch_size)
+    logging.info(f"✅ Re-extraction finished: {rebuilt} rebuilt, {skipped} skipped")
+
+
+if __name__ == "__main__":
+    main()
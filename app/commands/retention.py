@@ -0,0 +1,41 @@
+# app/commands/retention.py
+#
+# Summarize and delete raw audits past each plan's retention window
+# (AUDIT_RETENTION_DAYS, AUDIT_RETENTION_DAYS_<PLAN>). Meant for cron, e.g. nightly.
+# Run with:  python -m app.commands.retention [--plan free] [--chunk-size 200] [--max-chunks 500]
+
+import logging
+import argparse
+
+from app.database import SessionLocal
+from app.services.retention import purge_expired_audits, RETENTION_CHUNK_SIZE, RETENTION_PAUSE
+
+# Import all models so relationships resolve
+import app.models.user  # noqa: F401
+import app.models.pagespeed_analysis  # noqa: F401
+
+logging.basicConfig(level=logging.INFO)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Downsample and purge audits past the retention window.")
+    parser.add_argument("--plan", help="only this plan (default: every plan in use)")
+    parser.add_argument("--chunk-size", type=int, default=RETENTION_CHUNK_SIZE, help="analyses per transaction")
+    parser.add_argument("--max-chunks", type=int, help="stop after this many chunks per plan (bounds the run time)")
+    parser.add_argument("--pause", type=float, default=RETENTION_PAUSE, help="seconds to sleep between chunks")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        report = purge_expired_audits(db, plan=args.plan, chunk_size=args.chunk_size, max_chunks=args.max_chunks, pause=args.pause)
+    finally:
+        db.close()
+
+    logging.info(
+        f"✅ Retention: {report.audits_deleted} audit rows deleted from {report.analyses} analyses, "
+        f"{report.summaries_written} summary rows written in {report.seconds:.1f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# app/commands/scheduler.py
+#
+# Monitoring scheduler – turns due monitored_urls into analysis jobs for the workers.
+# Run with:  python -m app.commands.scheduler
+# Several instances may run at once on PostgreSQL (due rows are claimed with SKIP LOCKED).
+
+import os
+import time
+import logging
+import argparse
+
+from app.database import SessionLocal
+from app.services.monitoring import schedule_due, SCHEDULER_BATCH_SIZE
+
+# Import all models so relationships resolve
+import app.models.user  # noqa: F401
+import app.models.pagespeed_analysis  # noqa: F401
+
+logging.basicConfig(level=logging.INFO)
+
+SCHEDULER_TICK = float(os.getenv("SCHEDULER_TICK", "30"))
+
+
+def tick(batch_size: int = SCHEDULER_BATCH_SIZE) -> int:
+    """
+    Enqueue everything that is due, one batch per transaction. Returns jobs enqueued.
+    """
+    enqueued = 0
+    db = SessionLocal()
+    try:
+        while True:
+            handled, jobs = schedule_due(db, batch_size)
+            enqueued += jobs
+            if handled < batch_size:
+                return enqueued
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the monitoring scheduler.")
+    parser.add_argument("--tick", type=float, default=SCHEDULER_TICK, help="seconds between checks")
+    parser.add_argument("--batch-size", type=int, default=SCHEDULER_BATCH_SIZE)
+    parser.add_argument("--once", action="store_true", help="run a single tick and exit")
+    args = parser.parse_args()
+
+    logging.info(f"🗓️ Monitoring scheduler started (tick {args.tick} s)")
+    try:
+        while True:
+            started = time.monotonic()
+            enqueued = tick(args.batch_size)
+            if enqueued:
+                logging.info(f"🗓️ Enqueued {enqueued} scheduled analyses in {time.monotonic() - started:.2f} s")
+            if args.once:
+                break
+            time.sleep(args.tick)
+    except KeyboardInterrupt:
+        logging.info("👋 Monitoring scheduler stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# app/commands/worker.py
+#
+# Analysis worker – drains the analysis_jobs queue.
+# Run with:  python -m app.commands.worker --concurrency 4
+
+import os
+import time
+import socket
+import asyncio
+import logging
+import argparse
+
+from app.database import SessionLocal
+from app.models.analysis_job import AnalysisJob
+from app.services.analysis_queue import claim_next_job, complete_job, fail_job, requeue_stale_jobs, JOB_TIMEOUT
+from app.services.pagespeed import run_pagespeed_analysis_async, close_psi_client
+from app.services.psi_limiter import PageSpeedError, stats as psi_stats
+
+# Import all models so relationships resolve
+import app.models.user  # noqa: F401
+import app.models.pagespeed_analysis  # noqa: F401
+
+logging.basicConfig(level=logging.INFO)
+
+WORKER_CONCURRENCY = int(os.getenv("ANALYSIS_WORKER_CONCURRENCY", "4"))
+POLL_INTERVAL = float(os.getenv("ANALYSIS_WORKER_POLL_INTERVAL", "1.0"))
+STALE_CHECK_INTERVAL = 60  # also how often PSI counters are logged
+
+
+def _claim(worker_id: str) -> AnalysisJob | None:
+    db = SessionLocal()
+    try:
+        job = claim_next_job(db, worker_id)
+        if job:
+            db.expunge(job)
+        return job
+    finally:
+        db.close()
+
+
+def _finish(job_id: int, error: str | None = None, analysis_ids: list[int] | None = None,
+            retry_after: float | None = None):
+    db = SessionLocal()
+    try:
+        job = db.get(AnalysisJob, job_id)
+        if error is None:
+            complete_job(db, job, analysis_ids)
+        else:
+            fail_job(db, job, error, retry_after)
+    finally:
+        db.close()
+
+
+def _requeue_stale():
+    db = SessionLocal()
+    try:
+        requeue_stale_jobs(db)
+    finally:
+        db.close()
+
+
+async def run_job(job: AnalysisJob):
+    """
+    Run a single claimed job and record the outcome.
+    """
+    logging.info(f"⚙️ Job {job.id} (attempt {job.attempts}): {job.url}")
+    analysis_ids = None
+    retry_after = None
+    # Finish (or give up) before requeue_stale_jobs considers the job lost
+    deadline = time.monotonic() + JOB_TIMEOUT
+    try:
+        analysis_ids = await run_pagespeed_analysis_async(job.url, user_id=job.user_id, deadline=deadline)
+        error = None
+    except PageSpeedError as exc:
+        error = str(exc)
+        retry_after = exc.retry_after
+    except Exception as exc:
+        logging.exception(f"❌ Job {job.id} crashed")
+        error = repr(exc)
+
+    await asyncio.to_thread(_finish, job.id, error, analysis_ids, retry_after)
+
+
+async def worker_loop(worker_id: str, stop: asyncio.Event):
+    while not stop.is_set():
+        job = await asyncio.to_thread(_claim, worker_id)
+        if job is None:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        await run_job(job)
+
+
+async def stale_job_loop(stop: asyncio.Event):
+    while not stop.is_set():
+        await asyncio.to_thread(_requeue_stale)
+        logging.info(f"📊 PSI stats: {psi_stats.as_dict()}")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=STALE_CHECK_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_worker(concurrency: int = WORKER_CONCURRENCY, stop: asyncio.Event | None = None):
+    """
+    Run `concurrency` job loops in this process until `stop` is set.
+    """
+    stop = stop or asyncio.Event()
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    logging.info(f"🚀 Analysis worker {prefix} started with concurrency {concurrency}")
+
+    try:
+        await asyncio.gather(
+            stale_job_loop(stop),
+            *(worker_loop(f"{prefix}:{n}", stop) for n in range(concurrency)),
+        )
+    finally:
+        await close_psi_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the PageSpeed analysis worker.")
+    parser.add_argument("--concurrency", type=int, default=WORKER_CONCURRENCY)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run_worker(args.concurrency))
+    except KeyboardInterrupt:
+        logging.info("👋 Analysis worker stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
@@ -17,13 +19,68 @@ else:
 if not DATABASE_URL:
     raise ValueError("No database URL found. Please check your .env file.")
 
+# Connection pool settings (per process – each engine has its own pool)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # below typical managed-DB idle timeouts
+
+
+def _pool_options(url) -> dict:
+    options = {"pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE}
+    if url.get_backend_name() != "sqlite":
+        # SQLite uses its own pool classes without size limits
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    return options
+
+
+def _async_url(url):
+    """
+    Same database, async driver: asyncpg for PostgreSQL, aiosqlite for SQLite.
+    asyncpg has no sslmode parameter, so it is translated to the ssl connect argument.
+    """
+    connect_args = {}
+    if url.get_backend_name() == "postgresql":
+        sslmode = url.query.get("sslmode")
+        if sslmode:
+            url = url.difference_update_query(["sslmode"])
+            if sslmode != "disable":
+                connect_args["ssl"] = sslmode
+        url = url.set(drivername="postgresql+asyncpg")
+    elif url.get_backend_name() == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url, connect_args
+
+
+# Heroku/DigitalOcean style "postgres://" URLs are not accepted by SQLAlchemy 2
+_url = make_url(DATABASE_URL.replace("postgres://", "postgresql://", 1))
+
 # Create connection to PostgreSQL
-engine = create_engine(DATABASE_URL)
+engine = create_engine(_url, **_pool_options(_url))
 
 # SessionLocal = used to create DB sessions in endpoints
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# Base = shared base class for all models
-Base = declarative_base()
+# Async engine for async def routes, so queries do not block the event loop
+_async_db_url, _async_connect_args = _async_url(_url)
+async_engine = create_async_engine(_async_db_url, connect_args=_async_connect_args, **_pool_options(_async_db_url))
+
+# expire_on_commit=False – objects stay readable after commit without an implicit (sync) refresh
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite ignores foreign keys – and ON DELETE CASCADE, which the ORM relies on through
+    # passive_deletes – unless each connection turns them on
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
 
 
+if _url.get_backend_name() == "sqlite":
+    event.listen(engine, "connect", _enable_sqlite_foreign_keys)
+    event.listen(async_engine.sync_engine, "connect", _enable_sqlite_foreign_keys)
+
+# Base = shared base class for all models
+Base = declarative_base()
@@ -0,0 +1,65 @@
+import os
+import time
+import logging
+import tempfile
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, TemplateError, pass_context
+from fastapi.templating import Jinja2Templates
+from app.utils.csrf import generate_csrf_token
+
+# ✅ Settings
+# Compiled template bytecode survives restarts here, shared by every worker on the host
+TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "testlegion-templates"))
+# Re-check template files for changes on every render – for development only
+TEMPLATE_AUTO_RELOAD = os.getenv(
+    "TEMPLATE_AUTO_RELOAD", "false" if os.getenv("DIGITALOCEAN") == "true" else "true"
+).lower() == "true"
+# Compile every template at startup instead of on the first request that needs it
+TEMPLATE_WARMUP = os.getenv("TEMPLATE_WARMUP", "true").lower() == "true"
+
+os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+_bytecode_cache = FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)
+
+
+# ✅ CSRF-token helper function
+@pass_context
+def csrf_token(context):
+    # Stateless HMAC token – rendering a form does not write the session
+    return generate_csrf_token(context["request"])
+
+
+def _templates(directory: str) -> Jinja2Templates:
+    env = Environment(
+        loader=FileSystemLoader(directory),
+        autoescape=True,  # as Jinja2Templates does by default
+        bytecode_cache=_bytecode_cache,
+        auto_reload=TEMPLATE_AUTO_RELOAD,
+    )
+    env.globals["csrf_token"] = csrf_token
+    return Jinja2Templates(env=env)
+
+
+# ✅ Templates – the only instances; import these everywhere
+templates_public = _templates("app/templates/public")
+templates_admin = _templates("app/templates/admin")
+
+
+def warm_up_templates() -> int:
+    """
+    Compile every public and admin template into its environment's cache (loading the
+    bytecode when another worker already compiled it), so the first request after a
+    deploy or scale-out renders as fast as the rest. Returns the number of templates.
+    """
+    if not TEMPLATE_WARMUP:
+        return 0
+    started = time.perf_counter()
+    count = 0
+    for templates in (templates_public, templates_admin):
+        env = templates.env
+        for name in env.list_templates(extensions=["html"]):
+            try:
+                env.get_template(name)
+                count += 1
+            except TemplateError as exc:
+                logging.warning(f"⚠️ Template {name} could not be compiled: {exc}")
+    logging.info(f"🧩 Compiled {count} templates in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return count
@@ -1,19 +1,29 @@
 import logging
 import os
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, BackgroundTasks, Depends, Request
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from starlette.middleware.sessions import SessionMiddleware
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 # Local imports
-from app.database import Base, engine
+from app.database import Base, engine, async_engine
 from app.dependencies.common import get_db
-from app.models.schemas import AnalyseInput
-from app.services.pagespeed import run_pagespeed_analysis
+from app.models.schemas import AnalyseInput, AnalyseBatchInput, AnalysisJobOut, AnalysisBatchOut
+from app.models import analysis_job, analysis_rollup, audit_summary, rate_limit, stored_session, email_outbox  # noqa: F401 – register tables for create_all
+from app.services.analysis_queue import (
+    enqueue_analysis, get_job, enqueue_batch, get_batch, batch_progress, batch_worst_pages, BATCH_MAX_URLS,
+)
+from app.services.sitemap import iter_sitemap_urls, SitemapError
+from app.services.pagespeed import close_psi_client
+from app.services.email_templates import precompile_email_templates
+from app.dependencies.templates import warm_up_templates
+from app.services.passwords import PasswordServiceBusy, PASSWORD_RETRY_AFTER, shutdown_password_executor
+from app.utils.server_session import ServerSessionMiddleware
+from app.utils.session import require_login, CurrentUser
 from app.routes import admin, auth, public
 from app.dependencies import common  
 
@@ -22,18 +32,32 @@ from app.dependencies import common
 # -----------------------------------------------------------
 logging.basicConfig(level=logging.INFO)
 
+# -----------------------------------------------------------
+# ✅ Lifespan (startup / shutdown)
+# -----------------------------------------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compile templates before the first request instead of during it
+    warm_up_templates()
+    precompile_email_templates()
+    yield
+    # Close pooled outbound connections
+    await close_psi_client()
+    await async_engine.dispose()
+    shutdown_password_executor()
+
 # -----------------------------------------------------------
 # ✅ Initialize FastAPI app
 # -----------------------------------------------------------
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 
 # -----------------------------------------------------------
 # ✅ Middleware
 # -----------------------------------------------------------
 
-# Session support
-app.add_middleware(SessionMiddleware, secret_key=os.getenv("SECRET_KEY", "mysecret"))
+# Session support – data stays on the server (SESSION_BACKEND), the cookie only holds an id
+app.add_middleware(ServerSessionMiddleware, skip_paths=("/static/", "/admin/static/"))
 
 # CORS (for local and deployed frontend access)
 app.add_middleware(
@@ -49,16 +73,22 @@ app.add_middleware(
 )
 
 # -----------------------------------------------------------
-# ✅ Static files
+# ✅ Error handlers
 # -----------------------------------------------------------
-app.mount("/static/public", StaticFiles(directory="app/static/public"), name="public_static")
-app.mount("/admin/static", StaticFiles(directory="app/static/admin"), name="admin_static")
+@app.exception_handler(PasswordServiceBusy)
+async def password_service_busy(request: Request, exc: PasswordServiceBusy):
+    # Too many logins/signups waiting for bcrypt – fail fast instead of queueing
+    return PlainTextResponse(
+        "Serveren har travlt – prøv igen om et øjeblik.",
+        status_code=503,
+        headers={"Retry-After": str(PASSWORD_RETRY_AFTER)},
+    )
 
 # -----------------------------------------------------------
-# ✅ Templates setup
+# ✅ Static files
 # -----------------------------------------------------------
-templates_public = Jinja2Templates(directory="app/templates/public")
-templates_admin = Jinja2Templates(directory="app/templates/admin")
+app.mount("/static/public", StaticFiles(directory="app/static/public"), name="public_static")
+app.mount("/admin/static", StaticFiles(directory="app/static/admin"), name="admin_static")
 
 # -----------------------------------------------------------
 # ✅ Routers
@@ -73,13 +103,64 @@ app.include_router(public.router)
 Base.metadata.create_all(bind=engine)
 
 # -----------------------------------------------------------
-# ✅ Analyse endpoint (API)
+# ✅ Analyse endpoints (API)
 # -----------------------------------------------------------
-@app.post("/analyse")
-async def analyse(
+@app.post("/analyse", status_code=202)
+def analyse(
     input: AnalyseInput,
-    background_tasks: BackgroundTasks,
+    user: CurrentUser = Depends(require_login),
     db: Session = Depends(get_db)
 ):
-    background_tasks.add_task(run_pagespeed_analysis, input.url, db)
-    return {"message": "Analysen er startet i baggrunden"}
+    # Only enqueue – the analysis worker (app/commands/worker.py) does the PSI calls
+    job = enqueue_analysis(db, input.url, user_id=user.id)
+    return {"message": "Analysen er sat i kø", "job_id": job.id, "status": job.status}
+
+
+@app.post("/analyse/batch", status_code=202)
+async def analyse_batch(
+    input: AnalyseBatchInput,
+    user: CurrentUser = Depends(require_login),
+    db: Session = Depends(get_db)
+):
+    # The sitemap is parsed while it downloads; the worker pool then analyses the jobs
+    urls = list(input.urls)
+    if input.sitemap_url:
+        try:
+            async for url in iter_sitemap_urls(input.sitemap_url, limit=BATCH_MAX_URLS):
+                urls.append(url)
+        except SitemapError as exc:
+            raise HTTPException(status_code=422, detail=str(exc))
+    if not urls:
+        raise HTTPException(status_code=422, detail="Angiv mindst én URL eller et sitemap")
+
+    batch = await run_in_threadpool(
+        enqueue_batch, db, urls, user.id, input.sitemap_url
+    )
+    return {"message": "Batch er sat i kø", "batch_id": batch.id, "total": batch.total}
+
+
+@app.get("/analyse/batch/{batch_id}", response_model=AnalysisBatchOut)
+def analyse_batch_status(batch_id: int, user: CurrentUser = Depends(require_login), db: Session = Depends(get_db)):
+    batch = get_batch(db, batch_id, user.id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    progress = batch_progress(db, batch_id)
+    pending = progress["queued"] + progress["running"]
+    return AnalysisBatchOut(
+        id=batch.id,
+        status="running" if pending else "done",
+        total=batch.total,
+        sitemap_url=batch.sitemap_url,
+        created_at=batch.created_at,
+        worst_pages=batch_worst_pages(db, batch_id),
+        **progress,
+    )
+
+
+@app.get("/analyse/{job_id}", response_model=AnalysisJobOut)
+def analyse_status(job_id: int, user: CurrentUser = Depends(require_login), db: Session = Depends(get_db)):
+    # Other users' jobs are reported as missing, so job ids cannot be probed
+    job = get_job(db, job_id, user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -0,0 +1,50 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.database import Base
+from app.models import monitored_url  # noqa: F401 – target of the monitor_id foreign key
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class AnalysisBatch(Base):
+    """
+    A group of jobs submitted together (URL list or sitemap). Progress is derived
+    from the status of its jobs.
+    """
+    __tablename__ = "analysis_batches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    sitemap_url = Column(String, nullable=True)  # set when the URLs came from a sitemap
+    total = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class AnalysisJob(Base):
+    __tablename__ = "analysis_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    url = Column(String, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    batch_id = Column(Integer, ForeignKey("analysis_batches.id"), nullable=True, index=True)
+    monitor_id = Column(Integer, ForeignKey("monitored_urls.id"), nullable=True, index=True)  # scheduled run
+
+    status = Column(String, nullable=False, default=JOB_QUEUED, server_default=JOB_QUEUED)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    max_attempts = Column(Integer, nullable=False, default=3, server_default="3")
+    last_error = Column(String, nullable=True)
+    locked_by = Column(String, nullable=True)  # worker that currently owns the job
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    run_after = Column(DateTime(timezone=True), server_default=func.now())  # earliest next attempt
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Workers poll on (status, run_after)
+        Index("ix_analysis_jobs_status_run_after", "status", "run_after"),
+    )
@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+# Rollup granularities
+GRANULARITY_DAY = "day"
+GRANULARITY_WEEK = "week"  # buckets start on Monday (UTC)
+
+
+class AnalysisRollup(Base):
+    """
+    Pre-aggregated metric per (user, URL, strategy) and day/week, so trend views
+    read a few rows per bucket instead of scanning analyses.
+    Kept up to date by app.services.rollups as analyses are stored.
+    """
+    __tablename__ = "analysis_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    url = Column(String, nullable=False)
+    strategy = Column(String, nullable=False)
+    granularity = Column(String, nullable=False)
+    bucket_start = Column(Date, nullable=False)
+    metric = Column(String, nullable=False)  # 'performance_score', 'lcp', 'cls', ...
+
+    count = Column(Integer, nullable=False)
+    min_value = Column(Float, nullable=False)
+    max_value = Column(Float, nullable=False)
+    avg_value = Column(Float, nullable=False)
+    p75_value = Column(Float, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Also serves trend reads: user + url + strategy + granularity, ordered by bucket
+        UniqueConstraint(
+            "user_id", "url", "strategy", "granularity", "bucket_start", "metric",
+            name="uq_analysis_rollups_bucket",
+        ),
+    )
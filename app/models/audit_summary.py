@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class AuditSummary(Base):
+    """
+    Weekly per-audit aggregate for one (user, URL, strategy), written by the retention job
+    before raw pagespeed_audits rows past the plan's retention window are deleted.
+    Sums and counts (rather than averages) are stored so later runs can add to a week.
+    """
+    __tablename__ = "audit_summaries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    url = Column(String, nullable=False)
+    strategy = Column(String, nullable=False)
+    bucket_start = Column(Date, nullable=False)  # Monday (UTC) of the week
+    definition_id = Column(Integer, ForeignKey("audit_definitions.id"), nullable=False)
+
+    sample_count = Column(Integer, nullable=False)  # audit rows summarized
+    score_count = Column(Integer, nullable=False)  # ... of which had a score
+    score_sum = Column(Float, nullable=False)
+    min_score = Column(Float, nullable=True)
+    numeric_count = Column(Integer, nullable=False)
+    numeric_sum = Column(Float, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "url", "strategy", "bucket_start", "definition_id",
+            name="uq_audit_summaries_bucket",
+        ),
+    )
+
+    @property
+    def avg_score(self) -> float | None:
+        return self.score_sum / self.score_count if self.score_count else None
+
+    @property
+    def avg_numeric_value(self) -> float | None:
+        return self.numeric_sum / self.numeric_count if self.numeric_count else None
@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+# Outbox states
+EMAIL_PENDING = "pending"
+EMAIL_SENDING = "sending"
+EMAIL_SENT = "sent"
+EMAIL_DEAD = "dead"  # gave up – kept with last_error for inspection
+
+
+class EmailOutbox(Base):
+    """
+    A transactional e-mail waiting to be sent. Rows are added in the same transaction as the
+    change that causes them (signup, confirmation, password reset) and drained by the e-mail
+    sender (app/commands/email_sender.py).
+    """
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    to_email = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    html = Column(Text, nullable=False)
+
+    status = Column(String, nullable=False, default=EMAIL_PENDING, server_default=EMAIL_PENDING)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    max_attempts = Column(Integer, nullable=False, default=6, server_default="6")
+    last_error = Column(String, nullable=True)
+    locked_by = Column(String, nullable=True)  # sender that currently owns the row
+    provider_id = Column(String, nullable=True)  # Resend's e-mail id once sent
+    # Idempotency-Key of the Resend call the row was claimed for; a retry re-sends the same rows
+    # under the same key, so a call whose response was lost is not delivered twice
+    batch_key = Column(String(64), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    run_after = Column(DateTime(timezone=True), server_default=func.now())  # earliest next attempt
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # The sender polls on (status, run_after)
+        Index("ix_email_outbox_status_run_after", "status", "run_after"),
+        Index("ix_email_outbox_batch_key", "batch_key"),
+    )
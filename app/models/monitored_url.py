@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+# Schedule intervals in seconds
+MONITOR_INTERVALS = {
+    "hourly": 3600,
+    "daily": 24 * 3600,
+    "weekly": 7 * 24 * 3600,
+}
+
+
+class MonitoredUrl(Base):
+    """
+    A URL that is re-analysed on a schedule. The scheduler only ever reads
+    due rows through the (is_active, next_run_at) index.
+    """
+    __tablename__ = "monitored_urls"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    url = Column(String, nullable=False)
+    interval = Column(String, nullable=False)  # key of MONITOR_INTERVALS
+    is_active = Column(Boolean, nullable=False, default=True, server_default="true")
+
+    next_run_at = Column(DateTime(timezone=True), nullable=False)
+    last_enqueued_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "url", name="uq_monitored_urls_user_url"),
+        Index("ix_monitored_urls_active_next_run", "is_active", "next_run_at"),
+    )
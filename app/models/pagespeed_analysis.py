@@ -1,8 +1,10 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, LargeBinary
 from sqlalchemy.sql import func
 from app.database import Base
-from sqlalchemy import ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import ForeignKey, UniqueConstraint, Index
+from sqlalchemy.ext.associationproxy import association_proxy
+from sqlalchemy.orm import relationship, deferred
+from app.models import analysis_job  # noqa: F401 – target of the job_id foreign key
 
 class PageSpeedAnalysis(Base):
     __tablename__ = "pagespeed_analyses"
@@ -11,26 +13,114 @@ class PageSpeedAnalysis(Base):
     url = Column(String, nullable=False)
     strategy = Column(String, nullable=False)  # 'mobile' eller 'desktop'
     performance_score = Column(Float)
+
+    # Core Web Vitals / Lighthouse metrics – milliseconds, except cls (unitless)
+    lcp = Column(Float, nullable=True)
+    cls = Column(Float, nullable=True)
+    tbt = Column(Float, nullable=True)
+    fcp = Column(Float, nullable=True)
+    speed_index = Column(Float, nullable=True)
+    tti = Column(Float, nullable=True)
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     user = relationship("User", back_populates="analyses")
 
-    
-    audits = relationship("PageSpeedAudit", back_populates="analysis", cascade="all, delete-orphan")
+    # Set when the result was served from the PSI cache – audits live on the source analysis
+    source_analysis_id = Column(Integer, ForeignKey("pagespeed_analyses.id"), nullable=True, index=True)
+    source_analysis = relationship("PageSpeedAnalysis", remote_side=[id])
 
-class PageSpeedAudit(Base):
-    __tablename__ = "pagespeed_audits"
+    # passive_deletes: deleting an analysis leaves its audits to ON DELETE CASCADE instead of
+    # loading and deleting them one by one
+    audits = relationship("PageSpeedAudit", back_populates="analysis", cascade="all, delete-orphan", passive_deletes=True)
+
+    # Set by the retention job once the raw audits were summarized and deleted
+    audits_purged_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Job that produced the analysis (set by the worker)
+    job_id = Column(Integer, ForeignKey("analysis_jobs.id"), nullable=True, index=True)
+
+    # Compressed raw PSI response, only set when report archiving is enabled
+    report_id = Column(Integer, ForeignKey("lighthouse_reports.id"), nullable=True, index=True)
+    report = relationship("LighthouseReport")
+
+    __table_args__ = (
+        # Per-user history: newest first, optionally per strategy (id breaks ties for keyset paging)
+        Index("ix_pagespeed_analyses_user_created", user_id, created_at.desc(), id.desc()),
+        Index("ix_pagespeed_analyses_user_strategy_created", user_id, strategy, created_at.desc(), id.desc()),
+        # History filtered by URL (also used when rollups for one URL are recomputed)
+        Index("ix_pagespeed_analyses_user_url_created", user_id, url, created_at.desc(), id.desc()),
+        # Retention backlog: only analyses that still have raw audits
+        Index(
+            "ix_pagespeed_analyses_unpurged_created", created_at, id,
+            postgresql_where=audits_purged_at.is_(None), sqlite_where=audits_purged_at.is_(None),
+        ),
+    )
+
+    @property
+    def report_audits(self):
+        """Audits for this result – shared analyses read them from their source."""
+        if self.source_analysis_id is not None and self.source_analysis is not None:
+            return self.source_analysis.audits
+        return self.audits
+
+class LighthouseReport(Base):
+    """
+    Raw PSI response, compressed and content-addressed. The blob is deferred,
+    so loading a report row (or an analysis) never pulls the payload – call load().
+    """
+    __tablename__ = "lighthouse_reports"
 
     id = Column(Integer, primary_key=True, index=True)
-    analysis_id = Column(Integer, ForeignKey("pagespeed_analyses.id"), nullable=False)
+    content_hash = Column(String(64), nullable=False, unique=True)  # sha256 of the stored (uncompressed) JSON
+    codec = Column(String, nullable=False)  # 'zstd' eller 'gzip'
+    raw_size = Column(Integer, nullable=False)
+    compressed_size = Column(Integer, nullable=False)
+    screenshots_stripped = Column(Boolean, nullable=False, default=False)
+    data = deferred(Column(LargeBinary, nullable=False))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def load(self) -> dict:
+        """Decompress and parse the stored report."""
+        from app.services.report_archive import decode_report
+        return decode_report(self.codec, self.data)
 
+class AuditDefinition(Base):
+    """
+    Title and description of a Lighthouse audit, stored once and shared by every audit row.
+    A new row is only created when Lighthouse changes the text (new content_hash).
+    """
+    __tablename__ = "audit_definitions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    audit_key = Column(String, nullable=False)  # Lighthouse audit id, e.g. 'unused-javascript'
+    content_hash = Column(String(64), nullable=False)  # sha256 of title + description
     title = Column(String, nullable=True)
     description = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("audit_key", "content_hash", name="uq_audit_definitions_key_hash"),
+    )
+
+class PageSpeedAudit(Base):
+    __tablename__ = "pagespeed_audits"
+
+    id = Column(Integer, primary_key=True, index=True)
+    analysis_id = Column(Integer, ForeignKey("pagespeed_analyses.id", ondelete="CASCADE"), nullable=False, index=True)
+    definition_id = Column(Integer, ForeignKey("audit_definitions.id"), nullable=False, index=True)
+
     display_value = Column(String, nullable=True)
+    numeric_value = Column(Float, nullable=True)
     audit_score = Column(Float, nullable=True)
 
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relation til PageSpeedAnalysis
-    analysis = relationship("PageSpeedAnalysis", back_populates="audits")
\ No newline at end of file
+    analysis = relationship("PageSpeedAnalysis", back_populates="audits")
+
+    # Definitions are always needed when audits are shown, so load them in the same query
+    definition = relationship("AuditDefinition", lazy="joined", innerjoin=True)
+    title = association_proxy("definition", "title")
+    description = association_proxy("definition", "description")
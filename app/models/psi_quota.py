@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, Float
+from app.database import Base
+
+
+class PsiQuotaBucket(Base):
+    """
+    Shared token bucket state, so all analysis workers draw from the same PSI quota.
+    """
+    __tablename__ = "psi_quota_buckets"
+
+    name = Column(String, primary_key=True)  # e.g. 'minute' or 'day'
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)  # unix timestamp of last refill
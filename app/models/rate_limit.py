@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, Integer, Float
+from app.database import Base
+
+
+class RateLimitCounter(Base):
+    """
+    Attempts per key and fixed window, for the shared ('database') rate limit backend.
+    Two adjacent windows give the sliding-window estimate; rows are deleted after expires_at.
+    """
+    __tablename__ = "rate_limit_counters"
+
+    key = Column(String, primary_key=True)  # e.g. 'login:ip:203.0.113.7'
+    window = Column(Integer, primary_key=True)  # unix time // period
+    count = Column(Integer, nullable=False)
+    expires_at = Column(Float, nullable=False, index=True)  # unix timestamp
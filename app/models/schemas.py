@@ -1,5 +1,6 @@
-from pydantic import BaseModel, EmailStr
-from datetime import datetime
+from pydantic import BaseModel, EmailStr, Field
+from datetime import date, datetime
+from app.services.analysis_queue import BATCH_MAX_URLS
 
 # --------- Bruger-skemaer ---------
 class UserCreate(BaseModel):
@@ -17,6 +18,10 @@ class UserOut(BaseModel):
 class AnalyseInput(BaseModel):
     url: str
 
+class AnalyseBatchInput(BaseModel):
+    urls: list[str] = Field(default=[], max_length=BATCH_MAX_URLS)  # longer lists are rejected with 422
+    sitemap_url: str | None = None
+
 class PageSpeedAnalysisCreate(BaseModel):
     url: str
     strategy: str
@@ -26,8 +31,61 @@ class PageSpeedAnalysisOut(BaseModel):
     id: int
     url: str
     strategy: str
-    performance_score: float
+    performance_score: float | None = None
     created_at: datetime
 
     class Config:
         from_attributes = True  # Vigtigt for Pydantic v2 + SQLAlchemy
+
+class AnalysisHistoryOut(BaseModel):
+    items: list[PageSpeedAnalysisOut]
+    next_cursor: str | None = None  # pass as ?cursor= for the next page; null on the last page
+
+class AnalysisJobOut(BaseModel):
+    id: int
+    url: str
+    status: str
+    attempts: int
+    last_error: str | None = None
+    created_at: datetime | None = None
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    class Config:
+        from_attributes = True
+
+class BatchPageOut(BaseModel):
+    url: str
+    strategy: str
+    performance_score: float | None = None
+    lcp: float | None = None
+    cls: float | None = None
+    tbt: float | None = None
+
+    class Config:
+        from_attributes = True
+
+class AnalysisBatchOut(BaseModel):
+    id: int
+    status: str  # 'running' until no job is queued or running, then 'done'
+    total: int
+    queued: int
+    running: int
+    done: int
+    failed: int
+    sitemap_url: str | None = None
+    created_at: datetime | None = None
+    worst_pages: list[BatchPageOut] = []
+
+class AnalysisRollupOut(BaseModel):
+    strategy: str
+    bucket_start: date
+    metric: str
+    count: int
+    min_value: float
+    max_value: float
+    avg_value: float
+    p75_value: float
+
+    class Config:
+        from_attributes = True
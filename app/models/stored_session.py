@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, Text, Float
+from app.database import Base
+
+
+class StoredSession(Base):
+    """
+    Server-side session data for the 'database' session backend. The cookie only carries
+    an opaque id; the row is keyed by its SHA-256, so the table alone cannot be used to log in.
+    """
+    __tablename__ = "sessions"
+
+    id = Column(String(64), primary_key=True)  # sha256 hex of the cookie value
+    data = Column(Text, nullable=False)  # JSON
+    expires_at = Column(Float, nullable=False, index=True)  # unix timestamp
@@ -12,6 +12,7 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)  # ✅ Matches services/user.py
     is_verified = Column(Boolean, default=False, nullable=False)
+    plan = Column(String, default="free", server_default="free", nullable=False)  # decides audit retention
     analyses = relationship("PageSpeedAnalysis", back_populates="user")
 
     def set_password(self, plain_password: str):
@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Request, Depends, status, HTTPException, BackgroundTasks, Form
+from datetime import date
+from typing import Literal
+from fastapi import APIRouter, Request, Depends, status, HTTPException, BackgroundTasks, Form, Query
 from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.services.pagespeed import run_pagespeed_analysis
-from app.utils.session import require_login
-from app.utils.csrf import generate_csrf_token, validate_csrf_token  # ✅ CSRF helpers
-from app.dependencies.common import templates_admin, get_db
-from app.models.pagespeed_analysis import PageSpeedAnalysis
-from app.models.user import User
+from app.services.analysis_queue import enqueue_analysis
+from app.services.rollups import get_rollups
+from app.services.dashboard import get_dashboard_data
+from app.services.history import get_history_page, InvalidCursor, HISTORY_PAGE_SIZE, HISTORY_MAX_PAGE_SIZE
+from app.services.monitoring import add_monitored_url, list_monitored_urls, remove_monitored_url
+from app.utils.session import require_login, invalidate_user, CurrentUser
+from app.utils.csrf import validate_csrf_token  # ✅ CSRF helpers
+from app.dependencies.common import get_db, get_async_db
+from app.dependencies.templates import templates_admin
+from app.models.monitored_url import MONITOR_INTERVALS
+from app.models.schemas import AnalysisRollupOut, AnalysisHistoryOut
 
 router = APIRouter(
     prefix="/admin",
@@ -21,66 +29,124 @@ router = APIRouter(
 @router.get("/dashboard", response_class=HTMLResponse)
 async def show_dashboard(
     request: Request,
-    db: Session = Depends(get_db),
-    user: User = Depends(require_login)
+    db: AsyncSession = Depends(get_async_db),
+    user: CurrentUser = Depends(require_login)
 ):
-    request.session["csrf_token"] = generate_csrf_token(request)  # ✅ Generate CSRF token
-
-    recent_analyses = db.query(PageSpeedAnalysis)\
-        .filter(PageSpeedAnalysis.user_id == user.id)\
-        .order_by(PageSpeedAnalysis.created_at.desc())\
-        .limit(10)\
-        .all()
-
-    desktop = db.query(PageSpeedAnalysis)\
-        .filter(PageSpeedAnalysis.strategy == "desktop", PageSpeedAnalysis.user_id == user.id)\
-        .order_by(PageSpeedAnalysis.created_at.desc())\
-        .first()
-
-    mobile = db.query(PageSpeedAnalysis)\
-        .filter(PageSpeedAnalysis.strategy == "mobile", PageSpeedAnalysis.user_id == user.id)\
-        .order_by(PageSpeedAnalysis.created_at.desc())\
-        .first()
-
-    audits = mobile.audits if mobile else []
+    data = await get_dashboard_data(db, user.id)
 
     return templates_admin.TemplateResponse("dashboard.html", {
         "request": request,
-        "analyses": recent_analyses,
-        "desktop_score": desktop.performance_score if desktop else None,
-        "mobile_score": mobile.performance_score if mobile else None,
-        "analysis": mobile or desktop,
-        "audits": audits,
+        "analyses": data.recent,
+        "desktop_score": data.desktop.performance_score if data.desktop else None,
+        "mobile_score": data.mobile.performance_score if data.mobile else None,
+        "analysis": data.mobile or data.desktop,
+        "audits": data.audits,
     })
 
 # -----------------------------------------------------------
 # ✅ Analysis history page
 # -----------------------------------------------------------
+async def _history_page(db: AsyncSession, user: CurrentUser, cursor, limit, url, strategy):
+    try:
+        return await get_history_page(db, user.id, cursor=cursor, limit=limit, url=url or None, strategy=strategy or None)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Ugyldig cursor")
+
 @router.get("/analyses", response_class=HTMLResponse, name="admin_analyses")
 async def show_history(
     request: Request,
-    db: Session = Depends(get_db),
-    user: User = Depends(require_login)
+    cursor: str | None = None,
+    url: str | None = None,
+    strategy: Literal["", "desktop", "mobile"] = "",
+    db: AsyncSession = Depends(get_async_db),
+    user: CurrentUser = Depends(require_login)
 ):
-    request.session["csrf_token"] = generate_csrf_token(request)  # ✅ Generate CSRF token
-
-    user_analyses = db.query(PageSpeedAnalysis)\
-        .filter(PageSpeedAnalysis.user_id == user.id)\
-        .order_by(PageSpeedAnalysis.created_at.desc())\
-        .all()
+    page = await _history_page(db, user, cursor, HISTORY_PAGE_SIZE, url, strategy)
 
     return templates_admin.TemplateResponse("analyses.html", {
         "request": request,
-        "analyses": user_analyses
+        "analyses": page.items,
+        "next_cursor": page.next_cursor,
+        "is_first_page": not cursor,
+        "filter_url": url or "",
+        "filter_strategy": strategy,
+        "filters": {key: value for key, value in (("url", url), ("strategy", strategy)) if value},
+    })
+
+@router.get("/analyses/history", response_model=AnalysisHistoryOut, name="admin_analysis_history")
+async def analysis_history(
+    cursor: str | None = None,
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    url: str | None = None,
+    strategy: Literal["desktop", "mobile"] | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    user: CurrentUser = Depends(require_login)
+):
+    page = await _history_page(db, user, cursor, limit, url, strategy)
+    return AnalysisHistoryOut(items=page.items, next_cursor=page.next_cursor)
+
+# -----------------------------------------------------------
+# ✅ Metric trend for one URL (pre-aggregated, for charts)
+# -----------------------------------------------------------
+@router.get("/analyses/trend", response_model=list[AnalysisRollupOut], name="admin_analysis_trend")
+def analysis_trend(
+    url: str,
+    strategy: str | None = None,
+    granularity: Literal["day", "week"] = "day",
+    since: date | None = None,
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(require_login)
+):
+    return get_rollups(db, user.id, url, strategy=strategy, granularity=granularity, since=since)
+
+# -----------------------------------------------------------
+# ✅ Monitoring (scheduled re-analysis)
+# -----------------------------------------------------------
+@router.get("/monitoring", response_class=HTMLResponse, name="admin_monitoring")
+async def monitoring_page(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    user: CurrentUser = Depends(require_login)
+):
+    return templates_admin.TemplateResponse("monitoring.html", {
+        "request": request,
+        "monitors": await db.run_sync(list_monitored_urls, user.id),
+        "intervals": list(MONITOR_INTERVALS),
     })
 
+@router.post("/monitoring", name="admin.add_monitor")
+async def add_monitor(
+    request: Request,
+    url: str = Form(...),
+    interval: str = Form("daily"),
+    csrf_token: str = Form(...),
+    db: AsyncSession = Depends(get_async_db),
+    user: CurrentUser = Depends(require_login)
+):
+    validate_csrf_token(request, csrf_token)
+    if interval not in MONITOR_INTERVALS:
+        raise HTTPException(status_code=400, detail="Ugyldigt interval")
+    await db.run_sync(add_monitored_url, user.id, url, interval)
+    return RedirectResponse(url="/admin/monitoring", status_code=status.HTTP_303_SEE_OTHER)
+
+@router.post("/monitoring/{monitor_id}/remove", name="admin.remove_monitor")
+async def remove_monitor(
+    request: Request,
+    monitor_id: int,
+    csrf_token: str = Form(...),
+    db: AsyncSession = Depends(get_async_db),
+    user: CurrentUser = Depends(require_login)
+):
+    validate_csrf_token(request, csrf_token)
+    if not await db.run_sync(remove_monitored_url, user.id, monitor_id):
+        raise HTTPException(status_code=404, detail="Monitor not found")
+    return RedirectResponse(url="/admin/monitoring", status_code=status.HTTP_303_SEE_OTHER)
+
 # -----------------------------------------------------------
 # ✅ Empty audits page (static)
 # -----------------------------------------------------------
 @router.get("/audits", name="admin_audits", response_class=HTMLResponse)
 async def audits_page(request: Request):
-    request.session["csrf_token"] = generate_csrf_token(request)  # ✅ Generate CSRF token
-
     return templates_admin.TemplateResponse("audits.html", {
         "request": request
     })
@@ -93,11 +159,11 @@ async def reanalyse(
     request: Request,
     url: str = Form(...),
     csrf_token: str = Form(...),
-    db: Session = Depends(get_db),
-    user: User = Depends(require_login)
+    db: AsyncSession = Depends(get_async_db),
+    user: CurrentUser = Depends(require_login)
 ):
     validate_csrf_token(request, csrf_token)
-    run_pagespeed_analysis(url, db, user_id=user.id)
+    await db.run_sync(enqueue_analysis, url, user_id=user.id)
     return RedirectResponse(url="/admin/dashboard?message=reanalyse_startet", status_code=303)
 
 # -----------------------------------------------------------
@@ -108,11 +174,11 @@ async def run_analysis(
     request: Request,
     url: str = Form(...),
     csrf_token: str = Form(...),
-    db: Session = Depends(get_db),
-    user: User = Depends(require_login)
+    db: AsyncSession = Depends(get_async_db),
+    user: CurrentUser = Depends(require_login)
 ):
     validate_csrf_token(request, csrf_token)
-    run_pagespeed_analysis(url, db, user_id=user.id)
+    await db.run_sync(enqueue_analysis, url, user_id=user.id)
     return RedirectResponse(url="/admin/dashboard?message=analyse_startet", status_code=status.HTTP_303_SEE_OTHER)
 
 # -----------------------------------------------------------
@@ -124,5 +190,6 @@ async def logout(
     csrf_token: str = Form(...)
 ):
     validate_csrf_token(request, csrf_token)
+    invalidate_user(request.session.get("user_id"))
     request.session.clear()
     return RedirectResponse(url="/login", status_code=303)
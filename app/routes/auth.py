@@ -1,16 +1,18 @@
 from fastapi import APIRouter, Request, Form, Depends, status, HTTPException
 from fastapi.responses import RedirectResponse, HTMLResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.responses import Response
 
-from app.dependencies.common import get_db
-from app.dependencies.common import templates_public as templates
+from app.dependencies.common import get_async_db
+from app.dependencies.templates import templates_public as templates
 from app.models.user import User
-from app.utils.security import verify_password
+from app.services.passwords import hash_password_async, verify_password_async
 from app.utils.csrf import validate_csrf_token, generate_csrf_token
 from app.utils.token import verify_reset_token
+from app.utils.rate_limit import rate_limit
+from app.utils.session import invalidate_user
 from app.services.user_service import get_user_by_email
-from app.services.email_service import send_confirmation_email, send_welcome_email
+from app.services.email_service import queue_confirmation_email, queue_welcome_email, queue_password_reset_email
 
 router = APIRouter()
 
@@ -19,9 +21,6 @@ router = APIRouter()
 # -----------------------------------------------------------
 @router.get("/login", response_class=HTMLResponse, name="show_login")
 def login_get(request: Request):
-    # ✅ Save CSRF token in session so the template can access it
-    request.session["csrf_token"] = generate_csrf_token(request)
-
     # Extract optional message from query params
     message = request.query_params.get("message")
 
@@ -34,9 +33,6 @@ def login_get(request: Request):
 # -----------------------------------------------------------
 @router.get("/forgot-password", response_class=HTMLResponse, name="forgot_password_get")
 def forgot_password_get(request: Request):
-    # Save CSRF token to session
-    request.session["csrf_token"] = generate_csrf_token(request)
-
     return templates.TemplateResponse("forgot_password.html", {
         "request": request
     })
@@ -65,7 +61,7 @@ async def reset_password_post(
     confirm_password: str = Form(...),
     token: str = Form(...),  # <-- hent token direkte fra form
     csrf_token: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     
     
@@ -89,12 +85,13 @@ async def reset_password_post(
         })
 
     # ✅ Update password
-    user = get_user_by_email(db, email)
+    user = await db.run_sync(get_user_by_email, email)
     if not user:
         return RedirectResponse(url="/login?message=user_not_found", status_code=302)
 
-    user.set_password(password)
-    db.commit()
+    user.hashed_password = await hash_password_async(password)  # off the event loop
+    await db.commit()
+    invalidate_user(user.id)
 
     # ✅ Redirect with success
     return RedirectResponse(
@@ -106,26 +103,32 @@ async def reset_password_post(
 # -----------------------------------------------------------
 # ✅ Login handler (POST)
 # -----------------------------------------------------------
-@router.post("/login", name="signup_post")
-def login_post(
+@router.post("/login", name="signup_post", dependencies=[Depends(rate_limit("login"))])
+async def login_post(
     request: Request,
     response: Response,
     email: str = Form(...),
     password: str = Form(...),
     csrf_token: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     validate_csrf_token(request, csrf_token)
 
     # Look up user by email
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.run_sync(get_user_by_email, email)
 
-    # Invalid email or password
-    if not user or not verify_password(password, user.hashed_password):
+    # Invalid email or password (bcrypt runs in the password pool, not on the event loop)
+    valid, new_hash = await verify_password_async(password, user.hashed_password) if user else (False, None)
+    if not valid:
         return templates.TemplateResponse("login.html", {
             "request": request,
             "error": "Incorrect email or password"
         })
+
+    # Stored hash uses an old cost factor – replace it while we have the plain password
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
     
     # Reject login if email is not confirmed
     if not user.is_verified:
@@ -143,8 +146,6 @@ def login_post(
 # -----------------------------------------------------------
 @router.get("/signup", response_class=HTMLResponse, name="signup_get")
 def signup_get(request: Request):
-    # ✅ Save CSRF token in session for template use
-    request.session["csrf_token"] = generate_csrf_token(request)
     return templates.TemplateResponse("signup.html", {
         "request": request
     })
@@ -152,18 +153,18 @@ def signup_get(request: Request):
 # -----------------------------------------------------------
 # ✅ Signup handler (POST)
 # -----------------------------------------------------------
-@router.post("/signup", name="signup_post")
+@router.post("/signup", name="signup_post", dependencies=[Depends(rate_limit("signup"))])
 async def signup_post(
     request: Request,
     response: Response,
     email: str = Form(...),
     password: str = Form(...),
     csrf_token: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     validate_csrf_token(request, csrf_token)
 
-    existing_user = db.query(User).filter(User.email == email).first()
+    existing_user = await db.run_sync(get_user_by_email, email)
     if existing_user:
         return templates.TemplateResponse("signup.html", {
             "request": request,
@@ -171,20 +172,17 @@ async def signup_post(
         }
     )
 
-    new_user = User(email=email)
-    new_user.set_password(password)
+    new_user = User(email=email, hashed_password=await hash_password_async(password))
     db.add(new_user)
-    db.commit()
-
-        
-    # Send welcome email
-    await send_confirmation_email(email=email)
+    # Confirmation email goes to the outbox in the same transaction as the user
+    await queue_confirmation_email(db, email=email)
+    await db.commit()
 
     return RedirectResponse(url="/login?message=signup_success", status_code=status.HTTP_303_SEE_OTHER)
 
 
 @router.get("/confirm-email")
-async def confirm_email(token: str, db: Session = Depends(get_db)):
+async def confirm_email(token: str, db: AsyncSession = Depends(get_async_db)):
     # Decode the token to get the email
     try:
         email = email = verify_reset_token(token)
@@ -193,15 +191,16 @@ async def confirm_email(token: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Invalid or expired token")
 
     # Look up user in database
-    user: User = get_user_by_email(db, email)
+    user: User = await db.run_sync(get_user_by_email, email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     # If not yet verified, mark as verified and send welcome email
     if not user.is_verified:
         user.is_verified = True
-        db.commit()
-        await send_welcome_email(user.email)
+        await queue_welcome_email(db, user.email)
+        await db.commit()
+        invalidate_user(user.id)
 
     # Redirect to login with success message
     return RedirectResponse(url="/login?message=email_confirmed", status_code=status.HTTP_303_SEE_OTHER)
@@ -210,20 +209,20 @@ async def confirm_email(token: str, db: Session = Depends(get_db)):
 # -----------------------------------------------------------
 # ✅ Forgot Password handler (POST)
 # -----------------------------------------------------------
-@router.post("/forgot-password")
+@router.post("/forgot-password", dependencies=[Depends(rate_limit("forgot-password"))])
 async def forgot_password_post(
     request: Request,
     email: str = Form(...),
     csrf_token: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     validate_csrf_token(request, csrf_token)
 
-    user = get_user_by_email(db, email)
+    user = await db.run_sync(get_user_by_email, email)
     if user:
-        # User found – send email with reset link
-        from app.services.email_service import send_password_reset_email
-        await send_password_reset_email(user.email)
+        # User found – queue email with reset link
+        await queue_password_reset_email(db, user.email)
+        await db.commit()
 
     return RedirectResponse(url="/login?message=resetlink_sent", status_code=302)
 
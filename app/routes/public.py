@@ -2,27 +2,28 @@
 
 from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
-
-templates = Jinja2Templates(directory="app/templates/public")
+from app.dependencies.templates import templates_public as templates
+from app.utils.page_cache import cached_page
 
 router = APIRouter()
 
+# Marketing pages – output depends only on the deploy, so they go through the page cache
+# (async: a cache hit is cheaper than the threadpool hop)
 @router.get("/", response_class=HTMLResponse, name="index")
 async def index(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+    return cached_page(request, templates, "index.html")
 
 @router.get("/about", response_class=HTMLResponse, name="about")
-def about_page(request: Request):
-    return templates.TemplateResponse("about.html", {"request": request})
+async def about_page(request: Request):
+    return cached_page(request, templates, "about.html")
 
 @router.get("/privacy-policy", response_class=HTMLResponse, name="privacy_policy")
-def privacy_policy(request: Request):
-    return templates.TemplateResponse("privacy_policy.html", {"request": request})
+async def privacy_policy(request: Request):
+    return cached_page(request, templates, "privacy_policy.html")
 
 @router.get("/terms-and-conditions", response_class=HTMLResponse, name="terms_and_conditions")
-def terms_and_conditions(request: Request):
-    return templates.TemplateResponse("terms_and_conditions.html", {"request": request})
+async def terms_and_conditions(request: Request):
+    return cached_page(request, templates, "terms_and_conditions.html")
 
 
 
@@ -0,0 +1,195 @@
+import os
+import logging
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, update, insert, func, or_
+from sqlalchemy.orm import Session
+from app.models.analysis_job import AnalysisJob, AnalysisBatch, JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_FAILED
+from app.models.pagespeed_analysis import PageSpeedAnalysis
+
+# Seconds a job may stay "running" before it is considered lost (worker crash / restart)
+JOB_TIMEOUT = int(os.getenv("ANALYSIS_JOB_TIMEOUT", "600"))
+JOB_MAX_ATTEMPTS = int(os.getenv("ANALYSIS_JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_DELAY = int(os.getenv("ANALYSIS_JOB_RETRY_DELAY", "30"))
+BATCH_MAX_URLS = int(os.getenv("ANALYSIS_BATCH_MAX_URLS", "1000"))
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue_analysis(db: Session, url: str, user_id: int = None) -> AnalysisJob:
+    """
+    Add an analysis job to the queue and return it.
+    """
+    job = AnalysisJob(url=url, user_id=user_id, max_attempts=JOB_MAX_ATTEMPTS, run_after=_now())
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def get_job(db: Session, job_id: int, user_id: int) -> AnalysisJob | None:
+    """The job, if it belongs to user_id."""
+    job = db.get(AnalysisJob, job_id)
+    return job if job is not None and job.user_id == user_id else None
+
+
+def enqueue_batch(db: Session, urls: list[str], user_id: int = None, sitemap_url: str = None) -> AnalysisBatch:
+    """
+    Queue one job per URL (duplicates dropped, at most BATCH_MAX_URLS) under a new batch
+    and return the batch. All jobs are written with a single multi-row INSERT.
+    """
+    unique_urls = list(dict.fromkeys(url.strip() for url in urls if url and url.strip()))[:BATCH_MAX_URLS]
+
+    batch = AnalysisBatch(user_id=user_id, sitemap_url=sitemap_url, total=len(unique_urls))
+    db.add(batch)
+    db.flush()
+
+    if unique_urls:
+        now = _now()
+        db.execute(insert(AnalysisJob.__table__).values([
+            {
+                "url": url,
+                "user_id": user_id,
+                "batch_id": batch.id,
+                "status": JOB_QUEUED,
+                "attempts": 0,
+                "max_attempts": JOB_MAX_ATTEMPTS,
+                "run_after": now,
+            }
+            for url in unique_urls
+        ]))
+    db.commit()
+    db.refresh(batch)
+    return batch
+
+
+def get_batch(db: Session, batch_id: int, user_id: int) -> AnalysisBatch | None:
+    """The batch, if it belongs to user_id."""
+    batch = db.get(AnalysisBatch, batch_id)
+    return batch if batch is not None and batch.user_id == user_id else None
+
+
+def batch_progress(db: Session, batch_id: int) -> dict:
+    """Number of the batch's jobs in each state (one grouped query)."""
+    counts = {JOB_QUEUED: 0, JOB_RUNNING: 0, JOB_DONE: 0, JOB_FAILED: 0}
+    rows = db.execute(
+        select(AnalysisJob.status, func.count())
+        .where(AnalysisJob.batch_id == batch_id)
+        .group_by(AnalysisJob.status)
+    )
+    counts.update({status: count for status, count in rows})
+    return counts
+
+
+def batch_worst_pages(db: Session, batch_id: int, limit: int = 10) -> list[PageSpeedAnalysis]:
+    """The batch's analyses with the lowest performance score."""
+    return db.execute(
+        select(PageSpeedAnalysis)
+        .join(AnalysisJob, PageSpeedAnalysis.job_id == AnalysisJob.id)
+        .where(AnalysisJob.batch_id == batch_id, PageSpeedAnalysis.performance_score.is_not(None))
+        .order_by(PageSpeedAnalysis.performance_score, PageSpeedAnalysis.id)
+        .limit(limit)
+    ).scalars().all()
+
+
+def claim_next_job(db: Session, worker_id: str) -> AnalysisJob | None:
+    """
+    Atomically move the oldest due job from queued to running.
+    PostgreSQL uses SELECT ... FOR UPDATE SKIP LOCKED so workers never block each other.
+    SQLite has no row locks, so we use a conditional UPDATE – only one writer can win it.
+    """
+    due = (
+        select(AnalysisJob.id)
+        .where(AnalysisJob.status == JOB_QUEUED, AnalysisJob.run_after <= _now())
+        # Single analyses go before batch and scheduled jobs, so background work does not hold them up
+        .order_by(or_(AnalysisJob.batch_id.is_not(None), AnalysisJob.monitor_id.is_not(None)), AnalysisJob.id)
+        .limit(1)
+    )
+
+    if db.get_bind().dialect.name == "postgresql":
+        job_id = db.execute(due.with_for_update(skip_locked=True)).scalar_one_or_none()
+    else:
+        job_id = db.execute(due).scalar_one_or_none()
+
+    if job_id is None:
+        db.rollback()
+        return None
+
+    result = db.execute(
+        update(AnalysisJob)
+        .where(AnalysisJob.id == job_id, AnalysisJob.status == JOB_QUEUED)
+        .values(
+            status=JOB_RUNNING,
+            attempts=AnalysisJob.attempts + 1,
+            locked_by=worker_id,
+            started_at=_now(),
+        )
+    )
+    db.commit()
+
+    if result.rowcount != 1:
+        # Another worker claimed it first
+        return None
+    return db.get(AnalysisJob, job_id)
+
+
+def complete_job(db: Session, job: AnalysisJob, analysis_ids: list[int] = None):
+    """
+    Mark the job done and link the analyses it created to it. A row that was reused
+    (store_shared_analysis returned an existing one) keeps the job that created it –
+    its shared PSI result is already recorded through source_analysis_id.
+    """
+    if analysis_ids:
+        db.execute(
+            update(PageSpeedAnalysis)
+            .where(PageSpeedAnalysis.id.in_(analysis_ids), PageSpeedAnalysis.job_id.is_(None))
+            .values(job_id=job.id)
+        )
+    job.status = JOB_DONE
+    job.finished_at = _now()
+    job.locked_by = None
+    job.last_error = None
+    db.commit()
+
+
+def fail_job(db: Session, job: AnalysisJob, error: str, retry_after: float | None = None):
+    """
+    Record a failed attempt. The job is re-queued with a delay (at least retry_after
+    seconds, when PSI asked for one) until max_attempts is reached.
+    """
+    job.last_error = error[:1000]
+    job.locked_by = None
+
+    if job.attempts < job.max_attempts:
+        job.status = JOB_QUEUED
+        job.run_after = _now() + timedelta(seconds=max(JOB_RETRY_DELAY * job.attempts, retry_after or 0))
+    else:
+        job.status = JOB_FAILED
+        job.finished_at = _now()
+    db.commit()
+
+
+def requeue_stale_jobs(db: Session) -> int:
+    """
+    Put jobs back in the queue whose worker disappeared mid-run.
+    Returns the number of recovered jobs.
+    """
+    cutoff = _now() - timedelta(seconds=JOB_TIMEOUT)
+    stale = (AnalysisJob.status == JOB_RUNNING, AnalysisJob.started_at < cutoff)
+
+    requeued = db.execute(
+        update(AnalysisJob)
+        .where(*stale, AnalysisJob.attempts < AnalysisJob.max_attempts)
+        .values(status=JOB_QUEUED, locked_by=None, run_after=_now(), last_error="Worker timed out")
+    ).rowcount
+    db.execute(
+        update(AnalysisJob)
+        .where(*stale)
+        .values(status=JOB_FAILED, locked_by=None, finished_at=_now(), last_error="Worker timed out")
+    )
+    db.commit()
+
+    if requeued:
+        logging.warning(f"♻️ Re-queued {requeued} stale analysis job(s)")
+    return requeued
@@ -0,0 +1,150 @@
+from sqlalchemy import insert, select, update, delete, or_
+from sqlalchemy.orm import Session
+from app.models.pagespeed_analysis import PageSpeedAnalysis, PageSpeedAudit
+from app.services.audit_definitions import resolve_definition_ids
+from app.services.report_archive import archive_report
+from app.services.rollups import refresh_rollups
+
+# Core tables – bulk statements bypass the ORM unit of work and identity map
+analyses_table = PageSpeedAnalysis.__table__
+audits_table = PageSpeedAudit.__table__
+
+
+def failing_audit_rows(data: dict) -> list[dict]:
+    """
+    Audit rows worth storing: every audit with a score below 1.
+    """
+    rows = []
+    for audit_key, audit in data["lighthouseResult"].get("audits", {}).items():
+        audit_score = audit.get("score")
+        if audit_score is not None and audit_score < 1:
+            rows.append({
+                "audit_key": audit.get("id") or audit_key,
+                "title": audit.get("title"),
+                "description": audit.get("description"),
+                "display_value": audit.get("displayValue"),
+                "numeric_value": audit.get("numericValue"),
+                "audit_score": audit_score,
+            })
+    return rows
+
+
+# Metric column -> Lighthouse audit whose numericValue it stores
+METRIC_AUDITS = {
+    "lcp": "largest-contentful-paint",
+    "cls": "cumulative-layout-shift",
+    "tbt": "total-blocking-time",
+    "fcp": "first-contentful-paint",
+    "speed_index": "speed-index",
+    "tti": "interactive",
+}
+
+
+def performance_score(data: dict) -> float:
+    return data["lighthouseResult"]["categories"]["performance"]["score"] * 100
+
+
+def analysis_metrics(data: dict) -> dict:
+    """
+    Values for the metric columns of pagespeed_analyses: the performance score
+    plus the Core Web Vitals from their audits (None when Lighthouse skipped one).
+    """
+    audits = data["lighthouseResult"].get("audits", {})
+    metrics = {"performance_score": performance_score(data)}
+    for column, audit_key in METRIC_AUDITS.items():
+        metrics[column] = audits.get(audit_key, {}).get("numericValue")
+    return metrics
+
+
+def _insert_audits(db: Session, analysis_id: int, data: dict):
+    audits = failing_audit_rows(data)
+    if audits:
+        definition_ids = resolve_definition_ids(db, audits)
+        db.execute(insert(audits_table).values([
+            {
+                "analysis_id": analysis_id,
+                "definition_id": definition_id,
+                "display_value": audit["display_value"],
+                "numeric_value": audit["numeric_value"],
+                "audit_score": audit["audit_score"],
+            }
+            for audit, definition_id in zip(audits, definition_ids)
+        ]))
+
+
+def store_analysis(
+    db: Session, url: str, strategy: str, data: dict, user_id: int = None, report_body: bytes = None
+) -> int:
+    """
+    Write one PSI result – the analysis row with its metrics and all its failing audits –
+    in a single transaction: one INSERT ... RETURNING for the analysis, one multi-row INSERT
+    for the audits (titles/descriptions go to audit_definitions), then the rollup buckets.
+    Returns the new analysis id.
+    report_body is the raw PSI response; when given it is archived in the same transaction.
+    """
+    report_id = archive_report(db, report_body) if report_body is not None else None
+
+    analysis_id, created_at = db.execute(
+        insert(analyses_table)
+        .values(url=url, strategy=strategy, user_id=user_id, report_id=report_id, **analysis_metrics(data))
+        .returning(analyses_table.c.id, analyses_table.c.created_at)
+    ).one()
+
+    _insert_audits(db, analysis_id, data)
+    refresh_rollups(db, user_id, url, strategy, created_at)
+
+    db.commit()
+    return analysis_id
+
+
+def rebuild_analysis(db: Session, analysis_id: int, data: dict):
+    """
+    Replace the derived data (metrics and audits) of a stored analysis with values
+    extracted from data. Analyses shared from it follow the new metrics, and the
+    affected rollup buckets are recomputed. Runs inside the caller's transaction.
+    """
+    db.execute(delete(audits_table).where(audits_table.c.analysis_id == analysis_id))
+    _insert_audits(db, analysis_id, data)
+    updated = db.execute(
+        update(analyses_table)
+        .where(or_(analyses_table.c.id == analysis_id, analyses_table.c.source_analysis_id == analysis_id))
+        .values(**analysis_metrics(data))
+        .returning(analyses_table.c.user_id, analyses_table.c.url, analyses_table.c.strategy, analyses_table.c.created_at)
+    ).all()
+    for row in updated:
+        refresh_rollups(db, row.user_id, row.url, row.strategy, row.created_at)
+
+
+def store_shared_analysis(db: Session, url: str, strategy: str, source_id: int, metrics: dict, user_id: int = None) -> int:
+    """
+    Store a per-user analysis that points at an already stored PSI result,
+    copying its metrics (see analysis_metrics).
+    A user who re-submits the same URL within the TTL gets their existing row back.
+    Returns the analysis id.
+    """
+    existing_id = db.execute(
+        select(analyses_table.c.id)
+        .where(
+            analyses_table.c.user_id == user_id,
+            or_(analyses_table.c.id == source_id, analyses_table.c.source_analysis_id == source_id),
+        )
+        .limit(1)
+    ).scalar_one_or_none()
+    if existing_id is not None:
+        db.rollback()
+        return existing_id
+
+    analysis_id, created_at = db.execute(
+        insert(analyses_table)
+        .values(
+            url=url,
+            strategy=strategy,
+            user_id=user_id,
+            source_analysis_id=source_id,
+            **metrics,
+        )
+        .returning(analyses_table.c.id, analyses_table.c.created_at)
+    ).one()
+    refresh_rollups(db, user_id, url, strategy, created_at)
+    db.commit()
+    return analysis_id
@@ -0,0 +1,86 @@
+import hashlib
+from sqlalchemy import select, tuple_, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.pagespeed_analysis import AuditDefinition
+from app.utils.cache import TTLCache
+
+definitions_table = AuditDefinition.__table__
+
+# (audit_key, content_hash) -> definition id. Only committed ids are cached.
+_interned = TTLCache(maxsize=10000, ttl=24 * 3600)
+# Session.info key: ids of definitions inserted in the session's open transaction
+_PENDING = "audit_definitions_pending"
+
+
+@event.listens_for(Session, "after_commit")
+def _cache_committed(session: Session):
+    for key, definition_id in session.info.pop(_PENDING, {}).items():
+        _interned.set(key, definition_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session: Session):
+    session.info.pop(_PENDING, None)
+
+
+def content_hash(title: str | None, description: str | None) -> str:
+    return hashlib.sha256(f"{title or ''}\x00{description or ''}".encode()).hexdigest()
+
+
+def _select_ids(db: Session, keys: list[tuple[str, str]]) -> dict[tuple[str, str], int]:
+    rows = db.execute(
+        select(definitions_table.c.id, definitions_table.c.audit_key, definitions_table.c.content_hash)
+        .where(tuple_(definitions_table.c.audit_key, definitions_table.c.content_hash).in_(keys))
+    )
+    return {(row.audit_key, row.content_hash): row.id for row in rows}
+
+
+def _insert_ignore(db: Session, rows: list[dict]):
+    dialect = db.get_bind().dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    db.execute(
+        insert(definitions_table)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["audit_key", "content_hash"])
+    )
+
+
+def resolve_definition_ids(db: Session, audits: list[dict]) -> list[int]:
+    """
+    Return the definition id for each audit dict (keys: audit_key, title, description),
+    creating missing definitions. Known ids come from the in-process cache, so a
+    typical analysis needs no definition queries at all.
+    Runs inside the caller's transaction; new ids are cached only after it commits.
+    """
+    keys = [(audit["audit_key"], content_hash(audit["title"], audit["description"])) for audit in audits]
+    pending = db.info.setdefault(_PENDING, {})
+    ids = {key: _interned.get(key) or pending.get(key) for key in set(keys)}
+
+    missing = [key for key, definition_id in ids.items() if definition_id is None]
+    if missing:
+        # Other transactions' rows are only visible once committed, and this transaction's
+        # own inserts are in `pending` – so everything found here is safe to cache
+        found = _select_ids(db, missing)
+        for key, definition_id in found.items():
+            _interned.set(key, definition_id)
+        ids.update(found)
+
+        new = [key for key in missing if key not in found]
+        if new:
+            texts = {key: audit for key, audit in zip(keys, audits)}
+            _insert_ignore(db, [
+                {
+                    "audit_key": key[0],
+                    "content_hash": key[1],
+                    "title": texts[key]["title"],
+                    "description": texts[key]["description"],
+                }
+                for key in new
+            ])
+            # Cached when the caller commits (see _cache_committed), dropped if it rolls back
+            inserted = _select_ids(db, new)
+            pending.update(inserted)
+            ids.update(inserted)
+
+    return [ids[key] for key in keys]
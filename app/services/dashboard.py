@@ -0,0 +1,90 @@
+from dataclasses import dataclass, field
+from sqlalchemy import select, literal, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, joinedload, load_only
+from app.models.pagespeed_analysis import PageSpeedAnalysis, PageSpeedAudit, AuditDefinition
+
+RECENT_LIMIT = 10
+STRATEGIES = ("desktop", "mobile")
+
+analyses_table = PageSpeedAnalysis.__table__
+
+
+@dataclass
+class DashboardData:
+    recent: list[PageSpeedAnalysis] = field(default_factory=list)
+    latest: dict[str, PageSpeedAnalysis] = field(default_factory=dict)  # strategy -> newest analysis
+    audits: list[PageSpeedAudit] = field(default_factory=list)
+
+    @property
+    def desktop(self) -> PageSpeedAnalysis | None:
+        return self.latest.get("desktop")
+
+    @property
+    def mobile(self) -> PageSpeedAnalysis | None:
+        return self.latest.get("mobile")
+
+
+def _newest(user_id: int, slot: str, limit: int, strategy: str = None):
+    query = (
+        select(analyses_table, literal(slot).label("slot"))
+        .where(analyses_table.c.user_id == user_id)
+        .order_by(analyses_table.c.created_at.desc(), analyses_table.c.id.desc())
+        .limit(limit)
+    )
+    if strategy:
+        query = query.where(analyses_table.c.strategy == strategy)
+    # Wrapped, since SQLite does not allow ORDER BY/LIMIT directly inside UNION members
+    inner = query.subquery()
+    return select(inner)
+
+
+def dashboard_analyses_query(user_id: int):
+    """Newest RECENT_LIMIT analyses plus the newest per strategy, tagged with a slot column."""
+    branches = union_all(
+        _newest(user_id, "recent", RECENT_LIMIT),
+        *(_newest(user_id, strategy, 1, strategy) for strategy in STRATEGIES),
+    ).subquery()
+    analysis = aliased(PageSpeedAnalysis, branches)
+    return select(analysis, branches.c.slot)
+
+
+def report_audits_query(analysis_id: int):
+    """Audits of one stored PSI result, limited to the columns the dashboard renders."""
+    return (
+        select(PageSpeedAudit)
+        .where(PageSpeedAudit.analysis_id == analysis_id)
+        .order_by(PageSpeedAudit.id)
+        .options(
+            load_only(PageSpeedAudit.display_value, PageSpeedAudit.audit_score),
+            joinedload(PageSpeedAudit.definition).load_only(AuditDefinition.title, AuditDefinition.description),
+        )
+    )
+
+
+async def get_dashboard_data(db: AsyncSession, user_id: int) -> DashboardData:
+    """
+    Everything the dashboard shows, in two queries regardless of history size:
+
+    1. one UNION ALL of "newest 10" and "newest per strategy" – each branch is a
+       LIMIT over the (user_id, created_at) / (user_id, strategy, created_at) order, so
+       the database stops after a handful of index entries. (A row_number() window
+       would have to rank the user's whole history first.)
+    2. the failing audits of the latest mobile result (or of its cache source),
+       loading only the columns the template renders.
+    """
+    data = DashboardData()
+    rows = (await db.execute(dashboard_analyses_query(user_id))).all()
+    for row_analysis, slot in rows:
+        if slot == "recent":
+            data.recent.append(row_analysis)
+        else:
+            data.latest[slot] = row_analysis
+    data.recent.sort(key=lambda a: (a.created_at, a.id), reverse=True)
+
+    mobile = data.mobile
+    if mobile is not None:
+        report_id = mobile.source_analysis_id or mobile.id
+        data.audits = (await db.execute(report_audits_query(report_id))).scalars().all()
+
+    return data
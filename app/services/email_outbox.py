@@ -0,0 +1,246 @@
+import os
+import uuid
+import random
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from app.models.email_outbox import EmailOutbox, EMAIL_PENDING, EMAIL_SENDING, EMAIL_SENT, EMAIL_DEAD
+from app.services.mail import send_email, send_email_batch, EmailSendError, RESEND_BATCH_LIMIT
+
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "6"))
+# Backoff after a failed attempt: EMAIL_RETRY_DELAY * 2^(attempt - 1) seconds, at most EMAIL_RETRY_MAX_DELAY
+EMAIL_RETRY_DELAY = int(os.getenv("EMAIL_RETRY_DELAY", "30"))
+EMAIL_RETRY_MAX_DELAY = int(os.getenv("EMAIL_RETRY_MAX_DELAY", "3600"))
+# Seconds a row may stay "sending" before it is considered lost (sender crash / restart)
+EMAIL_SEND_TIMEOUT = int(os.getenv("EMAIL_SEND_TIMEOUT", "300"))
+
+outbox_table = EmailOutbox.__table__
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@dataclass
+class OutboxMessage:
+    """A claimed outbox row, detached from the session so it can be sent without one."""
+    id: int
+    to_email: str
+    subject: str
+    html: str
+    attempts: int
+    max_attempts: int
+    batch_key: str  # Idempotency-Key for the Resend call, see claim_emails
+
+
+def queue_email(db, to_email: str, subject: str, html: str) -> EmailOutbox:
+    """
+    Add an e-mail to the outbox. Not committed – it is sent only if the caller's transaction
+    (e.g. the new user) commits. Works with both Session and AsyncSession.
+    """
+    message = EmailOutbox(
+        to_email=to_email, subject=subject, html=html, max_attempts=EMAIL_MAX_ATTEMPTS, run_after=_now(),
+    )
+    db.add(message)
+    return message
+
+
+def _claim_retry(db: Session, worker_id: str, now: datetime) -> int:
+    """Claim every row of the oldest due batch that was tried before (same batch_key)."""
+    batch_key = db.execute(
+        select(outbox_table.c.batch_key)
+        .where(
+            outbox_table.c.status == EMAIL_PENDING,
+            outbox_table.c.run_after <= now,
+            outbox_table.c.batch_key.is_not(None),
+        )
+        .order_by(outbox_table.c.id)
+        .limit(1)
+    ).scalar()
+    if batch_key is None:
+        return 0
+    # A concurrent sender claiming the same batch waits for this UPDATE and then matches nothing
+    return db.execute(
+        update(outbox_table)
+        .where(outbox_table.c.batch_key == batch_key, outbox_table.c.status == EMAIL_PENDING)
+        .values(status=EMAIL_SENDING, attempts=outbox_table.c.attempts + 1, locked_by=worker_id, locked_at=now)
+    ).rowcount
+
+
+def _claim_new(db: Session, worker_id: str, now: datetime, limit: int) -> int:
+    """Claim up to `limit` due rows that were never sent and give them a fresh batch_key."""
+    due = (
+        select(outbox_table.c.id)
+        .where(
+            outbox_table.c.status == EMAIL_PENDING,
+            outbox_table.c.run_after <= now,
+            outbox_table.c.batch_key.is_(None),
+        )
+        .order_by(outbox_table.c.id)
+        .limit(limit)
+    )
+    if db.get_bind().dialect.name == "postgresql":
+        ids = db.execute(due.with_for_update(skip_locked=True)).scalars().all()
+        if not ids:
+            return 0
+        target = outbox_table.c.id.in_(ids)
+    else:
+        target = outbox_table.c.id.in_(due.scalar_subquery())
+
+    return db.execute(
+        update(outbox_table)
+        .where(target, outbox_table.c.status == EMAIL_PENDING)
+        .values(
+            status=EMAIL_SENDING, attempts=outbox_table.c.attempts + 1, locked_by=worker_id, locked_at=now,
+            batch_key=f"outbox-{uuid.uuid4().hex}",
+        )
+    ).rowcount
+
+
+def claim_emails(db: Session, worker_id: str, limit: int = RESEND_BATCH_LIMIT) -> list[OutboxMessage]:
+    """
+    Atomically move due e-mails from pending to sending, oldest first. The claimed rows share
+    a batch_key – the Idempotency-Key they are sent under. A batch that failed with an unknown
+    outcome (timeout, 5xx, lost sender) is claimed again as a whole with its old key, so
+    Resend recognises the retry instead of delivering the e-mails twice; otherwise up to
+    `limit` new e-mails are claimed under a fresh key.
+    New e-mails are claimed with SELECT ... FOR UPDATE SKIP LOCKED on PostgreSQL, so senders
+    never block each other; SQLite runs a single UPDATE ... WHERE id IN (subquery) under its
+    one write lock.
+    """
+    now = _now()
+    claimed = _claim_retry(db, worker_id, now) or _claim_new(db, worker_id, now, limit)
+    if not claimed:
+        db.rollback()
+        return []
+    db.commit()
+
+    rows = db.execute(
+        select(
+            outbox_table.c.id, outbox_table.c.to_email, outbox_table.c.subject, outbox_table.c.html,
+            outbox_table.c.attempts, outbox_table.c.max_attempts, outbox_table.c.batch_key,
+        )
+        .where(outbox_table.c.status == EMAIL_SENDING, outbox_table.c.locked_by == worker_id, outbox_table.c.locked_at == now)
+        .order_by(outbox_table.c.id)
+    ).all()
+    return [OutboxMessage(*row) for row in rows]
+
+
+def mark_sent(db: Session, sent: dict[int, str | None]):
+    """Record delivered e-mails: outbox id -> Resend's e-mail id."""
+    if not sent:
+        return
+    now = _now()
+    db.execute(
+        update(EmailOutbox),
+        [{"id": outbox_id, "provider_id": provider_id, "status": EMAIL_SENT, "sent_at": now, "locked_by": None,
+          "last_error": None} for outbox_id, provider_id in sent.items()],
+    )
+    db.commit()
+
+
+def retry_delay(attempts: int, retry_after: float | None = None) -> float:
+    """Exponential backoff with ±20% jitter, so a burst of failures does not retry in lockstep."""
+    delay = min(EMAIL_RETRY_MAX_DELAY, EMAIL_RETRY_DELAY * 2 ** max(0, attempts - 1))
+    return max(delay * random.uniform(0.8, 1.2), retry_after or 0)
+
+
+def mark_failed(db: Session, failed: list[tuple[OutboxMessage, EmailSendError]]):
+    """
+    Record failed attempts. Retryable failures go back to pending with a backoff until
+    max_attempts, keeping the batch_key they were sent under; every row of a batch gets the
+    same run_after, so the batch is claimed again as a whole. Permanent failures (and the last
+    attempt) are dead-lettered.
+    """
+    if not failed:
+        return
+    now = _now()
+    delays = {}
+    rows = []
+    for message, error in failed:
+        dead = not error.retryable or message.attempts >= message.max_attempts
+        row = {"id": message.id, "last_error": str(error)[:1000], "locked_by": None, "batch_key": message.batch_key}
+        if dead:
+            row.update(status=EMAIL_DEAD, run_after=now)
+            logging.error(f"☠️ E-mail {message.id} to {message.to_email} dead-lettered after {message.attempts} attempt(s): {error}")
+        else:
+            delay = delays.setdefault(message.batch_key, retry_delay(message.attempts, error.retry_after))
+            row.update(status=EMAIL_PENDING, run_after=now + timedelta(seconds=delay))
+        rows.append(row)
+    db.execute(update(EmailOutbox), rows)
+    db.commit()
+
+
+def requeue_stale_emails(db: Session) -> int:
+    """
+    Put e-mails back in the queue whose sender disappeared mid-send; they keep their batch_key.
+    E-mails that already used all their attempts are dead-lettered instead.
+    Returns the number of recovered e-mails.
+    """
+    stale = (outbox_table.c.status == EMAIL_SENDING, outbox_table.c.locked_at < _now() - timedelta(seconds=EMAIL_SEND_TIMEOUT))
+    requeued = db.execute(
+        update(outbox_table)
+        .where(*stale, outbox_table.c.attempts < outbox_table.c.max_attempts)
+        .values(status=EMAIL_PENDING, locked_by=None, run_after=_now(), last_error="Sender timed out")
+    ).rowcount
+    dead = db.execute(
+        update(outbox_table)
+        .where(*stale)
+        .values(status=EMAIL_DEAD, locked_by=None, run_after=_now(), last_error="Sender timed out")
+    ).rowcount
+    db.commit()
+    if requeued:
+        logging.warning(f"♻️ Re-queued {requeued} stale e-mail(s)")
+    if dead:
+        logging.error(f"☠️ Dead-lettered {dead} stale e-mail(s) that used all their attempts")
+    return requeued
+
+
+def retry_dead_emails(db: Session) -> int:
+    """
+    Give every dead-lettered e-mail a fresh set of attempts (after fixing the cause).
+    They are sent under new keys – Resend would otherwise answer with the stored failure.
+    """
+    count = db.execute(
+        update(outbox_table)
+        .where(outbox_table.c.status == EMAIL_DEAD)
+        .values(status=EMAIL_PENDING, attempts=0, run_after=_now(), batch_key=None)
+    ).rowcount
+    db.commit()
+    return count
+
+
+async def deliver(messages: list[OutboxMessage]) -> tuple[dict[int, str | None], list[tuple[OutboxMessage, EmailSendError]]]:
+    """
+    Send claimed e-mails (all with the same batch_key): several in one batch call, a single one
+    on its own, with batch_key as Idempotency-Key. Resend rejects a whole batch if one message
+    is invalid – then the batch is split in halves, each under a key derived from the parent's,
+    and retried, so the bad ones are found in a few calls and only they fail. A half that then
+    fails with a retryable error keeps its derived key for the next attempt (see mark_failed).
+    Returns (sent: id -> provider id, failed: [(message, error)]).
+    """
+    batch_key = messages[0].batch_key
+    try:
+        if len(messages) == 1:
+            message = messages[0]
+            result = await send_email(message.to_email, message.subject, message.html, idempotency_key=batch_key)
+            return {message.id: result.get("id")}, []
+        provider_ids = await send_email_batch(
+            [(message.to_email, message.subject, message.html) for message in messages],
+            idempotency_key=batch_key,
+        )
+        return {message.id: provider_id for message, provider_id in zip(messages, provider_ids)}, []
+    except EmailSendError as exc:
+        if exc.retryable or len(messages) == 1:
+            return {}, [(message, exc) for message in messages]
+
+    middle = len(messages) // 2
+    halves = (messages[:middle], messages[middle:])
+    for n, half in enumerate(halves, start=1):
+        for message in half:
+            message.batch_key = f"{batch_key}.{n}"
+    sent, failed = await deliver(halves[0])
+    more_sent, more_failed = await deliver(halves[1])
+    return {**sent, **more_sent}, failed + more_failed
@@ -0,0 +1,59 @@
+# app/services/email_templates.py
+
+import os
+import logging
+import tempfile
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, select_autoescape
+
+EMAIL_TEMPLATE_DIR = "app/templates/emails"
+# Compiled template bytecode survives restarts here, so workers skip the Jinja compiler
+EMAIL_TEMPLATE_CACHE_DIR = os.getenv(
+    "EMAIL_TEMPLATE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "testlegion-email-templates")
+)
+
+
+def _make_environment() -> Environment:
+    os.makedirs(EMAIL_TEMPLATE_CACHE_DIR, exist_ok=True)
+    return Environment(
+        loader=FileSystemLoader(EMAIL_TEMPLATE_DIR),
+        autoescape=select_autoescape(["html"]),
+        bytecode_cache=FileSystemBytecodeCache(EMAIL_TEMPLATE_CACHE_DIR),
+        # Templates only change with a deploy – no stat() per render
+        auto_reload=False,
+        cache_size=-1,
+    )
+
+
+# Plain environment for render(), and an async overlay on the same loader for render_async().
+# Async-compiled code differs, so the overlay keeps its bytecode under its own file pattern.
+email_env = _make_environment()
+email_env_async = email_env.overlay(
+    enable_async=True,
+    bytecode_cache=FileSystemBytecodeCache(EMAIL_TEMPLATE_CACHE_DIR, pattern="__jinja2_async_%s.cache"),
+)
+
+
+def precompile_email_templates() -> int:
+    """
+    Compile every e-mail template (base_email.html included) into both environments' caches,
+    so the first e-mail after start-up costs the same as the rest. Returns the number of templates.
+    """
+    names = email_env.list_templates(extensions=["html"])
+    for name in names:
+        email_env.get_template(name)
+        email_env_async.get_template(name)
+    logging.info(f"📧 Precompiled {len(names)} e-mail templates")
+    return len(names)
+
+
+def render(template_name: str, context: dict) -> str:
+    """
+    Render an e-mail template straight to a string. The compiled template and its
+    base_email.html layout come from the in-memory cache – no request or response objects.
+    """
+    return email_env.get_template(template_name).render(context)
+
+
+async def render_async(template_name: str, context: dict) -> str:
+    """Async variant of render() for use inside the event loop (Jinja's native async rendering)."""
+    return await email_env_async.get_template(template_name).render_async(context)
@@ -0,0 +1,109 @@
+import os
+import json
+import base64
+from dataclasses import dataclass, field
+from datetime import datetime
+from sqlalchemy import select, literal, tuple_, String
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.pagespeed_analysis import PageSpeedAnalysis
+
+# Rows per history page, and the most a client may ask for
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "50"))
+HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "200"))
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass
+class HistoryPage:
+    items: list[PageSpeedAnalysis] = field(default_factory=list)
+    next_cursor: str | None = None  # None on the last page
+
+
+def encode_cursor(analysis: PageSpeedAnalysis) -> str:
+    """Opaque cursor pointing just past `analysis` in (created_at, id) DESC order."""
+    raw = json.dumps([analysis.created_at.isoformat(), analysis.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, analysis_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(analysis_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def _created_before(dialect: str, created_at: datetime):
+    """
+    Bound for the created_at comparison. SQLite stores the server default (CURRENT_TIMESTAMP)
+    as text without fractional seconds, while a bound datetime always gets ".000000" –
+    which would sort after the stored value and repeat the boundary row. Compare as text in
+    the stored format there.
+    """
+    if dialect != "sqlite":
+        return created_at
+    fmt = "%Y-%m-%d %H:%M:%S.%f" if created_at.microsecond else "%Y-%m-%d %H:%M:%S"
+    return literal(created_at.strftime(fmt), String)
+
+
+def history_page_query(
+    dialect: str,
+    user_id: int,
+    limit: int,
+    url: str | None = None,
+    strategy: str | None = None,
+    after: tuple[datetime, int] | None = None,
+):
+    """
+    The user's analyses, newest first, strictly after the row `after` = (created_at, id).
+    Row-value comparison, so PostgreSQL uses it as an index condition on the
+    (user_id[, url | strategy], created_at, id) indexes rather than a filter
+    (see scripts/explain_history_queries.py).
+    """
+    query = (
+        select(PageSpeedAnalysis)
+        .where(PageSpeedAnalysis.user_id == user_id)
+        .order_by(PageSpeedAnalysis.created_at.desc(), PageSpeedAnalysis.id.desc())
+        .limit(limit)
+    )
+    if url:
+        query = query.where(PageSpeedAnalysis.url == url)
+    if strategy:
+        query = query.where(PageSpeedAnalysis.strategy == strategy)
+    if after:
+        created_at, analysis_id = after
+        query = query.where(
+            tuple_(PageSpeedAnalysis.created_at, PageSpeedAnalysis.id) < tuple_(_created_before(dialect, created_at), analysis_id)
+        )
+    return query
+
+
+async def get_history_page(
+    db: AsyncSession,
+    user_id: int,
+    cursor: str | None = None,
+    limit: int = HISTORY_PAGE_SIZE,
+    url: str | None = None,
+    strategy: str | None = None,
+) -> HistoryPage:
+    """
+    One page of the user's analyses, newest first.
+
+    Keyset pagination on (created_at, id): the next page starts strictly after the last row
+    of this one, so each page is a range read on the history indexes – the same cost on
+    page 1 and page 1000, unlike OFFSET. One extra row is fetched to know whether another
+    page exists.
+    """
+    limit = max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
+
+    after = decode_cursor(cursor) if cursor else None
+    query = history_page_query(db.get_bind().dialect.name, user_id, limit + 1, url, strategy, after)
+    rows = (await db.execute(query)).scalars().all()
+    page = HistoryPage(items=list(rows[:limit]))
+    if len(rows) > limit:
+        page.next_cursor = encode_cursor(page.items[-1])
+    return page
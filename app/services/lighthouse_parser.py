@@ -0,0 +1,74 @@
+import ijson
+
+# Only these audit fields are kept – details, screenshots, tables etc. are skipped
+AUDIT_FIELDS = frozenset({"id", "title", "description", "score", "displayValue", "numericValue"})
+
+_SCALAR_EVENTS = frozenset({"string", "number", "boolean", "null"})
+_ROOT = "lighthouseResult"
+
+
+class LighthouseExtractor:
+    """
+    Incremental extractor for PSI responses.
+
+    Feed it the raw response bytes chunk by chunk; it keeps only category scores and
+    a handful of fields per audit. Everything else (screenshots, audit details,
+    i18n tables, ...) flows through the C parser without being collected, so
+    memory use stays flat no matter how large the report is.
+
+    result() returns a dict shaped like the original response, trimmed to the
+    extracted fields, e.g.
+        {"lighthouseResult": {"categories": {"performance": {"score": 0.87}},
+                              "audits": {"speed-index": {"id": ..., "score": ...}}}}
+
+    tee, if given, is called with every batch of parse events before they are
+    dropped, so another consumer can share the single parse (see ScreenshotStripper).
+    """
+
+    def __init__(self, tee=None):
+        self._events = ijson.sendable_list()
+        self._parser = ijson.parse_coro(self._events, use_float=True)
+        self._tee = tee
+        self.categories: dict[str, dict] = {}
+        self.audits: dict[str, dict] = {}
+        self.bytes_read = 0
+
+    def feed(self, chunk: bytes):
+        self.bytes_read += len(chunk)
+        self._parser.send(chunk)
+        self._consume()
+
+    def close(self) -> dict:
+        self._parser.close()
+        self._consume()
+        return self.result()
+
+    def result(self) -> dict:
+        return {"lighthouseResult": {"categories": self.categories, "audits": self.audits}}
+
+    def _consume(self):
+        if self._tee is not None:
+            self._tee(self._events)
+        for prefix, event, value in self._events:
+            # Only "lighthouseResult.<section>.<key>.<field>" can hold something we need
+            if event not in _SCALAR_EVENTS or prefix.count(".") != 3 or not prefix.startswith(_ROOT):
+                continue
+
+            _, section, key, field = prefix.split(".")
+            if section == "audits":
+                if field in AUDIT_FIELDS:
+                    self.audits.setdefault(key, {})[field] = value
+            elif section == "categories" and field == "score":
+                self.categories.setdefault(key, {})["score"] = value
+        del self._events[:]
+
+
+def extract_lighthouse(data: bytes, chunk_size: int = 64 * 1024) -> dict:
+    """
+    Extract the needed fields from a complete PSI response held in memory.
+    """
+    extractor = LighthouseExtractor()
+    view = memoryview(data)
+    for start in range(0, len(data), chunk_size):
+        extractor.feed(bytes(view[start:start + chunk_size]))
+    return extractor.close()
@@ -1,9 +1,7 @@
 import httpx
 import os
+import logging
 from dotenv import load_dotenv
-from fastapi.templating import Jinja2Templates
-from fastapi import Request
-from app.utils.token import generate_confirmation_token
 
 load_dotenv()
 
@@ -11,46 +9,93 @@ BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
 
 RESEND_API_KEY = os.getenv("RESEND_API_KEY")
 EMAIL_FROM = os.getenv("EMAIL_FROM")
-RESEND_BASE_URL = "https://api.resend.com/emails"
+# Overridable so the sender can be pointed at scripts/resend_standin.py
+RESEND_API_URL = os.getenv("RESEND_API_URL", "https://api.resend.com").rstrip("/")
+RESEND_BASE_URL = f"{RESEND_API_URL}/emails"
+RESEND_BATCH_URL = f"{RESEND_API_URL}/emails/batch"
+RESEND_BATCH_LIMIT = 100  # most e-mails Resend accepts per batch call
+RESEND_TIMEOUT = float(os.getenv("RESEND_TIMEOUT", "15"))
+RESEND_MAX_CONNECTIONS = int(os.getenv("RESEND_MAX_CONNECTIONS", "10"))
+# The only answers that say the e-mail itself is bad (validation, invalid address). Anything
+# else – 401/403 from a wrong or revoked API key, 429, 5xx – is retried, not dead-lettered.
+RESEND_PERMANENT_ERRORS = (400, 422)
 
-# Path to the email templates
-templates_email = Jinja2Templates(directory="app/templates/emails")
+_resend_client: httpx.AsyncClient | None = None
 
-async def send_email(to_email: str, subject: str, html_content: str):
+
+class EmailSendError(Exception):
     """
-    Sends an email using the Resend API.
+    Resend rejected or did not answer a send. `retryable` is False only when Resend rejected the
+    e-mail itself (RESEND_PERMANENT_ERRORS); `retry_after` is Resend's hint on 429.
     """
-    if not RESEND_API_KEY:
-        raise ValueError("Missing RESEND_API_KEY in .env")
 
-    headers = {
-        "Authorization": f"Bearer {RESEND_API_KEY}",
-        "Content-Type": "application/json",
-    }
+    def __init__(self, message: str, retryable: bool = True, retry_after: float | None = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def get_resend_client() -> httpx.AsyncClient:
+    """Return the process-wide Resend client – one pool of kept-alive TLS connections."""
+    global _resend_client
+    if _resend_client is None or _resend_client.is_closed:
+        if not RESEND_API_KEY:
+            raise ValueError("Missing RESEND_API_KEY in .env")
+        _resend_client = httpx.AsyncClient(
+            timeout=RESEND_TIMEOUT,
+            limits=httpx.Limits(max_connections=RESEND_MAX_CONNECTIONS, max_keepalive_connections=RESEND_MAX_CONNECTIONS),
+            headers={"Authorization": f"Bearer {RESEND_API_KEY}", "Content-Type": "application/json"},
+        )
+    return _resend_client
+
+
+async def close_resend_client():
+    """Close the shared Resend client (called when the sender stops)."""
+    global _resend_client
+    if _resend_client is not None:
+        await _resend_client.aclose()
+        _resend_client = None
+
 
-    data = {
+def _message(to_email: str, subject: str, html_content: str) -> dict:
+    return {
         "from": EMAIL_FROM or "onboarding@resend.dev",
         "to": [to_email],
         "subject": subject,
         "html": html_content,
     }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(RESEND_BASE_URL, headers=headers, json=data)
 
-    if response.status_code >= 400:
-        raise Exception(f"Email sending failed: {response.status_code} - {response.text}")
+async def _post(url: str, payload, idempotency_key: str | None = None):
+    headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
+    try:
+        response = await get_resend_client().post(url, json=payload, headers=headers)
+    except httpx.HTTPError as exc:
+        raise EmailSendError(f"Email sending failed: {exc!r}") from exc
 
+    if response.status_code >= 400:
+        if response.status_code in (401, 403):
+            logging.error(f"🔑 Resend refused the API key ({response.status_code}) – check RESEND_API_KEY")
+        retry_after = response.headers.get("Retry-After")
+        raise EmailSendError(
+            f"Email sending failed: {response.status_code} - {response.text[:500]}",
+            retryable=response.status_code not in RESEND_PERMANENT_ERRORS,
+            retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+        )
     return response.json()
 
-async def render_email(template_name: str, context: dict) -> str:
+
+async def send_email(to_email: str, subject: str, html_content: str, idempotency_key: str | None = None):
     """
-    Renders an email template with the given context.
+    Sends an email using the Resend API.
     """
-    # We create a fake Request object for Jinja2 rendering
-    request = Request(scope={"type": "http"})
-    return templates_email.TemplateResponse(template_name, {"request": request, **context}).body.decode()
-
-
+    return await _post(RESEND_BASE_URL, _message(to_email, subject, html_content), idempotency_key)
 
 
+async def send_email_batch(messages: list[tuple[str, str, str]], idempotency_key: str | None = None) -> list[str]:
+    """
+    Send up to RESEND_BATCH_LIMIT (to_email, subject, html) messages in one call to Resend's
+    batch endpoint and return their ids, in order. Resend accepts or rejects a batch as a whole.
+    """
+    result = await _post(RESEND_BATCH_URL, [_message(*message) for message in messages], idempotency_key)
+    return [item["id"] for item in result["data"]]
@@ -0,0 +1,160 @@
+import os
+import random
+import logging
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, update, insert, exists, bindparam, func, true
+from sqlalchemy.orm import Session
+from app.models.analysis_job import AnalysisJob, JOB_QUEUED, JOB_RUNNING
+from app.models.monitored_url import MonitoredUrl, MONITOR_INTERVALS
+from app.services.analysis_queue import JOB_MAX_ATTEMPTS
+
+# Monitors handled per scheduler transaction
+SCHEDULER_BATCH_SIZE = int(os.getenv("SCHEDULER_BATCH_SIZE", "500"))
+# Runs are spread by up to this fraction of their interval, so URLs added together do not fire together
+SCHEDULER_JITTER = float(os.getenv("SCHEDULER_JITTER", "0.1"))
+# Upper bound for the jitter, so hourly and weekly schedules are spread by comparable amounts
+SCHEDULER_MAX_JITTER = int(os.getenv("SCHEDULER_MAX_JITTER", "1800"))
+
+monitors_table = MonitoredUrl.__table__
+jobs_table = AnalysisJob.__table__
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _jitter(interval: str) -> timedelta:
+    spread = min(MONITOR_INTERVALS[interval] * SCHEDULER_JITTER, SCHEDULER_MAX_JITTER)
+    return timedelta(seconds=random.uniform(0, spread))
+
+
+def next_run_after(previous: datetime, interval: str, now: datetime) -> datetime:
+    """
+    Next run one interval after the previous slot (no drift), plus jitter.
+    After downtime the missed runs are skipped rather than replayed.
+    """
+    step = timedelta(seconds=MONITOR_INTERVALS[interval])
+    if previous.tzinfo is None:
+        # SQLite returns naive UTC timestamps
+        previous = previous.replace(tzinfo=timezone.utc)
+    scheduled = previous + step
+    if scheduled <= now:
+        scheduled = now + step
+    return scheduled + _jitter(interval)
+
+
+def add_monitored_url(db: Session, user_id: int, url: str, interval: str) -> MonitoredUrl:
+    """
+    Start monitoring url (or update the interval of an existing monitor).
+    The first run is due within the jitter window.
+    """
+    if interval not in MONITOR_INTERVALS:
+        raise ValueError(f"Unknown interval: {interval}")
+
+    monitor = db.execute(
+        select(MonitoredUrl).where(MonitoredUrl.user_id == user_id, MonitoredUrl.url == url)
+    ).scalar_one_or_none()
+    if monitor is None:
+        monitor = MonitoredUrl(user_id=user_id, url=url)
+        db.add(monitor)
+    monitor.interval = interval
+    monitor.is_active = True
+    monitor.next_run_at = _now() + _jitter(interval)
+    db.commit()
+    db.refresh(monitor)
+    return monitor
+
+
+def list_monitored_urls(db: Session, user_id: int) -> list[MonitoredUrl]:
+    return db.execute(
+        select(MonitoredUrl).where(MonitoredUrl.user_id == user_id).order_by(MonitoredUrl.url)
+    ).scalars().all()
+
+
+def remove_monitored_url(db: Session, user_id: int, monitor_id: int) -> bool:
+    monitor = db.get(MonitoredUrl, monitor_id)
+    if monitor is None or monitor.user_id != user_id:
+        return False
+    # Jobs keep their monitor_id, so the monitor is deactivated instead of deleted
+    monitor.is_active = False
+    db.commit()
+    return True
+
+
+def due_monitors_query(now: datetime, limit: int = SCHEDULER_BATCH_SIZE):
+    """
+    Up to `limit` active monitors due at `now`, oldest first, with whether their previous
+    job is still queued or running. Reads through the (is_active, next_run_at) index –
+    the cost depends on the number of due monitors, not the size of the table
+    (see scripts/explain_scheduler.py).
+    """
+    pending = exists().where(
+        jobs_table.c.monitor_id == monitors_table.c.id,
+        jobs_table.c.status.in_((JOB_QUEUED, JOB_RUNNING)),
+    )
+    return (
+        select(
+            monitors_table.c.id, monitors_table.c.user_id, monitors_table.c.url,
+            monitors_table.c.interval, monitors_table.c.next_run_at, pending.label("pending"),
+        )
+        .where(monitors_table.c.is_active == true(), monitors_table.c.next_run_at <= now)
+        .order_by(monitors_table.c.next_run_at)
+        .limit(limit)
+    )
+
+
+def schedule_due(db: Session, limit: int = SCHEDULER_BATCH_SIZE) -> tuple[int, int]:
+    """
+    Enqueue analysis jobs for up to `limit` due monitors and move them to their next slot.
+    On PostgreSQL the due rows are locked with SKIP LOCKED, so several scheduler instances
+    can run side by side.
+    Monitors whose previous job is still queued or running are rescheduled without a new job.
+    Returns (monitors handled, jobs enqueued).
+    """
+    now = _now()
+    due = due_monitors_query(now, limit)
+    if db.get_bind().dialect.name == "postgresql":
+        due = due.with_for_update(of=monitors_table, skip_locked=True)
+
+    rows = db.execute(due).all()
+    if not rows:
+        db.rollback()
+        return 0, 0
+
+    jobs = [
+        {
+            "url": row.url,
+            "user_id": row.user_id,
+            "monitor_id": row.id,
+            "status": JOB_QUEUED,
+            "attempts": 0,
+            "max_attempts": JOB_MAX_ATTEMPTS,
+            "run_after": now,
+        }
+        for row in rows if not row.pending
+    ]
+    if jobs:
+        db.execute(insert(jobs_table), jobs)
+
+    db.execute(
+        update(monitors_table)
+        .where(monitors_table.c.id == bindparam("monitor_id"))
+        .values(
+            next_run_at=bindparam("next_run_at"),
+            last_enqueued_at=func.coalesce(bindparam("last_enqueued_at"), monitors_table.c.last_enqueued_at),
+        ),
+        [
+            {
+                "monitor_id": row.id,
+                "next_run_at": next_run_after(row.next_run_at, row.interval, now),
+                "last_enqueued_at": None if row.pending else now,
+            }
+            for row in rows
+        ],
+    )
+    db.commit()
+
+    skipped = len(rows) - len(jobs)
+    if skipped:
+        logging.info(f"⏭️ {skipped} monitor(s) still had a pending job – skipped this run")
+    return len(rows), len(jobs)
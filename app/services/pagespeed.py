@@ -1,61 +1,271 @@
 import os
+import time
+import asyncio
 import logging
-import requests
+import httpx
+import ijson
+from typing import NamedTuple
+from urllib.parse import urlsplit, urlunsplit
 from dotenv import load_dotenv
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.database import SessionLocal
-from app.models.pagespeed_analysis import PageSpeedAnalysis, PageSpeedAudit
+from app.models.pagespeed_analysis import PageSpeedAnalysis
+from app.services.analysis_store import store_analysis, store_shared_analysis, analysis_metrics
+from app.services.lighthouse_parser import LighthouseExtractor
+from app.services.report_archive import ARCHIVE_REPORTS, ARCHIVE_STRIP_SCREENSHOTS, ScreenshotStripper
+from app.services.psi_limiter import (
+    PSI_MAX_RETRIES, PageSpeedError, CircuitOpenError, breaker, backoff_delay,
+    parse_retry_after, wait_for_quota, stats as psi_stats,
+)
+from app.utils.cache import TTLCache, SingleFlight
 
 load_dotenv()
 logging.basicConfig(level=logging.INFO)
 
-def run_pagespeed_analysis(url: str, db: Session = SessionLocal(), user_id: int = None):
-    logging.info(f"\n🔍 STARTER analyse for {url}")
-    strategies = ["desktop", "mobile"]
-
-    for strategy in strategies:
-        api_url = "https://www.googleapis.com/pagespeedonline/v5/runPagespeed"
-        params = {
-            "url": url,
-            "strategy": strategy,
-            "key": os.getenv("PAGESPEED_API_KEY")
-        }
-        headers = {"Accept": "application/json"}
-        response = requests.get(api_url, params=params, headers=headers)
-
-        if response.status_code != 200:
-            logging.error(f"❌ Fejl ved {strategy}-analyse for {url}")
-            continue
-
-        data = response.json()
-        score = data["lighthouseResult"]["categories"]["performance"]["score"] * 100
-
-        # Gem hovedanalysen
-        analysis = PageSpeedAnalysis(
-            url=url,
-            strategy=strategy,
-            performance_score=score,
-            user_id=user_id
+PAGESPEED_API_URL = os.getenv(
+    "PAGESPEED_API_URL", "https://www.googleapis.com/pagespeedonline/v5/runPagespeed"
+)
+STRATEGIES = ("desktop", "mobile")
+
+# PSI calls routinely take 10-30 s, so the read timeout has to be generous
+PSI_TIMEOUT = float(os.getenv("PSI_TIMEOUT", "90"))
+PSI_CONNECT_TIMEOUT = float(os.getenv("PSI_CONNECT_TIMEOUT", "10"))
+PSI_MAX_CONNECTIONS = int(os.getenv("PSI_MAX_CONNECTIONS", "20"))
+PSI_KEEPALIVE_EXPIRY = float(os.getenv("PSI_KEEPALIVE_EXPIRY", "120"))
+
+# Result cache – identical (URL, strategy) requests within the TTL reuse the stored result
+PSI_CACHE_TTL = float(os.getenv("PSI_CACHE_TTL", "600"))
+PSI_CACHE_MAXSIZE = int(os.getenv("PSI_CACHE_MAXSIZE", "2048"))
+
+
+class PsiResponse(NamedTuple):
+    data: dict  # extracted fields, see LighthouseExtractor
+    body: bytes | None  # response for the archive, only kept when archiving is enabled (see _extract_response)
+
+
+class CachedResult(NamedTuple):
+    analysis_id: int
+    metrics: dict  # see analysis_metrics
+
+
+result_cache = TTLCache(maxsize=PSI_CACHE_MAXSIZE, ttl=PSI_CACHE_TTL)
+_inflight = SingleFlight()
+
+# Shared async client – created lazily, closed on app shutdown
+_psi_client: httpx.AsyncClient | None = None
+
+
+def get_psi_client() -> httpx.AsyncClient:
+    """
+    Return the process-wide PSI client.
+    One long-lived client keeps TLS connections alive (and multiplexed over HTTP/2)
+    instead of paying a new handshake for every strategy.
+    """
+    global _psi_client
+    if _psi_client is None or _psi_client.is_closed:
+        _psi_client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(PSI_TIMEOUT, connect=PSI_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=PSI_MAX_CONNECTIONS,
+                max_keepalive_connections=PSI_MAX_CONNECTIONS,
+                keepalive_expiry=PSI_KEEPALIVE_EXPIRY,
+            ),
+            headers={"Accept": "application/json"},
+        )
+    return _psi_client
+
+
+async def close_psi_client():
+    """Close the shared PSI client (called on app shutdown)."""
+    global _psi_client
+    if _psi_client is not None:
+        await _psi_client.aclose()
+        _psi_client = None
+
+
+def _psi_params(url: str, strategy: str) -> dict:
+    params = {"url": url, "strategy": strategy}
+    api_key = os.getenv("PAGESPEED_API_KEY")
+    if api_key:
+        params["key"] = api_key
+    return params
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form used as cache key: lower-case scheme/host, no default port,
+    no fragment and "/" for an empty path.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    return urlunsplit((scheme, host, parts.path or "/", parts.query, ""))
+
+
+async def _extract_response(response: httpx.Response, keep_body: bool = False) -> PsiResponse:
+    """
+    Parse the PSI body as it streams in, keeping only the fields we store.
+    With keep_body the body is kept for the archive as well: rebuilt without screenshots
+    from the same parse events (ARCHIVE_STRIP_SCREENSHOTS), else as the raw chunks.
+    """
+    stripper = ScreenshotStripper() if keep_body and ARCHIVE_STRIP_SCREENSHOTS else None
+    extractor = LighthouseExtractor(tee=stripper.handle if stripper else None)
+    chunks = [] if keep_body and not stripper else None
+    async for chunk in response.aiter_bytes():
+        extractor.feed(chunk)
+        if chunks is not None:
+            chunks.append(chunk)
+    data = extractor.close()
+    if stripper:
+        return PsiResponse(data, stripper.getvalue())
+    return PsiResponse(data, b"".join(chunks) if chunks is not None else None)
+
+
+async def fetch_pagespeed(url: str, strategy: str, deadline: float | None = None) -> PsiResponse:
+    """
+    Fetch a single PSI report over the shared client and return the extracted fields
+    (see LighthouseExtractor), plus the body for the archive when report archiving is enabled.
+    Calls are paced by the PSI quota limiter, retried with backoff on 429/5xx/network
+    errors and short-circuited while the breaker is open. Raises PageSpeedError on failure.
+    deadline (time.monotonic()) is the caller's time budget: a retry that could not finish
+    before it is not attempted – the error carries the delay so the job is rescheduled instead.
+    """
+    for attempt in range(PSI_MAX_RETRIES + 1):
+        if not breaker.allow():
+            psi_stats.failed += 1
+            raise CircuitOpenError(f"PSI circuit breaker is open – skipping {strategy}-analyse for {url}")
+
+        await wait_for_quota()
+        psi_stats.requests += 1
+
+        retry_after = None
+        try:
+            async with get_psi_client().stream("GET", PAGESPEED_API_URL, params=_psi_params(url, strategy)) as response:
+                if response.status_code == 200:
+                    result = await _extract_response(response, keep_body=ARCHIVE_REPORTS)
+                else:
+                    await response.aread()
+        except (httpx.HTTPError, ijson.JSONError) as exc:
+            error = f"{exc!r}"
+        else:
+            if response.status_code == 200:
+                breaker.record_success()
+                if result.data["lighthouseResult"]["categories"].get("performance", {}).get("score") is None:
+                    psi_stats.failed += 1
+                    raise PageSpeedError(f"{strategy}-analyse for {url} returned no performance score")
+                psi_stats.succeeded += 1
+                return result
+
+            error = f"HTTP {response.status_code}"
+            if response.status_code == 429:
+                psi_stats.throttled += 1
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            elif response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                # 4xx other than 429 (e.g. unreachable URL) will not improve on retry
+                psi_stats.failed += 1
+                raise PageSpeedError(f"{strategy}-analyse for {url} failed: {error} – {response.text[:300]}")
+
+        if attempt == PSI_MAX_RETRIES:
+            break
+
+        delay = retry_after if retry_after is not None else backoff_delay(attempt)
+        if deadline is not None and time.monotonic() + delay + PSI_TIMEOUT > deadline:
+            psi_stats.failed += 1
+            raise PageSpeedError(
+                f"{strategy}-analyse for {url} failed ({error}); retry in {delay:.0f} s would exceed the job timeout",
+                retry_after=delay,
+            )
+        psi_stats.retried += 1
+        logging.warning(f"⏳ {strategy}-analyse for {url} failed ({error}), retrying in {delay:.1f} s")
+        await asyncio.sleep(delay)
+
+    psi_stats.failed += 1
+    raise PageSpeedError(f"{strategy}-analyse for {url} failed after {PSI_MAX_RETRIES + 1} attempts: {error}")
+
+
+async def analyse_strategy(url: str, strategy: str, user_id: int = None, deadline: float | None = None) -> int:
+    """
+    Analyse one strategy, going through the result cache, and return the analysis id.
+    Concurrent calls for the same (URL, strategy) share a single PSI fetch.
+    Each strategy uses its own DB session, since they run concurrently.
+    """
+    key = (normalize_url(url), strategy)
+    db = SessionLocal()
+
+    try:
+        cached = result_cache.get(key)
+        if cached is not None:
+            logging.info(f"⚡ Cache hit for {strategy}-analyse af {url}")
+            return await run_in_threadpool(
+                store_shared_analysis, db, url, strategy, cached.analysis_id, cached.metrics, user_id
+            )
+
+        async def fetch_and_store():
+            response = await fetch_pagespeed(url, strategy, deadline)
+            analysis_id = await run_in_threadpool(
+                store_analysis, db, url, strategy, response.data, user_id, response.body
+            )
+            result = CachedResult(analysis_id, analysis_metrics(response.data))
+            result_cache.set(key, result)
+            return result
+
+        result, leader = await _inflight.do(key, fetch_and_store)
+        if leader:
+            return result.analysis_id
+        return await run_in_threadpool(
+            store_shared_analysis, db, url, strategy, result.analysis_id, result.metrics, user_id
         )
-        db.add(analysis)
-        db.commit()
-        db.refresh(analysis)
-
-        # Hent audits og gem dem
-        audits_data = data["lighthouseResult"].get("audits", {})
-        for audit in audits_data.values():
-            audit_score = audit.get("score")
-            if audit_score is not None and audit_score < 1:
-                db.add(PageSpeedAudit(
-                    analysis_id=analysis.id,
-                    title=audit.get("title"),
-                    description=audit.get("description"),
-                    display_value=audit.get("displayValue"),
-                    audit_score=audit_score
-                ))
-        db.commit()
+    finally:
+        db.close()
+
+
+async def run_pagespeed_analysis_async(url: str, user_id: int = None, deadline: float | None = None):
+    """
+    Non-blocking analysis – fetches desktop and mobile concurrently,
+    so an analysis takes roughly as long as the slowest strategy.
+    DB writes run in the threadpool to keep the event loop free.
+    Returns the stored analysis ids; raises PageSpeedError if any strategy failed.
+    deadline: see fetch_pagespeed.
+    """
+    logging.info(f"\n🔍 STARTER analyse for {url}")
+
+    results = await asyncio.gather(
+        *(analyse_strategy(url, strategy, user_id, deadline) for strategy in STRATEGIES),
+        return_exceptions=True
+    )
+
+    errors = [result for result in results if isinstance(result, BaseException)]
+    for error in errors:
+        logging.error(f"❌ {error}")
+    if errors:
+        # Successful strategies are cached, so a retry only re-fetches the failed one
+        raise errors[0]
 
     logging.info(f"🎉 Analysis finished for {url}")
+    return results
+
+
+def run_pagespeed_analysis(url: str, user_id: int = None):
+    """
+    Blocking wrapper around run_pagespeed_analysis_async for scripts and sync code.
+    Must not be called from a running event loop.
+    """
+    async def run():
+        try:
+            return await run_pagespeed_analysis_async(url, user_id)
+        finally:
+            # The shared client is bound to this loop
+            await close_psi_client()
+
+    return asyncio.run(run())
+
 
 def get_latest_analysis_with_scores(db: Session):
     # Hent nyeste desktop og mobil analyse for samme URL (hvis muligt)
@@ -88,5 +298,5 @@ def run_reanalysis(db: Session):
 
     url = latest.url
     logging.info(f"♻️ Starter reanalyse for seneste URL: {url}")
-    run_pagespeed_analysis(url, db)
+    run_pagespeed_analysis(url, user_id=latest.user_id)
     return True
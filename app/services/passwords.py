@@ -0,0 +1,62 @@
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from app.utils.security import pwd_context
+
+# bcrypt takes ~250 ms of CPU per call at cost 12. Calls run in this many threads –
+# bcrypt releases the GIL while hashing, so threads use several cores without a process pool.
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Hash/verify calls allowed to wait or run at once (per process); more are rejected right away
+PASSWORD_QUEUE_LIMIT = int(os.getenv("PASSWORD_QUEUE_LIMIT", str(PASSWORD_WORKERS * 8)))
+# Seconds a rejected client is asked to wait (Retry-After)
+PASSWORD_RETRY_AFTER = int(os.getenv("PASSWORD_RETRY_AFTER", "2"))
+
+_executor: ThreadPoolExecutor | None = None
+_pending = 0
+
+
+class PasswordServiceBusy(Exception):
+    """The password queue is full – the caller should answer 503."""
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=PASSWORD_WORKERS, thread_name_prefix="password")
+    return _executor
+
+
+async def _run(func, *args):
+    """
+    Run func in the password pool. Fails fast with PasswordServiceBusy once
+    PASSWORD_QUEUE_LIMIT calls are in flight, instead of letting logins queue up for seconds.
+    """
+    global _pending
+    if _pending >= PASSWORD_QUEUE_LIMIT:
+        logging.warning(f"🔒 Password queue full ({_pending} pending) – rejecting request")
+        raise PasswordServiceBusy()
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), func, *args)
+    finally:
+        _pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run(pwd_context.hash, password)
+
+
+async def verify_password_async(password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Verify password; returns (valid, new_hash). new_hash is set when the stored hash uses
+    an old scheme or cost factor (BCRYPT_ROUNDS) and should be saved in its place.
+    """
+    return await _run(pwd_context.verify_and_update, password, hashed_password)
+
+
+def shutdown_password_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
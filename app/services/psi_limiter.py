@@ -0,0 +1,270 @@
+import os
+import time
+import random
+import asyncio
+import logging
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from sqlalchemy import update
+from app.database import SessionLocal
+from app.models.psi_quota import PsiQuotaBucket
+
+# -----------------------------------------------------------
+# ✅ Configuration
+# -----------------------------------------------------------
+PSI_QUOTA_PER_MINUTE = int(os.getenv("PSI_QUOTA_PER_MINUTE", "240"))
+PSI_QUOTA_PER_DAY = int(os.getenv("PSI_QUOTA_PER_DAY", "25000"))
+# 'memory' = per process, 'database' = shared by every worker using the same DB
+PSI_RATE_LIMIT_BACKEND = os.getenv("PSI_RATE_LIMIT_BACKEND", "memory")
+
+PSI_MAX_RETRIES = int(os.getenv("PSI_MAX_RETRIES", "4"))
+PSI_BACKOFF_BASE = float(os.getenv("PSI_BACKOFF_BASE", "2"))
+PSI_BACKOFF_MAX = float(os.getenv("PSI_BACKOFF_MAX", "60"))
+
+# Longest we wait for quota before giving the job back to the queue
+PSI_MAX_QUOTA_WAIT = float(os.getenv("PSI_MAX_QUOTA_WAIT", "120"))
+
+PSI_BREAKER_THRESHOLD = int(os.getenv("PSI_BREAKER_THRESHOLD", "5"))
+PSI_BREAKER_RESET = float(os.getenv("PSI_BREAKER_RESET", "60"))
+
+
+class PageSpeedError(Exception):
+    """
+    Raised when a PSI report could not be fetched. retry_after (seconds) is set when PSI
+    told us how long to wait, so the job can be rescheduled no earlier than that.
+    """
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(PageSpeedError):
+    """Raised when PSI calls are short-circuited after repeated 5xx responses."""
+
+
+# -----------------------------------------------------------
+# ✅ Counters
+# -----------------------------------------------------------
+@dataclass
+class PsiStats:
+    requests: int = 0
+    succeeded: int = 0
+    throttled: int = 0  # had to wait for quota (locally or after a 429)
+    retried: int = 0
+    failed: int = 0
+    circuit_opened: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+stats = PsiStats()
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(PSI_BACKOFF_MAX, PSI_BACKOFF_BASE * 2 ** attempt))
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header (seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+# -----------------------------------------------------------
+# ✅ Token buckets
+# -----------------------------------------------------------
+@dataclass
+class BucketSpec:
+    name: str
+    capacity: float
+    period: float  # seconds to refill a full bucket
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+
+def _refill(spec: BucketSpec, tokens: float, updated_at: float, now: float) -> float:
+    return min(spec.capacity, tokens + (now - updated_at) * spec.rate)
+
+
+def _wait_time(spec: BucketSpec, tokens: float) -> float:
+    return 0.0 if tokens >= 1 else (1 - tokens) / spec.rate
+
+
+class MemoryQuota:
+    """
+    Token buckets kept in this process. A token is only taken when every bucket has one.
+    """
+
+    def __init__(self, specs: list[BucketSpec]):
+        self.specs = specs
+        now = time.monotonic()
+        self._state = {spec.name: (spec.capacity, now) for spec in specs}
+
+    def try_acquire(self) -> float:
+        """Take a token and return 0, or return the seconds to wait."""
+        now = time.monotonic()
+        levels = {}
+        for spec in self.specs:
+            tokens, updated_at = self._state[spec.name]
+            levels[spec.name] = _refill(spec, tokens, updated_at, now)
+
+        wait = max(_wait_time(spec, levels[spec.name]) for spec in self.specs)
+        if wait == 0:
+            for spec in self.specs:
+                self._state[spec.name] = (levels[spec.name] - 1, now)
+        return wait
+
+    async def acquire(self) -> float:
+        return self.try_acquire()
+
+
+class DatabaseQuota:
+    """
+    Token buckets stored in psi_quota_buckets and shared by all workers.
+    Updates use optimistic concurrency (compare-and-swap on updated_at), so this
+    works the same on PostgreSQL and SQLite without row locks.
+    """
+
+    def __init__(self, specs: list[BucketSpec]):
+        self.specs = specs
+
+    def _ensure_rows(self, db, now: float) -> dict[str, PsiQuotaBucket]:
+        rows = {row.name: row for row in db.query(PsiQuotaBucket).filter(
+            PsiQuotaBucket.name.in_([spec.name for spec in self.specs])
+        )}
+        missing = [spec for spec in self.specs if spec.name not in rows]
+        if missing:
+            for spec in missing:
+                db.merge(PsiQuotaBucket(name=spec.name, tokens=spec.capacity, updated_at=now))
+            db.commit()
+            return self._ensure_rows(db, now)
+        return rows
+
+    def try_acquire(self) -> float:
+        db = SessionLocal()
+        try:
+            for _ in range(5):
+                now = time.time()
+                rows = self._ensure_rows(db, now)
+                levels = {
+                    spec.name: _refill(spec, rows[spec.name].tokens, rows[spec.name].updated_at, now)
+                    for spec in self.specs
+                }
+                wait = max(_wait_time(spec, levels[spec.name]) for spec in self.specs)
+                if wait > 0:
+                    db.rollback()
+                    return wait
+
+                swapped = all(
+                    db.execute(
+                        update(PsiQuotaBucket)
+                        .where(PsiQuotaBucket.name == spec.name, PsiQuotaBucket.updated_at == rows[spec.name].updated_at)
+                        .values(tokens=levels[spec.name] - 1, updated_at=now)
+                    ).rowcount == 1
+                    for spec in self.specs
+                )
+                if swapped:
+                    db.commit()
+                    return 0.0
+
+                # Another worker took a token in between – retry with fresh state
+                db.rollback()
+                db.expire_all()
+            return random.uniform(0.05, 0.2)
+        finally:
+            db.close()
+
+    async def acquire(self) -> float:
+        return await asyncio.to_thread(self.try_acquire)
+
+
+# -----------------------------------------------------------
+# ✅ Circuit breaker
+# -----------------------------------------------------------
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive server errors and rejects calls for `reset_timeout`
+    seconds. After that, one trial call is let through (half-open).
+    """
+
+    def __init__(self, threshold: int = PSI_BREAKER_THRESHOLD, reset_timeout: float = PSI_BREAKER_RESET):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.trial_started_at: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+
+        now = time.monotonic()
+        if now - self.opened_at < self.reset_timeout:
+            return False
+        # Half-open: let a single trial call through (a new one if the last trial got stuck)
+        if self.trial_started_at is not None and now - self.trial_started_at < self.reset_timeout:
+            return False
+        self.trial_started_at = now
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_started_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            if self.opened_at is None:
+                stats.circuit_opened += 1
+                logging.error(f"🛑 PSI circuit breaker opened after {self.failures} server errors")
+            self.opened_at = time.monotonic()
+            self.trial_started_at = None
+
+
+# -----------------------------------------------------------
+# ✅ Process-wide instances
+# -----------------------------------------------------------
+_specs = [
+    BucketSpec("minute", PSI_QUOTA_PER_MINUTE, 60),
+    BucketSpec("day", PSI_QUOTA_PER_DAY, 86400),
+]
+quota = DatabaseQuota(_specs) if PSI_RATE_LIMIT_BACKEND == "database" else MemoryQuota(_specs)
+breaker = CircuitBreaker()
+
+
+async def wait_for_quota():
+    """
+    Block (asynchronously) until a PSI call may be made.
+    """
+    throttled = False
+    while True:
+        wait = await quota.acquire()
+        if wait == 0:
+            return
+        if wait > PSI_MAX_QUOTA_WAIT:
+            stats.throttled += 1
+            raise PageSpeedError(f"PSI quota exhausted – next call possible in {wait:.0f} s")
+        if not throttled:
+            stats.throttled += 1
+            throttled = True
+        await asyncio.sleep(wait)
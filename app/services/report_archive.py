@@ -0,0 +1,213 @@
+import io
+import os
+import gzip
+import json
+import hashlib
+import ijson
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.pagespeed_analysis import LighthouseReport
+
+# zstd is optional – without the zstandard package reports are stored gzip-compressed
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+# Raw PSI responses are only archived when enabled – they are 0.5-5 MB each before compression
+ARCHIVE_REPORTS = os.getenv("PSI_ARCHIVE_REPORTS", "false").lower() == "true"
+ARCHIVE_STRIP_SCREENSHOTS = os.getenv("PSI_ARCHIVE_STRIP_SCREENSHOTS", "true").lower() == "true"
+ARCHIVE_ZSTD_LEVEL = int(os.getenv("PSI_ARCHIVE_ZSTD_LEVEL", "10"))
+ARCHIVE_GZIP_LEVEL = int(os.getenv("PSI_ARCHIVE_GZIP_LEVEL", "6"))
+
+# Audits whose details are nothing but base64 images
+_SCREENSHOT_AUDITS = ("final-screenshot", "screenshot-thumbnails", "full-page-screenshot")
+_SCREENSHOT_DETAIL_TYPES = frozenset({"screenshot", "filmstrip", "full-page-screenshot"})
+
+reports_table = LighthouseReport.__table__
+
+
+def default_codec() -> str:
+    return "zstd" if zstandard is not None else "gzip"
+
+
+def compress(raw: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=ARCHIVE_ZSTD_LEVEL).compress(raw)
+    if codec == "gzip":
+        return gzip.compress(raw, compresslevel=ARCHIVE_GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unknown report codec: {codec}")
+
+
+def decompress(codec: str, blob: bytes) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Report is zstd-compressed – install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    if codec == "gzip":
+        return gzip.decompress(blob)
+    raise ValueError(f"Unknown report codec: {codec}")
+
+
+def decode_report(codec: str, blob: bytes) -> dict:
+    return json.loads(decompress(codec, blob))
+
+
+# The C string encoder json.dumps(..., ensure_ascii=False) uses, without its per-call overhead
+_encode_string = json.encoder.encode_basestring
+_SCALARS = {True: "true", False: "false", None: "null"}
+
+
+class ScreenshotStripper:
+    """
+    Rebuilds a PSI response as compact JSON from ijson parse events, leaving out the base64
+    screenshots – typically well over half of its size and never needed to re-derive audits
+    or metrics. Nothing but the output is kept, so the full report is never in memory.
+
+    Pass handle() as LighthouseExtractor's tee to strip while the response downloads (one
+    parse for both), or feed() raw bytes on its own. Only the details of an audit whose type
+    is not known from its key are buffered until their "type" shows up.
+    """
+
+    def __init__(self):
+        self._out = io.StringIO()
+        self._target = self._out  # a list while an audit's details are buffered
+        self._first = [True]  # per open container: no comma needed before the next item
+        self._key = None
+        self._skip_depth = 0
+        self._buffered = None  # (prefix, container depth, parent's first flag) of buffered details
+        self._events = None
+        self._parser = None
+
+    def feed(self, chunk: bytes):
+        if self._parser is None:
+            self._events = ijson.sendable_list()
+            self._parser = ijson.parse_coro(self._events, use_float=True)
+        self._parser.send(chunk)
+        self.handle(self._events)
+        del self._events[:]
+
+    def close(self) -> bytes:
+        if self._parser is not None:
+            self._parser.close()
+            self.handle(self._events)
+        return self.getvalue()
+
+    def getvalue(self) -> bytes:
+        return self._out.getvalue().encode()
+
+    def handle(self, events):
+        for prefix, event, value in events:
+            if self._skip_depth:
+                if event in ("start_map", "start_array"):
+                    self._skip_depth += 1
+                elif event in ("end_map", "end_array"):
+                    self._skip_depth -= 1
+            elif event == "map_key":
+                self._key = value
+            elif event in ("end_map", "end_array"):
+                self._first.pop()
+                self._write("}" if event == "end_map" else "]")
+                if self._buffered and len(self._first) < self._buffered[1]:
+                    self._out.write("".join(self._target))
+                    self._target, self._buffered = self._out, None
+            elif self._buffered and prefix == f"{self._buffered[0]}.type" and value in _SCREENSHOT_DETAIL_TYPES:
+                # Screenshot details after all: drop what was buffered and the rest of the object
+                prefix, depth, first = self._buffered
+                self._skip_depth = len(self._first) - depth + 1
+                del self._first[depth - 1:]
+                self._first[-1] = first
+                self._target, self._buffered, self._key = self._out, None, None
+            else:
+                self._value(prefix, event, value)
+
+    def _value(self, prefix: str, event: str, value):
+        key, self._key = self._key, None
+        parts = prefix.split(".")
+        if prefix == "lighthouseResult.fullPageScreenshot" or (
+            len(parts) == 4 and parts[:2] == ["lighthouseResult", "audits"] and parts[3] == "details"
+            and parts[2] in _SCREENSHOT_AUDITS
+        ):
+            self._skip_depth = 1 if event in ("start_map", "start_array") else 0
+            return
+        if len(parts) == 4 and parts[:2] == ["lighthouseResult", "audits"] and parts[3] == "details" \
+                and event == "start_map" and not self._buffered:
+            self._buffered = (prefix, len(self._first) + 1, self._first[-1])
+            self._target = []
+
+        if not self._first[-1]:
+            self._write(",")
+        self._first[-1] = False
+        if key is not None:
+            self._write(_encode_string(key) + ":")
+        if event == "start_map":
+            self._write("{")
+            self._first.append(True)
+        elif event == "start_array":
+            self._write("[")
+            self._first.append(True)
+        elif event == "string":
+            self._write(_encode_string(value))
+        else:
+            self._write(_SCALARS[value] if event in ("boolean", "null") else repr(value))
+
+    def _write(self, text: str):
+        if self._target is self._out:
+            self._out.write(text)
+        else:
+            self._target.append(text)
+
+
+def strip_screenshots(raw: bytes, chunk_size: int = 64 * 1024) -> bytes:
+    """Drop the base64 screenshots from a complete PSI response (see ScreenshotStripper)."""
+    stripper = ScreenshotStripper()
+    view = memoryview(raw)
+    for start in range(0, len(raw), chunk_size):
+        stripper.feed(bytes(view[start:start + chunk_size]))
+    return stripper.close()
+
+
+def _insert_ignore(db: Session, row: dict):
+    dialect = db.get_bind().dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    db.execute(insert(reports_table).values(row).on_conflict_do_nothing(index_elements=["content_hash"]))
+
+
+def archive_report(db: Session, raw: bytes, screenshots_stripped: bool = ARCHIVE_STRIP_SCREENSHOTS) -> int:
+    """
+    Compress and store a PSI response, returning the report id. The response is stored as
+    given – fetch_pagespeed already strips the screenshots while it downloads; use
+    strip_screenshots for a complete response – and screenshots_stripped records whether it was.
+    Reports are content-addressed, so an identical payload is stored once.
+    Runs inside the caller's transaction.
+    """
+    digest = hashlib.sha256(raw).hexdigest()
+
+    report_id = db.execute(
+        select(reports_table.c.id).where(reports_table.c.content_hash == digest)
+    ).scalar_one_or_none()
+    if report_id is not None:
+        return report_id
+
+    codec = default_codec()
+    blob = compress(raw, codec)
+    _insert_ignore(db, {
+        "content_hash": digest,
+        "codec": codec,
+        "raw_size": len(raw),
+        "compressed_size": len(blob),
+        "screenshots_stripped": screenshots_stripped,
+        "data": blob,
+    })
+    return db.execute(
+        select(reports_table.c.id).where(reports_table.c.content_hash == digest)
+    ).scalar_one()
+
+
+def load_report_bytes(db: Session, report_id: int) -> bytes:
+    """Fetch and decompress a stored report without building ORM objects."""
+    row = db.execute(
+        select(reports_table.c.codec, reports_table.c.data).where(reports_table.c.id == report_id)
+    ).one()
+    return decompress(row.codec, row.data)
@@ -0,0 +1,172 @@
+import os
+import time
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, update, delete, exists, func, case, or_, tuple_, distinct
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, aliased
+from app.models.analysis_rollup import GRANULARITY_WEEK
+from app.models.audit_summary import AuditSummary
+from app.models.pagespeed_analysis import PageSpeedAnalysis, PageSpeedAudit
+from app.models.user import User
+from app.services.rollups import bucket_start
+
+# Raw audits are kept this many days; per plan with AUDIT_RETENTION_DAYS_<PLAN>, e.g. AUDIT_RETENTION_DAYS_PRO=365
+AUDIT_RETENTION_DAYS = int(os.getenv("AUDIT_RETENTION_DAYS", "90"))
+# Analyses whose audits are summarized and deleted per transaction (about 100–200 audit rows each)
+RETENTION_CHUNK_SIZE = int(os.getenv("RETENTION_CHUNK_SIZE", "200"))
+# Pause between chunks, to leave room for other writers on a busy database
+RETENTION_PAUSE = float(os.getenv("RETENTION_PAUSE", "0"))
+
+analyses_table = PageSpeedAnalysis.__table__
+audits_table = PageSpeedAudit.__table__
+summaries_table = AuditSummary.__table__
+users_table = User.__table__
+
+SUMMARY_KEY = ["user_id", "url", "strategy", "bucket_start", "definition_id"]
+SUMMARY_SUMS = ("sample_count", "score_count", "score_sum", "numeric_count", "numeric_sum")
+
+
+@dataclass
+class RetentionReport:
+    analyses: int = 0
+    audits_deleted: int = 0
+    summaries_written: int = 0
+    seconds: float = 0.0
+
+
+def retention_days(plan: str) -> int:
+    return int(os.getenv(f"AUDIT_RETENTION_DAYS_{plan.upper()}", AUDIT_RETENTION_DAYS))
+
+
+def _upsert_summaries(db: Session, rows: list[dict]):
+    """
+    Add to existing week rows: sums and counts are added, min_score keeps the lower value.
+    One statement for all rows (executemany, batched by the driver), so it is compiled once
+    and cached instead of once per multi-row VALUES list.
+    """
+    dialect = db.get_bind().dialect.name
+    statement = (postgresql.insert if dialect == "postgresql" else sqlite.insert)(summaries_table)
+    excluded = statement.excluded
+    db.execute(statement.on_conflict_do_update(
+        index_elements=SUMMARY_KEY,
+        set_={
+            **{column: summaries_table.c[column] + excluded[column] for column in SUMMARY_SUMS},
+            "min_score": case(
+                (or_(summaries_table.c.min_score.is_(None), excluded.min_score < summaries_table.c.min_score),
+                 excluded.min_score),
+                else_=summaries_table.c.min_score,
+            ),
+            "updated_at": func.now(),
+        },
+    ), rows)
+
+
+def summarize_audits(db: Session, analyses: list) -> int:
+    """
+    Fold the audits of `analyses` (rows with id, created_at) into weekly audit_summaries.
+    One GROUP BY per week in the chunk – chunks are in created_at order, so usually one or two.
+    Returns the number of summary rows written.
+    """
+    weeks = defaultdict(list)
+    for analysis in analyses:
+        weeks[bucket_start(analysis.created_at, GRANULARITY_WEEK)].append(analysis.id)
+
+    rows = []
+    for week, analysis_ids in weeks.items():
+        grouped = db.execute(
+            select(
+                analyses_table.c.user_id, analyses_table.c.url, analyses_table.c.strategy, audits_table.c.definition_id,
+                func.count().label("sample_count"),
+                func.count(audits_table.c.audit_score).label("score_count"),
+                func.coalesce(func.sum(audits_table.c.audit_score), 0.0).label("score_sum"),
+                func.min(audits_table.c.audit_score).label("min_score"),
+                func.count(audits_table.c.numeric_value).label("numeric_count"),
+                func.coalesce(func.sum(audits_table.c.numeric_value), 0.0).label("numeric_sum"),
+            )
+            .join(analyses_table, analyses_table.c.id == audits_table.c.analysis_id)
+            .where(audits_table.c.analysis_id.in_(analysis_ids))
+            .group_by(analyses_table.c.user_id, analyses_table.c.url, analyses_table.c.strategy, audits_table.c.definition_id)
+        ).mappings().all()
+        rows.extend({**row, "bucket_start": week} for row in grouped)
+
+    if rows:
+        _upsert_summaries(db, rows)
+    return len(rows)
+
+
+def purge_expired_audits(
+    db: Session,
+    plan: str | None = None,
+    chunk_size: int = RETENTION_CHUNK_SIZE,
+    max_chunks: int | None = None,
+    pause: float = RETENTION_PAUSE,
+) -> RetentionReport:
+    """
+    Summarize and delete raw audits older than each plan's retention window.
+
+    Works through the backlog oldest first in chunks of `chunk_size` analyses, one short
+    transaction each: summarize, one set-based DELETE ... WHERE analysis_id IN (...) on the
+    analysis_id index, then mark the analyses with audits_purged_at (which takes them out of
+    the partial backlog index). No lock is held between chunks, and on PostgreSQL the rows
+    are claimed with SKIP LOCKED so overlapping runs do not wait on each other.
+
+    Audits that a younger cached analysis still reads (source_analysis_id) are kept until
+    that analysis is past the window as well.
+    """
+    started = time.perf_counter()
+    report = RetentionReport()
+    now = datetime.now(timezone.utc)
+    shared = aliased(analyses_table)
+
+    plans = [plan] if plan else db.execute(select(distinct(users_table.c.plan))).scalars().all()
+    for current_plan in plans:
+        cutoff = now - timedelta(days=retention_days(current_plan))
+        resume_after = None
+        chunks = 0
+        while max_chunks is None or chunks < max_chunks:
+            query = (
+                select(analyses_table.c.id, analyses_table.c.created_at)
+                .join(users_table, users_table.c.id == analyses_table.c.user_id)
+                .where(
+                    users_table.c.plan == current_plan,
+                    analyses_table.c.audits_purged_at.is_(None),
+                    analyses_table.c.created_at < cutoff,
+                    ~exists().where(shared.c.source_analysis_id == analyses_table.c.id, shared.c.created_at >= cutoff),
+                )
+                .order_by(analyses_table.c.created_at, analyses_table.c.id)
+                .limit(chunk_size)
+            )
+            if resume_after is not None:
+                # Skip what earlier chunks of this run passed over (other plans, shared sources).
+                # On SQLite, rows in the same second as the previous chunk's last row may wait for the next run.
+                query = query.where(tuple_(analyses_table.c.created_at, analyses_table.c.id) > tuple_(*resume_after))
+            if db.get_bind().dialect.name == "postgresql":
+                query = query.with_for_update(of=analyses_table, skip_locked=True)
+
+            analyses = db.execute(query).all()
+            if not analyses:
+                db.rollback()
+                break
+
+            analysis_ids = [analysis.id for analysis in analyses]
+            report.summaries_written += summarize_audits(db, analyses)
+            report.audits_deleted += db.execute(
+                delete(audits_table).where(audits_table.c.analysis_id.in_(analysis_ids))
+            ).rowcount
+            db.execute(
+                update(analyses_table).where(analyses_table.c.id.in_(analysis_ids)).values(audits_purged_at=now)
+            )
+            db.commit()
+
+            report.analyses += len(analyses)
+            resume_after = (analyses[-1].created_at, analyses[-1].id)
+            chunks += 1
+            logging.info(f"🧹 [{current_plan}] {report.analyses} analyses, {report.audits_deleted} audits deleted so far")
+            if pause:
+                time.sleep(pause)
+
+    report.seconds = time.perf_counter() - started
+    return report
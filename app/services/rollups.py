@@ -0,0 +1,124 @@
+import math
+from datetime import date, datetime, timedelta, time, timezone
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.analysis_rollup import AnalysisRollup, GRANULARITY_DAY, GRANULARITY_WEEK
+from app.models.pagespeed_analysis import PageSpeedAnalysis
+
+# Columns on pagespeed_analyses that are rolled up
+ROLLUP_METRICS = ("performance_score", "lcp", "cls", "tbt", "fcp", "speed_index", "tti")
+GRANULARITIES = (GRANULARITY_DAY, GRANULARITY_WEEK)
+
+analyses_table = PageSpeedAnalysis.__table__
+rollups_table = AnalysisRollup.__table__
+
+
+def bucket_start(moment: datetime, granularity: str) -> date:
+    day = moment.astimezone(timezone.utc).date() if moment.tzinfo else moment.date()
+    if granularity == GRANULARITY_WEEK:
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def bucket_bounds(start: date, granularity: str) -> tuple[datetime, datetime]:
+    days = 7 if granularity == GRANULARITY_WEEK else 1
+    lower = datetime.combine(start, time.min, tzinfo=timezone.utc)
+    return lower, lower + timedelta(days=days)
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Linear interpolation between closest ranks (same as PostgreSQL's percentile_cont)."""
+    position = (len(sorted_values) - 1) * fraction
+    lower, upper = math.floor(position), math.ceil(position)
+    if lower == upper:
+        return sorted_values[lower]
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _upsert(db: Session, rows: list[dict]):
+    dialect = db.get_bind().dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    statement = insert(rollups_table).values(rows)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["user_id", "url", "strategy", "granularity", "bucket_start", "metric"],
+        set_={
+            column: statement.excluded[column]
+            for column in ("count", "min_value", "max_value", "avg_value", "p75_value", "updated_at")
+        },
+    ))
+
+
+def refresh_rollups(db: Session, user_id: int, url: str, strategy: str, created_at: datetime):
+    """
+    Recompute the day and week buckets that contain created_at for one (user, URL, strategy).
+    Only the analyses inside the week are read – a handful of rows – so this runs
+    inside the caller's transaction every time an analysis is stored.
+    A bucket last written by a concurrent transaction is corrected by the next analysis in it.
+    """
+    if user_id is None:
+        return
+
+    week = bucket_start(created_at, GRANULARITY_WEEK)
+    lower, upper = bucket_bounds(week, GRANULARITY_WEEK)
+    analyses = db.execute(
+        select(analyses_table.c.created_at, *(analyses_table.c[metric] for metric in ROLLUP_METRICS))
+        .where(
+            analyses_table.c.user_id == user_id,
+            analyses_table.c.url == url,
+            analyses_table.c.strategy == strategy,
+            analyses_table.c.created_at >= lower,
+            analyses_table.c.created_at < upper,
+        )
+    ).all()
+
+    day = bucket_start(created_at, GRANULARITY_DAY)
+    buckets = {
+        GRANULARITY_WEEK: (week, analyses),
+        GRANULARITY_DAY: (day, [row for row in analyses if bucket_start(row.created_at, GRANULARITY_DAY) == day]),
+    }
+
+    now = datetime.now(timezone.utc)
+    rows = []
+    for granularity, (start, bucket_rows) in buckets.items():
+        for metric in ROLLUP_METRICS:
+            values = sorted(row._mapping[metric] for row in bucket_rows if row._mapping[metric] is not None)
+            if not values:
+                continue
+            rows.append({
+                "user_id": user_id,
+                "url": url,
+                "strategy": strategy,
+                "granularity": granularity,
+                "bucket_start": start,
+                "metric": metric,
+                "count": len(values),
+                "min_value": values[0],
+                "max_value": values[-1],
+                "avg_value": sum(values) / len(values),
+                "p75_value": percentile(values, 0.75),
+                "updated_at": now,
+            })
+    if rows:
+        _upsert(db, rows)
+
+
+def get_rollups(
+    db: Session, user_id: int, url: str, strategy: str = None,
+    granularity: str = GRANULARITY_DAY, since: date = None,
+) -> list[AnalysisRollup]:
+    """Rollup rows for a trend chart, oldest bucket first."""
+    query = (
+        select(AnalysisRollup)
+        .where(
+            AnalysisRollup.user_id == user_id,
+            AnalysisRollup.url == url,
+            AnalysisRollup.granularity == granularity,
+        )
+        .order_by(AnalysisRollup.strategy, AnalysisRollup.bucket_start, AnalysisRollup.metric)
+    )
+    if strategy:
+        query = query.where(AnalysisRollup.strategy == strategy)
+    if since:
+        query = query.where(AnalysisRollup.bucket_start >= since)
+    return db.execute(query).scalars().all()
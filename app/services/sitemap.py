@@ -0,0 +1,160 @@
+import os
+import zlib
+import socket
+import asyncio
+import logging
+import ipaddress
+from contextlib import aclosing
+from typing import AsyncIterator
+from xml.etree.ElementTree import XMLPullParser, ParseError
+import httpx
+
+SITEMAP_TIMEOUT = float(os.getenv("SITEMAP_TIMEOUT", "30"))
+# A sitemap index may point at further sitemaps; nested indexes are followed this deep
+SITEMAP_MAX_DEPTH = int(os.getenv("SITEMAP_MAX_DEPTH", "2"))
+SITEMAP_MAX_REDIRECTS = int(os.getenv("SITEMAP_MAX_REDIRECTS", "5"))
+# Only for local development: allow sitemaps on localhost and private networks
+SITEMAP_ALLOW_PRIVATE = os.getenv("SITEMAP_ALLOW_PRIVATE", "false").lower() == "true"
+
+
+class SitemapError(Exception):
+    """The sitemap could not be fetched or parsed."""
+
+
+def _local_name(tag: str) -> str:
+    # "{http://www.sitemaps.org/schemas/sitemap/0.9}loc" -> "loc"
+    return tag.rsplit("}", 1)[-1]
+
+
+class SitemapParser:
+    """
+    Incremental sitemap parser. Feed it raw bytes; it yields page URLs (<url><loc>)
+    and nested sitemap URLs (<sitemap><loc>) as soon as each element closes, and
+    drops parsed elements so memory stays flat for large sitemaps.
+    """
+
+    def __init__(self):
+        self._parser = XMLPullParser(events=("end",))
+        self.pages: list[str] = []
+        self.sitemaps: list[str] = []
+
+    def feed(self, chunk: bytes):
+        self._parser.feed(chunk)
+        self._consume()
+
+    def close(self):
+        self._parser.close()
+        self._consume()
+
+    def _consume(self):
+        for _, element in self._parser.read_events():
+            name = _local_name(element.tag)
+            if name in ("url", "sitemap"):
+                loc = next((child.text for child in element if _local_name(child.tag) == "loc"), None)
+                if loc and loc.strip():
+                    (self.pages if name == "url" else self.sitemaps).append(loc.strip())
+                element.clear()
+
+
+def _is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])  # drop an IPv6 zone id
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def check_public_url(url: httpx.URL):
+    """
+    Raise SitemapError unless url is http(s) and its host resolves only to public addresses –
+    the sitemap URL comes from the user, so it must not reach localhost, the cloud metadata
+    service or our private network (SSRF).
+    """
+    if url.scheme not in ("http", "https") or not url.host:
+        raise SitemapError(f"Sitemap {url} must be an http(s) URL")
+    if SITEMAP_ALLOW_PRIVATE:
+        return
+    port = url.port or (443 if url.scheme == "https" else 80)
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(url.host, port, type=socket.SOCK_STREAM)
+    except OSError as exc:
+        raise SitemapError(f"Could not resolve sitemap host {url.host}: {exc}") from exc
+    if not all(_is_public_address(info[4][0]) for info in infos):
+        raise SitemapError(f"Sitemap {url} points to a private or reserved address")
+
+
+def check_connected_peer(url: httpx.URL, response: httpx.Response):
+    """
+    Raise SitemapError unless the connection the response came over goes to a public address.
+    The client resolves the host again when it connects, so a host whose DNS answer changes
+    after check_public_url (DNS rebinding) is caught here, before any of the body is read.
+    """
+    if SITEMAP_ALLOW_PRIVATE:
+        return
+    stream = response.extensions.get("network_stream")
+    server_addr = stream.get_extra_info("server_addr") if stream else None
+    if not server_addr or not _is_public_address(server_addr[0]):
+        raise SitemapError(f"Sitemap {url} points to a private or reserved address")
+
+
+async def _stream_sitemap(client: httpx.AsyncClient, sitemap_url: str) -> AsyncIterator[SitemapParser]:
+    parser = SitemapParser()
+    try:
+        url = httpx.URL(sitemap_url)
+        # Redirects are followed by hand, so every hop is checked before it is requested
+        for _ in range(SITEMAP_MAX_REDIRECTS + 1):
+            await check_public_url(url)
+            async with client.stream("GET", url, follow_redirects=False) as response:
+                check_connected_peer(url, response)
+                if response.is_redirect:
+                    url = url.join(response.headers["location"])
+                    continue
+                if response.status_code != 200:
+                    raise SitemapError(f"Sitemap {sitemap_url} returned HTTP {response.status_code}")
+                # .xml.gz sitemaps are served as gzip files, not with Content-Encoding
+                gunzip = zlib.decompressobj(16 + zlib.MAX_WBITS) if url.path.endswith(".gz") else None
+                async for chunk in response.aiter_bytes():
+                    parser.feed(gunzip.decompress(chunk) if gunzip else chunk)
+                    yield parser
+            parser.close()
+            yield parser
+            return
+        raise SitemapError(f"Sitemap {sitemap_url} redirected more than {SITEMAP_MAX_REDIRECTS} times")
+    except (httpx.HTTPError, httpx.InvalidURL, ParseError, zlib.error) as exc:
+        raise SitemapError(f"Could not read sitemap {sitemap_url}: {exc!r}") from exc
+
+
+async def iter_sitemap_urls(sitemap_url: str, limit: int, client: httpx.AsyncClient = None) -> AsyncIterator[str]:
+    """
+    Yield page URLs from a sitemap (or sitemap index) while it downloads, stopping after limit URLs.
+    Every sitemap, redirect target and nested sitemap is checked with check_public_url first,
+    and the address actually connected to with check_connected_peer.
+    """
+    own_client = client is None
+    client = client or httpx.AsyncClient(timeout=SITEMAP_TIMEOUT)
+    pending = [(sitemap_url, 0)]
+    seen = set()
+    count = 0
+    try:
+        while pending and count < limit:
+            current, depth = pending.pop(0)
+            if current in seen:
+                continue
+            seen.add(current)
+
+            # aclosing ends the download as soon as the limit is reached
+            async with aclosing(_stream_sitemap(client, current)) as parsers:
+                async for parser in parsers:
+                    for page in parser.pages:
+                        yield page
+                        count += 1
+                        if count >= limit:
+                            return
+                    parser.pages.clear()
+                    if depth < SITEMAP_MAX_DEPTH:
+                        pending.extend((nested, depth + 1) for nested in parser.sitemaps)
+                    elif parser.sitemaps:
+                        logging.warning(f"⚠️ Ignoring sitemaps nested deeper than {SITEMAP_MAX_DEPTH} in {current}")
+                    parser.sitemaps.clear()
+    finally:
+        if own_client:
+            await client.aclose()
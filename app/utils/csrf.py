@@ -1,37 +1,61 @@
+import os
+import hmac
+import time
+import hashlib
 import secrets
 from fastapi import Request, HTTPException, status
+from app.utils.token import SECRET_KEY
+
+# Key used to store the per-session CSRF key in the session
+SESSION_KEY = "csrf_key"
+
+# How long a token from a rendered form stays valid (seconds)
+CSRF_TOKEN_MAX_AGE = int(os.getenv("CSRF_TOKEN_MAX_AGE", str(24 * 3600)))
+# Tokens carry their issue time rounded down to this step, so a page renders the same
+# token for the same session within a step – identical HTML, cacheable
+CSRF_TOKEN_STEP = 3600
+
+
+def _signature(key: str, issued_at: int) -> str:
+    message = f"{key}:{issued_at}".encode()
+    return hmac.new(SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
 
-# Key used to store the CSRF token in the session
-SESSION_KEY = "csrf_token"
 
 def generate_csrf_token(request: Request) -> str:
     """
-    Generate a new CSRF token, store it in the user's session,
-    and return it for use in forms.
+    Return a CSRF token for forms: '<issued_at>.<HMAC of the session's CSRF key and issued_at>'.
+    Stateless – the session is only written once, when it gets its CSRF key – so any number
+    of page views and open tabs share valid tokens.
     """
-    token = secrets.token_urlsafe(32)  # Secure random token
-    request.session[SESSION_KEY] = token
-    return token
+    key = request.session.get(SESSION_KEY)
+    if not key:
+        key = request.session[SESSION_KEY] = secrets.token_urlsafe(32)
+    issued_at = int(time.time()) // CSRF_TOKEN_STEP * CSRF_TOKEN_STEP
+    return f"{issued_at}.{_signature(key, issued_at)}"
 
 
 def validate_csrf_token(request: Request, token_from_form: str) -> None:
     """
-    Validate the CSRF token submitted from the form against the one stored in session.
-    If invalid or missing, raise 403 Forbidden.
+    Validate the CSRF token submitted from the form against the session's CSRF key.
+    If invalid, expired or missing, raise 403 Forbidden.
     """
-    token_in_session = request.session.get(SESSION_KEY)
+    key = request.session.get(SESSION_KEY)
 
-    if not token_from_form or not token_in_session:
+    if not token_from_form or not key:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="CSRF token is missing."
         )
 
-    if token_from_form != token_in_session:
+    issued_at, _, signature = token_from_form.partition(".")
+    if not issued_at.isdigit() or not hmac.compare_digest(signature, _signature(key, int(issued_at))):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="CSRF token is invalid."
         )
 
-    # Optionally rotate token here to prevent reuse
-    del request.session[SESSION_KEY]
+    if time.time() - int(issued_at) > CSRF_TOKEN_MAX_AGE:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="CSRF token has expired."
+        )
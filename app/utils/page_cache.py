@@ -0,0 +1,77 @@
+import os
+import time
+import hashlib
+from fastapi import Request
+from fastapi.responses import Response
+from fastapi.templating import Jinja2Templates
+from app.dependencies.templates import TEMPLATE_AUTO_RELOAD
+from app.utils.cache import TTLCache
+
+# -----------------------------------------------------------
+# ✅ Configuration
+# -----------------------------------------------------------
+# Off by default while templates auto-reload (development), so template edits show up
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE", "false" if TEMPLATE_AUTO_RELOAD else "true").lower() == "true"
+PAGE_CACHE_MAXSIZE = int(os.getenv("PAGE_CACHE_MAXSIZE", "512"))
+PAGE_CACHE_TTL = float(os.getenv("PAGE_CACHE_TTL", str(24 * 3600)))
+# Cache-Control max-age for anonymous visitors (browser and CDN); logged-in users always revalidate
+PAGE_CACHE_MAX_AGE = int(os.getenv("PAGE_CACHE_MAX_AGE", "300"))
+# Part of every cache key: a new deploy never serves pages rendered by the previous one.
+# Set it to the release / git SHA; it defaults to the process start time.
+DEPLOY_ID = os.getenv("DEPLOY_ID") or str(int(time.time()))
+# Languages the public pages are rendered in, first one is the default
+PUBLIC_LOCALES = [locale.strip() for locale in os.getenv("PUBLIC_LOCALES", "en").split(",") if locale.strip()]
+
+_pages = TTLCache(maxsize=PAGE_CACHE_MAXSIZE, ttl=PAGE_CACHE_TTL)
+
+
+def page_locale(request: Request) -> str:
+    """The first supported locale in Accept-Language, else the default."""
+    for part in request.headers.get("accept-language", "").split(","):
+        language = part.split(";")[0].strip().lower()
+        for locale in PUBLIC_LOCALES:
+            if language == locale or language.startswith(f"{locale}-"):
+                return locale
+    return PUBLIC_LOCALES[0]
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison, as If-None-Match requires
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def clear_page_cache():
+    _pages.clear()
+
+
+def cached_page(request: Request, templates: Jinja2Templates, template_name: str, context: dict | None = None) -> Response:
+    """
+    Render a page whose output depends only on the deploy, the locale and whether the visitor
+    is logged in. The rendered bytes and a strong ETag (SHA-256 of the body, so identical on
+    every worker) are kept per (deploy, base URL, path, locale, auth state). A matching
+    If-None-Match gets an empty 304.
+    """
+    locale = page_locale(request)
+    logged_in = bool(request.session.get("user_id"))
+    headers = {
+        "Cache-Control": "private, no-cache" if logged_in
+        else f"public, max-age={PAGE_CACHE_MAX_AGE}, stale-while-revalidate={PAGE_CACHE_MAX_AGE}",
+    }
+    if len(PUBLIC_LOCALES) > 1:
+        headers["Vary"] = "Accept-Language"
+
+    # url_for renders absolute URLs, so the base URL is part of the key
+    key = (DEPLOY_ID, str(request.base_url), request.url.path, locale, logged_in)
+    entry = _pages.get(key) if PAGE_CACHE_ENABLED else None
+    if entry is None:
+        body = templates.TemplateResponse(template_name, {"request": request, "locale": locale, **(context or {})}).body
+        entry = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+        if PAGE_CACHE_ENABLED:
+            _pages.set(key, entry)
+
+    body, etag = entry
+    headers["ETag"] = etag
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="text/html", headers=headers)
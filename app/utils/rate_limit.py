@@ -0,0 +1,210 @@
+import os
+import math
+import time
+import random
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from fastapi import Request, Form, HTTPException, status
+from sqlalchemy import select, delete
+from sqlalchemy.dialects import postgresql, sqlite
+from app.database import SessionLocal
+from app.models.rate_limit import RateLimitCounter
+
+# Redis is optional – only needed for RATE_LIMIT_BACKEND=redis
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover
+    aioredis = None
+
+# -----------------------------------------------------------
+# ✅ Configuration
+# -----------------------------------------------------------
+# 'memory' = per process, 'database' = shared via the app database, 'redis' = shared via RATE_LIMIT_REDIS_URL
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+# Most keys the memory backend keeps; the least recently used are dropped first
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+
+@dataclass(frozen=True)
+class Limit:
+    count: int
+    period: int  # seconds
+
+
+def parse_limit(value: str) -> Limit:
+    """'20/60' -> 20 attempts per 60 seconds."""
+    count, period = value.split("/")
+    return Limit(int(count), int(period))
+
+
+# Attempts per client IP and per account (the e-mail in the form)
+LIMITS = {
+    "login:ip": parse_limit(os.getenv("RATE_LIMIT_LOGIN_IP", "20/60")),
+    "login:account": parse_limit(os.getenv("RATE_LIMIT_LOGIN_ACCOUNT", "10/900")),
+    "signup:ip": parse_limit(os.getenv("RATE_LIMIT_SIGNUP_IP", "5/3600")),
+    "forgot-password:ip": parse_limit(os.getenv("RATE_LIMIT_FORGOT_PASSWORD_IP", "5/900")),
+    "forgot-password:account": parse_limit(os.getenv("RATE_LIMIT_FORGOT_PASSWORD_ACCOUNT", "3/3600")),
+}
+
+
+def retry_after(limit: Limit, now: float, current: int, previous: int) -> float:
+    """
+    Sliding-window estimate from two fixed windows: the previous window's count is weighted
+    by how much of it still overlaps the last `period` seconds. Returns 0 when one more attempt
+    is allowed, otherwise the seconds until it will be.
+    """
+    elapsed = now % limit.period
+    if previous * (1 - elapsed / limit.period) + current < limit.count:
+        return 0.0
+    if current >= limit.count:
+        # Blocked for the rest of this window, and until this window's weight has decayed enough
+        return limit.period - elapsed + limit.period * (1 - limit.count / current)
+    return max(0.001, limit.period * (1 - (limit.count - current) / previous) - elapsed)
+
+
+# -----------------------------------------------------------
+# ✅ Backends
+# -----------------------------------------------------------
+class MemoryRateLimiter:
+    """
+    Per-process counters: key -> (window, count in window, count in previous window).
+    O(1) per attempt; keys idle for two windows count as zero and are evicted LRU-first.
+    """
+
+    def __init__(self, maxsize: int = RATE_LIMIT_MAX_KEYS):
+        self.maxsize = maxsize
+        self._counters: OrderedDict[str, tuple[int, int, int]] = OrderedDict()
+
+    async def hit(self, key: str, limit: Limit) -> float:
+        now = time.time()
+        window = int(now // limit.period)
+        current, previous = 0, 0
+        entry = self._counters.get(key)
+        if entry is not None:
+            if entry[0] == window:
+                current, previous = entry[1], entry[2]
+            elif entry[0] == window - 1:
+                previous = entry[1]
+
+        wait = retry_after(limit, now, current, previous)
+        if wait:
+            return wait
+
+        self._counters[key] = (window, current + 1, previous)
+        self._counters.move_to_end(key)
+        while len(self._counters) > self.maxsize:
+            self._counters.popitem(last=False)
+        return 0.0
+
+
+class DatabaseRateLimiter:
+    """
+    Counters in rate_limit_counters, shared by every worker using the same database
+    (PostgreSQL or SQLite). One read and one upsert per attempt; expired rows are
+    deleted in passing by about one attempt in a hundred. Two workers racing on the same
+    key may both let an attempt through – fine for throttling.
+    """
+
+    table = RateLimitCounter.__table__
+
+    def _hit(self, key: str, limit: Limit) -> float:
+        now = time.time()
+        window = int(now // limit.period)
+        db = SessionLocal()
+        try:
+            counts = dict(db.execute(
+                select(self.table.c.window, self.table.c.count)
+                .where(self.table.c.key == key, self.table.c.window.in_((window - 1, window)))
+            ).all())
+            wait = retry_after(limit, now, counts.get(window, 0), counts.get(window - 1, 0))
+            if wait:
+                return wait
+
+            insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+            statement = insert(self.table).values(
+                key=key, window=window, count=1, expires_at=(window + 2) * limit.period,
+            )
+            db.execute(statement.on_conflict_do_update(
+                index_elements=["key", "window"], set_={"count": self.table.c.count + 1},
+            ))
+            if random.random() < 0.01:
+                db.execute(delete(self.table).where(self.table.c.expires_at < now))
+            db.commit()
+            return 0.0
+        finally:
+            db.close()
+
+    async def hit(self, key: str, limit: Limit) -> float:
+        return await asyncio.to_thread(self._hit, key, limit)
+
+
+class RedisRateLimiter:
+    """
+    Counters in Redis (or anything speaking the Redis protocol): one INCR'ed key per
+    window, expiring after two windows. MGET + INCR/EXPIRE – two round trips per attempt.
+    """
+
+    def __init__(self, url: str = RATE_LIMIT_REDIS_URL):
+        if aioredis is None:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package")
+        self.client = aioredis.from_url(url)
+
+    async def hit(self, key: str, limit: Limit) -> float:
+        now = time.time()
+        window = int(now // limit.period)
+        current_key, previous_key = f"rl:{key}:{window}", f"rl:{key}:{window - 1}"
+        current, previous = await self.client.mget(current_key, previous_key)
+        wait = retry_after(limit, now, int(current or 0), int(previous or 0))
+        if wait:
+            return wait
+
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.incr(current_key)
+            pipe.expire(current_key, 2 * limit.period)
+            await pipe.execute()
+        return 0.0
+
+
+def _make_limiter():
+    if RATE_LIMIT_BACKEND == "database":
+        return DatabaseRateLimiter()
+    if RATE_LIMIT_BACKEND == "redis":
+        return RedisRateLimiter()
+    return MemoryRateLimiter()
+
+
+limiter = _make_limiter()
+
+
+# -----------------------------------------------------------
+# ✅ FastAPI dependency
+# -----------------------------------------------------------
+def client_ip(request: Request) -> str:
+    # Behind a proxy, run uvicorn with --proxy-headers so this is the real client
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(action: str):
+    """
+    Dependency counting one attempt at `action` per client IP and, when the form has an
+    e-mail and a '<action>:account' limit exists, per account. Over the limit it raises
+    429 with Retry-After – put it in the route's `dependencies` so it runs before the
+    database session is opened and before any password hashing.
+    """
+    async def check(request: Request, email: str | None = Form(None)):
+        keys = [(f"{action}:ip", client_ip(request))]
+        if email and f"{action}:account" in LIMITS:
+            keys.append((f"{action}:account", email.strip().lower()))
+
+        for name, value in keys:
+            wait = await limiter.hit(f"{name}:{value}", LIMITS[name])
+            if wait:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="For mange forsøg – prøv igen senere.",
+                    headers={"Retry-After": str(math.ceil(wait))},
+                )
+
+    return check
@@ -1,9 +1,13 @@
+import os
 from passlib.context import CryptContext
 import secrets
 from fastapi import Request
 
+# bcrypt cost factor – hashes with another cost are re-hashed on the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
 # Create a password hashing context using bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 # Hash a plain password
 def hash_password(password: str) -> str:
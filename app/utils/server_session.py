@@ -0,0 +1,260 @@
+import os
+import json
+import time
+import random
+import asyncio
+import hashlib
+import secrets
+from collections import OrderedDict
+from sqlalchemy import select, delete
+from sqlalchemy.dialects import postgresql, sqlite
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.database import SessionLocal
+from app.models.stored_session import StoredSession
+
+# Redis is optional – only needed for SESSION_BACKEND=redis
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover
+    aioredis = None
+
+# -----------------------------------------------------------
+# ✅ Configuration
+# -----------------------------------------------------------
+# 'database' = shared via the app database, 'redis' = shared via SESSION_REDIS_URL,
+# 'memory' = per process – lost on restart and not seen by other workers, so single-node development only
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "database")
+SESSION_REDIS_URL = os.getenv("SESSION_REDIS_URL", "redis://localhost:6379/0")
+SESSION_MAX_AGE = int(os.getenv("SESSION_MAX_AGE", str(14 * 24 * 3600)))  # seconds
+# Most sessions the memory backend keeps; the least recently used are dropped first
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "100000"))
+# Expired sessions deleted per cleanup; a cleanup runs on about one session write in a hundred
+SESSION_CLEANUP_BATCH = int(os.getenv("SESSION_CLEANUP_BATCH", "1000"))
+SESSION_HTTPS_ONLY = os.getenv("SESSION_HTTPS_ONLY", "false").lower() == "true"
+
+CLEANUP_PROBABILITY = 0.01
+
+
+def _storage_key(session_id: str) -> str:
+    return hashlib.sha256(session_id.encode()).hexdigest()
+
+
+# -----------------------------------------------------------
+# ✅ Backends
+# -----------------------------------------------------------
+# A store keeps session dicts as JSON under the SHA-256 of the cookie value.
+# load() returns (data, expires_at) or None when missing or expired.
+class MemorySessionStore:
+    """Per-process sessions, evicted LRU-first beyond `maxsize`."""
+
+    def __init__(self, maxsize: int = SESSION_MAX_ENTRIES):
+        self.maxsize = maxsize
+        self._sessions: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    async def load(self, session_id: str) -> tuple[dict, float] | None:
+        key = _storage_key(session_id)
+        entry = self._sessions.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.time():
+            del self._sessions[key]
+            return None
+        self._sessions.move_to_end(key)
+        return json.loads(entry[1]), entry[0]
+
+    async def save(self, session_id: str, data: dict, max_age: int):
+        key = _storage_key(session_id)
+        self._sessions[key] = (time.time() + max_age, json.dumps(data))
+        self._sessions.move_to_end(key)
+        while len(self._sessions) > self.maxsize:
+            self._sessions.popitem(last=False)
+        if random.random() < CLEANUP_PROBABILITY:
+            await self.cleanup()
+
+    async def delete(self, session_id: str):
+        self._sessions.pop(_storage_key(session_id), None)
+
+    async def cleanup(self, batch_size: int = SESSION_CLEANUP_BATCH) -> int:
+        """Drop expired sessions among the `batch_size` least recently used."""
+        now = time.time()
+        expired = [key for key, (expires_at, _) in list(self._sessions.items())[:batch_size] if expires_at < now]
+        for key in expired:
+            del self._sessions[key]
+        return len(expired)
+
+
+class DatabaseSessionStore:
+    """
+    Sessions in the sessions table, shared by every worker using the same database
+    (PostgreSQL or SQLite). One primary-key read per request with a session cookie, one
+    upsert per changed session; expired rows are deleted in passing, a batch at a time.
+    """
+
+    table = StoredSession.__table__
+
+    def _load(self, key: str) -> tuple[dict, float] | None:
+        with SessionLocal() as db:
+            row = db.execute(
+                select(self.table.c.data, self.table.c.expires_at)
+                .where(self.table.c.id == key, self.table.c.expires_at >= time.time())
+            ).one_or_none()
+        return (json.loads(row.data), row.expires_at) if row else None
+
+    def _save(self, key: str, data: str, expires_at: float, cleanup: bool):
+        with SessionLocal() as db:
+            insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+            statement = insert(self.table).values(id=key, data=data, expires_at=expires_at)
+            db.execute(statement.on_conflict_do_update(
+                index_elements=["id"], set_={"data": statement.excluded.data, "expires_at": statement.excluded.expires_at},
+            ))
+            if cleanup:
+                self._delete_expired(db, SESSION_CLEANUP_BATCH)
+            db.commit()
+
+    def _delete(self, key: str):
+        with SessionLocal() as db:
+            db.execute(delete(self.table).where(self.table.c.id == key))
+            db.commit()
+
+    def _delete_expired(self, db, batch_size: int) -> int:
+        # Bounded batch on the expires_at index, so no single cleanup holds locks for long
+        expired = select(self.table.c.id).where(self.table.c.expires_at < time.time()).limit(batch_size)
+        return db.execute(delete(self.table).where(self.table.c.id.in_(expired))).rowcount
+
+    def _cleanup(self, batch_size: int) -> int:
+        with SessionLocal() as db:
+            deleted = self._delete_expired(db, batch_size)
+            db.commit()
+        return deleted
+
+    async def load(self, session_id: str) -> tuple[dict, float] | None:
+        return await asyncio.to_thread(self._load, _storage_key(session_id))
+
+    async def save(self, session_id: str, data: dict, max_age: int):
+        await asyncio.to_thread(
+            self._save, _storage_key(session_id), json.dumps(data), time.time() + max_age,
+            random.random() < CLEANUP_PROBABILITY,
+        )
+
+    async def delete(self, session_id: str):
+        await asyncio.to_thread(self._delete, _storage_key(session_id))
+
+    async def cleanup(self, batch_size: int = SESSION_CLEANUP_BATCH) -> int:
+        return await asyncio.to_thread(self._cleanup, batch_size)
+
+
+class RedisSessionStore:
+    """Sessions in Redis (or anything speaking the Redis protocol); expiry is left to Redis."""
+
+    def __init__(self, url: str = SESSION_REDIS_URL):
+        if aioredis is None:
+            raise RuntimeError("SESSION_BACKEND=redis requires the 'redis' package")
+        self.client = aioredis.from_url(url)
+
+    async def load(self, session_id: str) -> tuple[dict, float] | None:
+        key = f"session:{_storage_key(session_id)}"
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.ttl(key)
+            raw, ttl = await pipe.execute()
+        if raw is None:
+            return None
+        return json.loads(raw), time.time() + max(ttl, 0)
+
+    async def save(self, session_id: str, data: dict, max_age: int):
+        await self.client.set(f"session:{_storage_key(session_id)}", json.dumps(data), ex=max_age)
+
+    async def delete(self, session_id: str):
+        await self.client.delete(f"session:{_storage_key(session_id)}")
+
+    async def cleanup(self, batch_size: int = SESSION_CLEANUP_BATCH) -> int:
+        return 0
+
+
+def make_session_store():
+    if SESSION_BACKEND == "memory":
+        return MemorySessionStore()
+    if SESSION_BACKEND == "redis":
+        return RedisSessionStore()
+    return DatabaseSessionStore()
+
+
+# -----------------------------------------------------------
+# ✅ Middleware
+# -----------------------------------------------------------
+class ServerSessionMiddleware:
+    """
+    Drop-in replacement for Starlette's SessionMiddleware that keeps request.session on
+    the server. The cookie holds only a random id. The session is written back – and the
+    cookie sent – only when its content changed, when it was emptied (then it is deleted),
+    or when less than half of max_age is left (sliding expiry for active users). A new id
+    is issued whenever user_id changes, so an id handed out before login is never reused
+    after it.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store=None,
+        session_cookie: str = "session",
+        max_age: int = SESSION_MAX_AGE,
+        path: str = "/",
+        same_site: str = "lax",
+        https_only: bool = SESSION_HTTPS_ONLY,
+        skip_paths: tuple[str, ...] = (),
+    ):
+        self.app = app
+        self.store = store if store is not None else make_session_store()
+        self.session_cookie = session_cookie
+        self.max_age = max_age
+        self.path = path
+        self.security_flags = f"httponly; samesite={same_site}" + ("; secure" if https_only else "")
+        # Prefixes (static files) that never use the session – no store lookup for them
+        self.skip_paths = skip_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        if self.skip_paths and scope["path"].startswith(self.skip_paths):
+            scope["session"] = {}
+            await self.app(scope, receive, send)
+            return
+
+        session_id = HTTPConnection(scope).cookies.get(self.session_cookie)
+        loaded = await self.store.load(session_id) if session_id else None
+        initial, expires_at = loaded if loaded else ({}, 0.0)
+        if not loaded:
+            session_id = None
+        initial_json = json.dumps(initial, sort_keys=True)
+        scope["session"] = json.loads(initial_json)
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                cookie = await self._commit(session_id, initial_json, initial.get("user_id"), expires_at, scope["session"])
+                if cookie:
+                    MutableHeaders(scope=message).append("Set-Cookie", cookie)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _commit(self, session_id, initial_json: str, initial_user_id, expires_at: float, session: dict) -> str | None:
+        """Persist the session if needed; returns the Set-Cookie value, or None for no cookie."""
+        if not session:
+            if session_id:
+                await self.store.delete(session_id)
+                return f"{self.session_cookie}=null; path={self.path}; expires=Thu, 01 Jan 1970 00:00:00 GMT; {self.security_flags}"
+            return None
+
+        changed = json.dumps(session, sort_keys=True) != initial_json
+        if not changed and expires_at - time.time() > self.max_age / 2:
+            return None
+
+        if session_id and session.get("user_id") != initial_user_id:
+            await self.store.delete(session_id)
+            session_id = None
+        session_id = session_id or secrets.token_urlsafe(32)
+        await self.store.save(session_id, session, self.max_age)
+        return f"{self.session_cookie}={session_id}; path={self.path}; Max-Age={self.max_age}; {self.security_flags}"
@@ -1,16 +1,66 @@
+import os
+from dataclasses import dataclass
 from fastapi import Request, HTTPException, status, Depends
-from sqlalchemy.orm import Session
-from app.dependencies.common import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.dependencies.common import get_async_db
 from app.models.user import User
+from app.utils.cache import TTLCache
+
+# Logged-in users kept per process, and for how long (seconds). USER_CACHE_TTL=0 disables the cache.
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+USER_CACHE_MAXSIZE = int(os.getenv("USER_CACHE_MAXSIZE", "10000"))
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """The fields of the logged-in user the admin pages need – detached from any DB session."""
+    id: int
+    email: str
+    is_verified: bool
+    plan: str
+
+
+_user_cache = TTLCache(maxsize=USER_CACHE_MAXSIZE, ttl=USER_CACHE_TTL)
+
+
+def invalidate_user(user_id: int | None):
+    """
+    Drop a cached user, so the next request reads it from the database again. Call after
+    changing the user (password, verification) and on logout. Other worker processes keep
+    their copy until USER_CACHE_TTL runs out.
+    """
+    if user_id is not None:
+        _user_cache.pop(user_id)
+
+
+def _redirect_to_login() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_303_SEE_OTHER, headers={"Location": "/login"})
+
+
+async def require_login(request: Request, db: AsyncSession = Depends(get_async_db)) -> CurrentUser:
+    """
+    The logged-in user, or a redirect to /login. Resolved once per request (kept on
+    request.state) and served from the per-process cache, so most admin requests do
+    not query the users table at all.
+    """
+    user = getattr(request.state, "user", None)
+    if user is not None:
+        return user
 
-def require_login(request: Request, db: Session = Depends(get_db)) -> User:
     user_id = request.session.get("user_id")
     if not user_id:
-        raise HTTPException(status_code=status.HTTP_303_SEE_OTHER, headers={"Location": "/login"})
+        raise _redirect_to_login()
 
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_303_SEE_OTHER, headers={"Location": "/login"})
+    user = _user_cache.get(user_id)
+    if user is None:
+        row = (await db.execute(
+            select(User.id, User.email, User.is_verified, User.plan).where(User.id == user_id)
+        )).one_or_none()
+        if row is None:
+            raise _redirect_to_login()
+        user = CurrentUser(*row)
+        _user_cache.set(user_id, user)
 
+    request.state.user = user
     return user
-
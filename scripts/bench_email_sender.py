@@ -0,0 +1,87 @@
+"""
+Benchmark: how fast the e-mail sender drains the outbox, with batch calls vs one call per e-mail.
+
+Usage:
+    python scripts/bench_email_sender.py [--emails 2000] [--batch-size 100] [--concurrency 2] [--invalid 5]
+    python scripts/bench_email_sender.py --batch-size 1          # one Resend call per e-mail
+    python scripts/bench_email_sender.py --base-url http://127.0.0.1:8002   # a running resend_standin
+
+Queues --emails e-mails (--invalid of them to addresses the stand-in rejects) in a temporary
+SQLite database (or BENCH_DATABASE_URL), runs the sender until the outbox is empty and prints
+e-mails/s, the number of Resend calls and how many were dead-lettered. By default the Resend
+stand-in (scripts/resend_standin.py) runs in-process; STANDIN_LATENCY, STANDIN_429_RATE,
+STANDIN_ERROR_RATE and STANDIN_LOST_RATE apply to it. "duplicates" counts e-mails the stand-in
+delivered twice – it must stay 0 however many responses are lost.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+_tmp = tempfile.TemporaryDirectory()
+os.environ["LOCAL_DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{_tmp.name}/bench.db"
+os.environ.pop("DIGITALOCEAN", None)
+os.environ.setdefault("RESEND_API_KEY", "bench")
+# Retry quickly, so throttled batches are retried within the run
+os.environ.setdefault("EMAIL_RETRY_DELAY", "1")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--emails", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=100, help="e-mails per Resend call (1 = no batching)")
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--invalid", type=int, default=0, help="e-mails to addresses the stand-in rejects")
+    parser.add_argument("--base-url", help="a running resend_standin instead of the in-process one")
+    args = parser.parse_args()
+    os.environ["RESEND_API_URL"] = args.base_url or "http://resend-standin"
+
+    import httpx
+    from sqlalchemy import select, func, insert
+    from app.database import Base, engine, SessionLocal
+    from app.commands.email_sender import run_sender
+    from app.models.email_outbox import EmailOutbox, EMAIL_DEAD, EMAIL_SENT
+    from app.services import mail
+
+    Base.metadata.create_all(engine)
+    html = "<html><body>" + "<p>Lorem ipsum dolor sit amet.</p>" * 60 + "</body></html>"  # about 2 KB, like our e-mails
+    with SessionLocal() as db:
+        db.execute(insert(EmailOutbox.__table__), [
+            {"to_email": f"user-{n}@{'invalid.test' if n < args.invalid else 'example.com'}",
+             "subject": "Confirm your email address", "html": html, "max_attempts": 3}
+            for n in range(args.emails)
+        ])
+        db.commit()
+
+    stats = None
+    if not args.base_url:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        import resend_standin
+        stats = resend_standin.stats
+        mail._resend_client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=resend_standin.app), base_url="http://resend-standin",
+            headers={"Authorization": "Bearer bench"},
+        )
+
+    print(f"{args.emails} e-mails, batch size {args.batch_size}, concurrency {args.concurrency}")
+    started = time.perf_counter()
+    delivered = asyncio.run(run_sender(args.concurrency, args.batch_size, once=True))
+    elapsed = time.perf_counter() - started
+
+    with SessionLocal() as db:
+        counts = dict(db.execute(select(EmailOutbox.status, func.count()).group_by(EmailOutbox.status)).all())
+    print(f"  delivered: {delivered} in {elapsed:.2f} s -> {delivered / elapsed:.0f} e-mails/s")
+    print(f"  outbox:    {counts.get(EMAIL_SENT, 0)} sent, {counts.get(EMAIL_DEAD, 0)} dead, "
+          f"{sum(counts.values()) - counts.get(EMAIL_SENT, 0) - counts.get(EMAIL_DEAD, 0)} still pending")
+    if stats:
+        print(f"  resend:    {stats['calls']} calls, {stats['throttled']} throttled, {stats['errors']} errors, "
+              f"{stats['rejected']} rejected, max {stats['max_in_flight']} concurrent")
+        print(f"  retries:   {stats['lost']} responses lost, {stats['replayed']} answered from the idempotency store, "
+              f"{stats['conflicts']} key conflicts, {stats['duplicates']} duplicates")
+
+
+if __name__ == "__main__":
+    main()
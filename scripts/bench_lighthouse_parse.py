@@ -0,0 +1,131 @@
+"""
+Benchmark: full json.loads vs. streaming extraction of PSI responses.
+
+Usage:
+    python scripts/bench_lighthouse_parse.py [report.json ...]
+
+"archive" is the stream mode plus the screenshot-free copy kept for the report archive
+(PSI_ARCHIVE_REPORTS). Without arguments a synthetic, Lighthouse-shaped report (~5 MB with base64
+screenshots and large audit detail tables) is generated. Pass recorded PSI
+responses to benchmark real payloads. Each run happens in a fresh subprocess
+so peak RSS is measured in isolation; the Python heap peak comes from tracemalloc
+(which also slows both parsers down, so compare timings between modes only).
+"""
+import os
+import sys
+import json
+import time
+import random
+import resource
+import tracemalloc
+import subprocess
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def make_fixture(path: str, audits: int = 150, items_per_audit: int = 150):
+    rnd = random.Random(42)
+    screenshot = "data:image/jpeg;base64," + "".join(rnd.choice("ABCDEFGHIJKLMNOP0123456789+/") for _ in range(3_000_000))
+    report = {
+        "id": "https://example.com/",
+        "lighthouseResult": {
+            "finalUrl": "https://example.com/",
+            "categories": {"performance": {"id": "performance", "score": 0.73, "auditRefs": [
+                {"id": f"audit-{i}", "weight": 1} for i in range(audits)
+            ]}},
+            "audits": {
+                f"audit-{i}": {
+                    "id": f"audit-{i}",
+                    "title": f"Audit number {i}",
+                    "description": "Lorem ipsum [Learn more](https://web.dev/) " * 5,
+                    "score": rnd.random(),
+                    "displayValue": f"{rnd.random() * 10:.1f} s",
+                    "numericValue": rnd.random() * 10000,
+                    "details": {"type": "table", "items": [
+                        {"url": f"https://example.com/asset-{i}-{n}.js", "wastedMs": rnd.random() * 500,
+                         "totalBytes": rnd.randint(1000, 900000)}
+                        for n in range(items_per_audit)
+                    ]},
+                }
+                for i in range(audits)
+            },
+            "fullPageScreenshot": {"screenshot": {"data": screenshot, "width": 412, "height": 5000}},
+        },
+    }
+    report["lighthouseResult"]["audits"]["final-screenshot"] = {
+        "id": "final-screenshot", "title": "Final Screenshot", "score": None,
+        "details": {"type": "screenshot", "data": screenshot[:400_000]},
+    }
+    with open(path, "w") as f:
+        json.dump(report, f)
+
+
+def run_child(mode: str, path: str):
+    with open(path, "rb") as f:
+        raw = f.read()
+    from app.services.lighthouse_parser import LighthouseExtractor
+    from app.services.report_archive import ScreenshotStripper
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    if mode == "json":
+        data = json.loads(raw)
+        score = data["lighthouseResult"]["categories"]["performance"]["score"]
+        audits = len(data["lighthouseResult"]["audits"])
+    else:
+        # "archive" also rebuilds the report without screenshots from the same parse events
+        stripper = ScreenshotStripper() if mode == "archive" else None
+        extractor = LighthouseExtractor(tee=stripper.handle if stripper else None)
+        # Simulate the network: the body arrives in 64 KB chunks
+        for offset in range(0, len(raw), 65536):
+            extractor.feed(raw[offset:offset + 65536])
+        data = extractor.close()
+        if stripper:
+            stripper.getvalue()
+        score = data["lighthouseResult"]["categories"]["performance"]["score"]
+        audits = len(data["lighthouseResult"]["audits"])
+    elapsed = time.perf_counter() - start
+    _, peak_alloc = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "seconds": elapsed, "extra_rss_kb": peak_rss - base_rss, "peak_alloc_kb": peak_alloc / 1024,
+        "score": score, "audits": audits,
+    }))
+
+
+def run_all(paths: list[str]):
+    for path in paths:
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        print(f"\n{os.path.basename(path)} ({size_mb:.1f} MB)")
+        for mode in ("json", "stream", "archive"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", mode, path],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            result = json.loads(out)
+            print(
+                f"  {mode:<7} {result['seconds'] * 1000:8.1f} ms   "
+                f"+{result['extra_rss_kb'] / 1024:7.1f} MB peak RSS   "
+                f"{result['peak_alloc_kb'] / 1024:7.1f} MB peak Python heap   "
+                f"score={result['score']} audits={result['audits']}"
+            )
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--child":
+        return run_child(sys.argv[2], sys.argv[3])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = sys.argv[1:]
+        if not paths:
+            paths = [os.path.join(tmp, "synthetic-report.json")]
+            make_fixture(paths[0])
+        run_all(paths)
+
+
+if __name__ == "__main__":
+    main()
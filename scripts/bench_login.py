@@ -0,0 +1,144 @@
+"""
+Benchmark: login throughput under concurrent load, and how responsive the app stays meanwhile.
+
+Usage:
+    python scripts/bench_login.py [--logins 200] [--concurrency 20] [--baseline]
+    python scripts/bench_login.py --base-url http://127.0.0.1:8000 --email me@example.com --password ...
+
+Runs the app in-process (temporary SQLite database, or BENCH_DATABASE_URL) and sends
+--logins logins from --concurrency concurrent clients. A probe requests GET /about every
+50 ms throughout. The output shows logins/s, login latency, 503s (password queue full)
+and the probe latency. The probe shows whether bcrypt is blocking the event loop.
+
+--baseline runs bcrypt directly on the event loop (as login did before the password pool)
+for comparison. With --base-url the requests go to a running server instead and
+--email/--password must be an existing, confirmed user.
+"""
+import os
+import re
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+_tmp = tempfile.TemporaryDirectory()
+os.environ["LOCAL_DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{_tmp.name}/bench.db"
+os.environ.pop("DIGITALOCEAN", None)
+# Every benchmark login comes from one client and account – lift the login throttling
+os.environ.setdefault("RATE_LIMIT_LOGIN_IP", "1000000/60")
+os.environ.setdefault("RATE_LIMIT_LOGIN_ACCOUNT", "1000000/60")
+
+import httpx
+
+PROBE_INTERVAL = 0.05
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+async def login(client_factory, email: str, password: str, results: dict):
+    async with client_factory() as client:
+        page = await client.get("/login")
+        token = re.search(r'name="csrf_token" value="([^"]*)"', page.text).group(1)
+        started = time.perf_counter()
+        response = await client.post("/login", data={"email": email, "password": password, "csrf_token": token})
+        elapsed = time.perf_counter() - started
+    if response.status_code == 303:
+        results["ok"].append(elapsed)
+    elif response.status_code == 503:
+        results["busy"] += 1
+    else:
+        results["failed"] += 1
+
+
+async def probe(client_factory, stop: asyncio.Event, latencies: list[float]):
+    async with client_factory() as client:
+        while not stop.is_set():
+            started = time.perf_counter()
+            await client.get("/about")
+            latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(PROBE_INTERVAL)
+
+
+async def run(args, client_factory, email: str, password: str):
+    results = {"ok": [], "busy": 0, "failed": 0}
+    probe_latencies = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(client_factory, stop, probe_latencies))
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one():
+        async with semaphore:
+            await login(client_factory, email, password, results)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe_task
+
+    ok = results["ok"]
+    print(f"  logins:   {len(ok)} ok, {results['busy']} rejected (503), {results['failed']} failed in {elapsed:.1f} s"
+          f" -> {len(ok) / elapsed:.1f} logins/s")
+    if ok:
+        print(f"  login:    p50 {statistics.median(ok) * 1000:7.0f} ms   p95 {percentile(ok, 0.95) * 1000:7.0f} ms")
+    print(f"  probe:    p50 {statistics.median(probe_latencies) * 1000:7.1f} ms   p95 {percentile(probe_latencies, 0.95) * 1000:7.1f} ms"
+          f"   max {max(probe_latencies) * 1000:7.1f} ms   ({len(probe_latencies)} requests)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--baseline", action="store_true", help="run bcrypt on the event loop, as before the password pool")
+    parser.add_argument("--base-url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--email")
+    parser.add_argument("--password")
+    args = parser.parse_args()
+
+    if args.base_url:
+        def client_factory():
+            return httpx.AsyncClient(base_url=args.base_url, timeout=60)
+        asyncio.run(run(args, client_factory, args.email, args.password))
+        return
+
+    from app.main import app
+    from app.database import SessionLocal
+    from app.models.user import User
+    from app.services import passwords
+    from app.utils.security import hash_password, BCRYPT_ROUNDS
+
+    with SessionLocal() as db:
+        user = User(email=f"bench-{time.time_ns()}@example.com", hashed_password=hash_password("bench"), is_verified=True)
+        db.add(user)
+        db.commit()
+        email = user.email
+
+    if args.baseline:
+        async def inline(func, *func_args):
+            return func(*func_args)
+        passwords._run = inline
+
+    def client_factory():
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+    mode = "bcrypt on the event loop" if args.baseline else (
+        f"password pool: {passwords.PASSWORD_WORKERS} threads, queue limit {passwords.PASSWORD_QUEUE_LIMIT}"
+    )
+    print(f"{args.logins} logins, {args.concurrency} concurrent, bcrypt cost {BCRYPT_ROUNDS}, {os.cpu_count()} CPUs – {mode}")
+
+    async def in_process():
+        # The app's lifespan closes the async engine and the password pool afterwards
+        async with app.router.lifespan_context(app):
+            await run(args, client_factory, email, "bench")
+
+    asyncio.run(in_process())
+
+
+if __name__ == "__main__":
+    main()
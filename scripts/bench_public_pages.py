@@ -0,0 +1,89 @@
+"""
+Benchmark: requests/s for the public marketing pages, rendered per request vs from the page cache.
+
+Usage:
+    python scripts/bench_public_pages.py [--requests 2000] [--concurrency 20] [--paths / /about]
+
+Runs the app in-process (temporary SQLite database) and sends --requests GETs per path from
+--concurrency concurrent clients in three modes: page cache off (every hit renders the
+template), page cache on, and page cache on with If-None-Match (revalidating clients and
+CDNs get 304 without a body). Prints requests/s and latency per mode.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+_tmp = tempfile.TemporaryDirectory()
+os.environ["LOCAL_DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{_tmp.name}/bench.db"
+os.environ.pop("DIGITALOCEAN", None)
+
+import httpx
+
+PATHS = ["/", "/about", "/privacy-policy", "/terms-and-conditions"]
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+async def run_mode(client: httpx.AsyncClient, paths: list[str], total: int, concurrency: int, conditional: bool) -> dict:
+    etags = {}
+    for path in paths:
+        etags[path] = (await client.get(path)).headers.get("etag")  # warm-up, and the ETag to revalidate with
+
+    latencies, statuses = [], {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(path: str):
+        headers = {"If-None-Match": etags[path]} if conditional and etags[path] else None
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append(time.perf_counter() - started)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(path) for path in paths for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    return {"rps": len(latencies) / elapsed, "p50": statistics.median(latencies), "p95": percentile(latencies, 0.95), "statuses": statuses}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000, help="requests per path and mode")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--paths", nargs="+", default=PATHS)
+    args = parser.parse_args()
+
+    from app.main import app
+    from app.utils import page_cache
+
+    async def bench():
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                results = {}
+                for label, enabled, conditional in (
+                    ("no page cache", False, False),
+                    ("page cache", True, False),
+                    ("page cache + If-None-Match", True, True),
+                ):
+                    page_cache.PAGE_CACHE_ENABLED = enabled
+                    page_cache.clear_page_cache()
+                    results[label] = await run_mode(client, args.paths, args.requests, args.concurrency, conditional)
+                return results
+
+    print(f"{args.requests} requests x {len(args.paths)} paths, concurrency {args.concurrency}")
+    for label, result in asyncio.run(bench()).items():
+        print(f"  {label:<28} {result['rps']:8.0f} req/s   p50 {result['p50'] * 1000:6.1f} ms"
+              f"   p95 {result['p95'] * 1000:6.1f} ms   {result['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark: the audit retention job (summarize and delete expired raw audits in chunks).
+
+Usage:
+    python scripts/bench_retention.py [--analyses 10000] [--audits 100] [--users 100] [--days 180] [--chunk-size 200]
+
+Drops and re-creates the tables in a temporary SQLite database (or BENCH_DATABASE_URL – use a
+scratch database) and seeds --analyses analyses spread evenly over the last --days days, each
+with --audits audit rows. It then runs purge_expired_audits with the default retention
+(AUDIT_RETENTION_DAYS) and prints the audit rows deleted per second, the summary rows written
+and the duration of each chunk's transaction, and checks that every expired analysis was
+purged and none of their audits is left.
+
+Measured on PostgreSQL 16.2 (1 vCPU, default settings), defaults, 90-day retention – 5001 expired
+analyses, 500100 audit rows, about 306000 summary rows, two runs:
+    14,668-16,866 rows/s; 26 chunks, median 1.2 s and at most 2.3 s per transaction
+    (4,426 rows/s and median 3.9 s before the summary upsert became one cached executemany)
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+_tmp = tempfile.TemporaryDirectory()
+os.environ["LOCAL_DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{_tmp.name}/bench.db"
+os.environ.pop("DIGITALOCEAN", None)
+
+from sqlalchemy import select, insert, event, func, literal, text, true
+
+from app.database import Base, engine, SessionLocal
+import app.main  # noqa: F401 – registers every model, so drop_all / create_all cover all tables
+from app.models.user import User
+from app.models.pagespeed_analysis import PageSpeedAnalysis, PageSpeedAudit, AuditDefinition
+from app.services.retention import purge_expired_audits, retention_days, RETENTION_CHUNK_SIZE
+
+analyses_table = PageSpeedAnalysis.__table__
+audits_table = PageSpeedAudit.__table__
+definitions_table = AuditDefinition.__table__
+
+
+def seed(conn, args):
+    """Users, definitions, analyses evenly spread over --days days; audits via INSERT ... SELECT."""
+    started = time.perf_counter()
+    now = datetime.now(timezone.utc)
+    conn.execute(insert(User.__table__), [
+        {"email": f"retention-{n}@example.com", "hashed_password": "x", "is_verified": True}
+        for n in range(args.users)
+    ])
+    conn.execute(insert(definitions_table), [
+        {"audit_key": f"audit-{n}", "content_hash": f"{n:064x}", "title": f"Audit {n}"} for n in range(args.audits)
+    ])
+    user_ids = conn.execute(select(User.__table__.c.id)).scalars().all()
+    step = timedelta(days=args.days) / args.analyses
+    for offset in range(0, args.analyses, 10_000):
+        conn.execute(insert(analyses_table), [
+            {"url": f"https://example.com/{n % 20}", "strategy": ("mobile", "desktop")[n % 2],
+             "performance_score": 50 + n % 50, "user_id": user_ids[n % len(user_ids)],
+             "created_at": now - timedelta(days=args.days) + step * n}
+            for n in range(offset, min(offset + 10_000, args.analyses))
+        ])
+    conn.execute(insert(audits_table).from_select(
+        ["analysis_id", "definition_id", "display_value", "numeric_value", "audit_score"],
+        select(analyses_table.c.id, definitions_table.c.id, literal("1.2 s"), literal(1200.0), literal(0.5))
+        .select_from(analyses_table.join(definitions_table, true())),
+    ))
+    conn.commit()
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as autocommit:
+            autocommit.execute(text("VACUUM ANALYZE"))
+    else:
+        conn.execute(text("ANALYZE"))
+        conn.commit()
+    audits = conn.execute(select(func.count()).select_from(audits_table)).scalar()
+    print(f"Seeded {args.analyses} analyses with {audits} audits in {time.perf_counter() - started:.1f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--analyses", type=int, default=10_000)
+    parser.add_argument("--audits", type=int, default=100, help="audit rows per analysis")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--days", type=int, default=180, help="the analyses are spread over this many days")
+    parser.add_argument("--chunk-size", type=int, default=RETENTION_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with engine.connect() as conn:
+        seed(conn, args)
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days("free"))
+    # One commit per chunk: the time between commits is the chunk's transaction
+    db = SessionLocal()
+    commits = [time.perf_counter()]
+    event.listen(db, "after_commit", lambda session: commits.append(time.perf_counter()))
+    try:
+        report = purge_expired_audits(db, pause=0, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+    chunks = sorted(b - a for a, b in zip(commits, commits[1:]))
+
+    with engine.connect() as conn:
+        remaining = conn.execute(select(func.count()).select_from(audits_table)).scalar()
+        missed = conn.execute(
+            select(func.count()).select_from(analyses_table)
+            .where(analyses_table.c.created_at < cutoff, analyses_table.c.audits_purged_at.is_(None))
+        ).scalar()
+        left_behind = conn.execute(
+            select(func.count()).select_from(audits_table.join(analyses_table))
+            .where(analyses_table.c.audits_purged_at.is_not(None))
+        ).scalar()
+    print(f"\n{engine.dialect.name}: {report.analyses} expired analyses, chunks of {args.chunk_size}")
+    print(f"  deleted    {report.audits_deleted} audit rows in {report.seconds:.1f} s "
+          f"({report.audits_deleted / report.seconds:,.0f} rows/s), {report.summaries_written} summary rows written")
+    if chunks:
+        print(f"  chunks     {len(chunks)}: median {statistics.median(chunks) * 1000:.0f} ms, "
+              f"max {chunks[-1] * 1000:.0f} ms per transaction")
+    ok = not missed and not left_behind and report.audits_deleted == report.analyses * args.audits
+    print(f"  check      {remaining} audits kept, {missed} expired analyses missed, "
+          f"{left_behind} audits left on purged analyses -> {'ok' if ok else 'MISMATCH'}")
+
+
+if __name__ == "__main__":
+    main()
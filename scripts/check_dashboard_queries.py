@@ -0,0 +1,128 @@
+"""
+Check: /admin/dashboard runs a fixed number of SQL statements, however long the history is.
+
+Usage:
+    python scripts/check_dashboard_queries.py [--sizes 10 1000 20000] [--budget 2]
+
+Seeds a user with growing numbers of analyses in a temporary SQLite database (or the
+database in CHECK_DATABASE_URL – use a scratch database, tables are created there),
+requests the dashboard and counts the statements sent to the database. Exits with
+status 1 if the count changes with history size or exceeds the budget
+(analyses + audits = 2; the logged-in user comes from the identity cache after the warm-up).
+
+Output on PostgreSQL 16.2 (CHECK_DATABASE_URL, fresh database, 1 vCPU) – SQLite gives the same counts:
+       10 analyses: 2 statements,   12.3 ms
+     1000 analyses: 2 statements,    9.7 ms
+    20000 analyses: 2 statements,   73.4 ms   (14.6 ms on a second run – first query after seeding)
+    OK: 2 statements per dashboard request
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+_tmp = tempfile.TemporaryDirectory()
+os.environ["LOCAL_DATABASE_URL"] = os.getenv("CHECK_DATABASE_URL") or f"sqlite:///{_tmp.name}/dashboard.db"
+os.environ.pop("DIGITALOCEAN", None)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+
+from app.main import app
+from app.database import engine, async_engine, SessionLocal
+from app.models.user import User
+from app.models.pagespeed_analysis import PageSpeedAnalysis
+from app.services.analysis_store import store_analysis
+from app.utils.security import hash_password
+
+statements = []
+
+
+def count(conn, cursor, statement, *args):
+    statements.append(statement)
+
+
+event.listen(engine, "before_cursor_execute", count)
+event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+
+
+def make_report(score: float) -> dict:
+    return {"lighthouseResult": {
+        "categories": {"performance": {"score": score}},
+        "audits": {
+            f"audit-{i}": {"id": f"audit-{i}", "title": f"Audit {i}", "description": "Lorem ipsum",
+                           "score": 0.4, "displayValue": "1.2 s", "numericValue": 1200.0}
+            for i in range(25)
+        },
+    }}
+
+
+def seed(db, user_id: int, total: int, already: int):
+    """Grow the user's history to `total` analyses; the newest mobile one gets real audits."""
+    start = datetime.now(timezone.utc) - timedelta(days=365)
+    rows = [
+        {
+            "url": f"https://example.com/{n % 50}",
+            "strategy": "mobile" if n % 2 else "desktop",
+            "performance_score": 50.0,
+            "user_id": user_id,
+            "created_at": start + timedelta(minutes=n),
+        }
+        for n in range(already, total)
+    ]
+    for offset in range(0, len(rows), 5000):
+        db.execute(insert(PageSpeedAnalysis.__table__), rows[offset:offset + 5000])
+    db.commit()
+    for strategy in ("desktop", "mobile"):
+        store_analysis(db, "https://example.com/", strategy, make_report(0.42), user_id)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 20000])
+    parser.add_argument("--budget", type=int, default=2)
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        user = User(email=f"dashboard-check-{time.time_ns()}@example.com", hashed_password=hash_password("check"), is_verified=True)
+        db.add(user)
+        db.commit()
+        user_id, email = user.id, user.email
+
+    with TestClient(app) as client:
+        login_page = client.get("/login").text
+        token = re.search(r'name="csrf_token" value="([^"]*)"', login_page).group(1)
+        client.post("/login", data={"email": email, "password": "check", "csrf_token": token})
+
+        counts = []
+        seeded = 0
+        for size in sorted(args.sizes):
+            with SessionLocal() as db:
+                seed(db, user_id, size, seeded)
+            seeded = size
+
+            client.get("/admin/dashboard")  # warm-up
+            del statements[:]
+            started = time.perf_counter()
+            response = client.get("/admin/dashboard")
+            elapsed = time.perf_counter() - started
+            assert response.status_code == 200, response.status_code
+            assert "Audit 1" in response.text, "audits not rendered"
+
+            counts.append(len(statements))
+            print(f"  {size:>7} analyses: {len(statements)} statements, {elapsed * 1000:6.1f} ms")
+
+    if len(set(counts)) != 1 or counts[0] > args.budget:
+        print(f"FAIL: expected a constant count of at most {args.budget} statements, got {counts}")
+        for statement in statements:
+            print("   ", " ".join(statement.split())[:160])
+        sys.exit(1)
+    print(f"OK: {counts[0]} statements per dashboard request")
+
+
+if __name__ == "__main__":
+    main()
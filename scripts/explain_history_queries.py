@@ -0,0 +1,236 @@
+"""
+Query plans and timings for the per-user history queries, without and with the history indexes.
+
+Usage:
+    EXPLAIN_DATABASE_URL=postgresql://localhost/scratch python scripts/explain_history_queries.py \\
+        [--analyses 2000000] [--users 1000] [--audits 2] [--repeat 5] [--page 40] [--reseed]
+
+Creates the tables in EXPLAIN_DATABASE_URL (use a scratch database – tables are created and
+indexes dropped there; a temporary SQLite file is used when it is unset), seeds
+--analyses rows spread over --users users with --audits audit rows each, and then for
+the dashboard, history and audit queries of one user prints the plan (EXPLAIN ANALYZE on
+PostgreSQL, EXPLAIN QUERY PLAN on SQLite) and the median time, first without and then
+with the indexes from migrations b7d3e9a4c2f8 and d5a1f7c3e8b9. History page --page is
+fetched both with the keyset cursor the app uses and with OFFSET. Seeding is skipped when the table already
+holds enough rows, so repeated runs are fast.
+
+Summary on PostgreSQL 16.2 (1 vCPU, default settings), 2M analyses and 4M audits, 1000 users –
+median ms as seen by the client, round trip included (server-side execution with the
+indexes is 0.05-0.1 ms):
+    dashboard: newest 10 + newest per strategy       1035.91 ->     1.14
+    dashboard: audits of the latest analysis          336.40 ->     0.40
+    history page                                      261.01 ->     0.54
+    history: newest per strategy                      328.35 ->     0.55
+    history: filtered by URL                          414.75 ->     0.61
+    delete audits of one analysis                     582.84 ->     0.15
+    history page 40 (keyset cursor)                   245.03 ->     0.40   Index Cond on ROW(created_at, id): 50 rows, 53 buffers
+    history page 40 (OFFSET, for comparison)          254.59 ->     2.79   reads and sorts all 2000 rows of the user
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+_tmp = tempfile.TemporaryDirectory()
+os.environ["LOCAL_DATABASE_URL"] = os.getenv("EXPLAIN_DATABASE_URL") or f"sqlite:///{_tmp.name}/history.db"
+os.environ.pop("DIGITALOCEAN", None)
+
+from sqlalchemy import select, delete, func, text
+
+from app.database import Base, engine
+import app.models.user  # noqa: F401
+from app.models.pagespeed_analysis import PageSpeedAnalysis, PageSpeedAudit
+from app.services.dashboard import dashboard_analyses_query, report_audits_query
+from app.services.history import history_page_query, HISTORY_PAGE_SIZE
+
+analyses_table = PageSpeedAnalysis.__table__
+audits_table = PageSpeedAudit.__table__
+
+HISTORY_INDEXES = [
+    index for index in (*analyses_table.indexes, *audits_table.indexes)
+    if index.name in (
+        "ix_pagespeed_analyses_user_created",
+        "ix_pagespeed_analyses_user_strategy_created",
+        "ix_pagespeed_analyses_user_url_created",
+        "ix_pagespeed_audits_analysis_id",
+    )
+]
+
+# Row generators – one INSERT ... SELECT per table keeps seeding millions of rows in the database
+SERIES = {
+    "postgresql": "SELECT n FROM generate_series(1, :total) AS n",
+    "sqlite": "WITH RECURSIVE series(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM series WHERE n < :total) SELECT n FROM series",
+}
+SEED_USERS = """
+    INSERT INTO users (email, hashed_password, is_verified)
+    SELECT 'history-' || n || '@example.com', 'x', true FROM ({series}) AS s
+"""
+SEED_DEFINITION = """
+    INSERT INTO audit_definitions (audit_key, content_hash, title, description)
+    VALUES ('unused-javascript', 'history-check', 'Reduce unused JavaScript', 'Lorem ipsum')
+"""
+SEED_ANALYSES = {
+    # created_at goes back one minute per row; users interleave, and each user's rows
+    # alternate between strategies and cycle through 50 URLs
+    "postgresql": """
+        INSERT INTO pagespeed_analyses (url, strategy, performance_score, user_id, created_at)
+        SELECT 'https://example.com/' || (n / :users % 50),
+               CASE WHEN n / :users % 2 = 0 THEN 'desktop' ELSE 'mobile' END,
+               50, :first_user + n % :users, now() - n * interval '1 minute'
+        FROM ({series}) AS s
+    """,
+    "sqlite": """
+        INSERT INTO pagespeed_analyses (url, strategy, performance_score, user_id, created_at)
+        SELECT 'https://example.com/' || (n / :users % 50),
+               CASE WHEN n / :users % 2 = 0 THEN 'desktop' ELSE 'mobile' END,
+               50, :first_user + n % :users, datetime('now', '-' || n || ' minutes')
+        FROM ({series}) AS s
+    """,
+}
+SEED_AUDITS = """
+    INSERT INTO pagespeed_audits (analysis_id, definition_id, display_value, audit_score)
+    SELECT a.id, :definition_id, '1.2 s', 0.4
+    FROM pagespeed_analyses AS a CROSS JOIN ({series}) AS s
+"""
+
+
+def seed(conn, dialect: str, args):
+    """Seed users, one audit definition, analyses and audits with INSERT ... SELECT."""
+    series = SERIES[dialect]
+    first_user = conn.execute(text("SELECT coalesce(max(id), 0) + 1 FROM users")).scalar()
+    conn.execute(text(SEED_USERS.format(series=series)), {"total": args.users})
+    definition_id = conn.execute(text(SEED_DEFINITION + " RETURNING id")).scalar()
+
+    started = time.perf_counter()
+    conn.execute(
+        text(SEED_ANALYSES[dialect].format(series=series)),
+        {"total": args.analyses, "users": args.users, "first_user": first_user},
+    )
+    conn.execute(text(SEED_AUDITS.format(series=series)), {"total": args.audits, "definition_id": definition_id})
+    print(f"Seeded {args.analyses} analyses and {args.analyses * args.audits} audits "
+          f"for {args.users} users in {time.perf_counter() - started:.1f} s")
+
+
+def explain(conn, dialect: str, statement) -> list[str]:
+    sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN (ANALYZE, BUFFERS) " if dialect == "postgresql" else "EXPLAIN QUERY PLAN "
+    transaction = conn.begin_nested()  # EXPLAIN ANALYZE executes the DELETE – roll it back
+    try:
+        rows = conn.execute(text(prefix + sql)).all()
+    finally:
+        transaction.rollback()
+    if dialect == "postgresql":
+        return [row[0] for row in rows]
+    return [f"{'  ' * (row[1] > 0)}{row[-1]}" for row in rows]
+
+
+def timed(conn, statement, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        transaction = conn.begin_nested()
+        started = time.perf_counter()
+        result = conn.execute(statement)
+        if result.returns_rows:
+            result.all()
+        durations.append(time.perf_counter() - started)
+        transaction.rollback()
+    return statistics.median(durations) * 1000
+
+
+def report(conn, dialect: str, queries: dict, repeat: int, label: str) -> dict:
+    print(f"\n===== {label} =====")
+    timings = {}
+    for name, statement in queries.items():
+        timings[name] = timed(conn, statement, repeat)
+        print(f"\n--- {name}: {timings[name]:.2f} ms (median of {repeat})")
+        for line in explain(conn, dialect, statement):
+            print("   ", line)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--analyses", type=int, default=2_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--audits", type=int, default=2, help="audit rows per analysis")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--page", type=int, default=40, help="history page for the keyset / OFFSET comparison")
+    parser.add_argument("--reseed", action="store_true", help="seed again even if the table is already filled")
+    args = parser.parse_args()
+
+    dialect = engine.dialect.name
+    Base.metadata.create_all(engine)
+
+    with engine.connect() as conn:
+        for index in HISTORY_INDEXES:
+            index.drop(conn, checkfirst=True)
+        conn.commit()
+
+        existing = conn.execute(select(func.count()).select_from(analyses_table)).scalar()
+        if args.reseed or existing < args.analyses:
+            seed(conn, dialect, args)
+            conn.commit()
+        conn.execute(text("ANALYZE"))
+        conn.commit()
+
+        # Owner of the newest row; every seeded user has about analyses / users rows
+        user_id = conn.execute(
+            select(analyses_table.c.user_id).order_by(analyses_table.c.id.desc()).limit(1)
+        ).scalar()
+        latest_id = conn.execute(
+            select(func.max(analyses_table.c.id)).where(analyses_table.c.user_id == user_id)
+        ).scalar()
+        # Last row of the page before --page: what the history cursor points at
+        skipped = (args.page - 1) * HISTORY_PAGE_SIZE
+        after = conn.execute(
+            select(analyses_table.c.created_at, analyses_table.c.id)
+            .where(analyses_table.c.user_id == user_id)
+            .order_by(analyses_table.c.created_at.desc(), analyses_table.c.id.desc())
+            .offset(skipped - 1)
+            .limit(1)
+        ).one()
+        queries = {
+            "dashboard: newest 10 + newest per strategy": dashboard_analyses_query(user_id),
+            "dashboard: audits of the latest analysis": report_audits_query(latest_id),
+            "history page": select(PageSpeedAnalysis)
+                .where(PageSpeedAnalysis.user_id == user_id)
+                .order_by(PageSpeedAnalysis.created_at.desc(), PageSpeedAnalysis.id.desc())
+                .limit(50),
+            "history: newest per strategy": select(PageSpeedAnalysis)
+                .where(PageSpeedAnalysis.user_id == user_id, PageSpeedAnalysis.strategy == "mobile")
+                .order_by(PageSpeedAnalysis.created_at.desc(), PageSpeedAnalysis.id.desc())
+                .limit(50),
+            "history: filtered by URL": select(PageSpeedAnalysis)
+                .where(PageSpeedAnalysis.user_id == user_id, PageSpeedAnalysis.url == "https://example.com/7")
+                .order_by(PageSpeedAnalysis.created_at.desc(), PageSpeedAnalysis.id.desc())
+                .limit(50),
+            f"history page {args.page} (keyset cursor)": history_page_query(
+                dialect, user_id, HISTORY_PAGE_SIZE + 1, after=tuple(after)
+            ),
+            f"history page {args.page} (OFFSET, for comparison)": history_page_query(
+                dialect, user_id, HISTORY_PAGE_SIZE + 1
+            ).offset(skipped),
+            "delete audits of one analysis": delete(audits_table).where(audits_table.c.analysis_id == latest_id),
+        }
+
+        before = report(conn, dialect, queries, args.repeat, "without history indexes")
+
+        started = time.perf_counter()
+        for index in HISTORY_INDEXES:
+            index.create(conn)
+        conn.execute(text("ANALYZE"))
+        conn.commit()
+        print(f"\nCreated {len(HISTORY_INDEXES)} indexes in {time.perf_counter() - started:.1f} s")
+
+        after = report(conn, dialect, queries, args.repeat, "with history indexes")
+
+    print("\n===== summary (median ms) =====")
+    for name in queries:
+        print(f"  {name:<45} {before[name]:>10.2f} -> {after[name]:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
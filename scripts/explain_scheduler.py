@@ -0,0 +1,144 @@
+"""
+Query plan and timings for the monitoring scheduler: an idle tick and a tick with due monitors.
+
+Usage:
+    EXPLAIN_DATABASE_URL=postgresql://localhost/scratch python scripts/explain_scheduler.py \\
+        [--monitors 30000] [--users 1000] [--due 500] [--repeat 20]
+
+Creates the tables in EXPLAIN_DATABASE_URL (use a scratch database; a temporary SQLite file is
+used when it is unset) and seeds --monitors monitors over --users users, each with one finished
+analysis job. Every run first spreads next_run_at over the coming week, so nothing is due, and
+prints the plan of the due-monitors query (EXPLAIN ANALYZE on PostgreSQL, EXPLAIN QUERY PLAN on
+SQLite) and the median time of an idle scheduler tick. It then makes --due monitors due and
+times the tick that enqueues their jobs. Seeding is skipped when the table already holds enough
+monitors, so repeated runs are fast.
+
+Measured on PostgreSQL 16.2 (1 vCPU, default settings), 30000 monitors, 500 due, two runs:
+    idle: Index Scan using ix_monitored_urls_active_next_run, 0 rows, 0.04-0.06 ms; tick 1.2-1.6 ms
+    due:  Index Scan using ix_monitored_urls_active_next_run, 500 rows, 0.7 ms; tick 81-86 ms (500 jobs)
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+_tmp = tempfile.TemporaryDirectory()
+os.environ["LOCAL_DATABASE_URL"] = os.getenv("EXPLAIN_DATABASE_URL") or f"sqlite:///{_tmp.name}/scheduler.db"
+os.environ.pop("DIGITALOCEAN", None)
+
+from sqlalchemy import select, insert, update, delete, func, text, bindparam
+
+from app.database import Base, engine
+from app.commands.scheduler import tick
+from app.models.user import User
+from app.models.analysis_job import AnalysisJob, JOB_DONE
+from app.models.monitored_url import MonitoredUrl, MONITOR_INTERVALS
+from app.services.monitoring import due_monitors_query
+
+monitors_table = MonitoredUrl.__table__
+jobs_table = AnalysisJob.__table__
+WEEK_MINUTES = 7 * 24 * 60
+
+
+def seed(conn, args):
+    """Users, monitors (round-robin intervals) and one finished job per monitor."""
+    started = time.perf_counter()
+    first_user = conn.execute(select(func.coalesce(func.max(User.id), 0) + 1)).scalar()
+    conn.execute(insert(User.__table__), [
+        {"email": f"monitor-{first_user + n}@example.com", "hashed_password": "x", "is_verified": True}
+        for n in range(args.users)
+    ])
+    now = datetime.now(timezone.utc)
+    intervals = list(MONITOR_INTERVALS)
+    conn.execute(insert(monitors_table), [
+        {"user_id": first_user + n % args.users, "url": f"https://example.com/monitor-{first_user}-{n}",
+         "interval": intervals[n % len(intervals)], "is_active": True, "next_run_at": now}
+        for n in range(args.monitors)
+    ])
+    monitor_ids = conn.execute(select(monitors_table.c.id, monitors_table.c.user_id)).all()
+    conn.execute(insert(jobs_table), [
+        {"url": "https://example.com/", "user_id": user_id, "monitor_id": monitor_id, "status": JOB_DONE,
+         "attempts": 1, "max_attempts": 3, "run_after": now, "finished_at": now}
+        for monitor_id, user_id in monitor_ids
+    ])
+    print(f"Seeded {args.monitors} monitors for {args.users} users in {time.perf_counter() - started:.1f} s")
+
+
+def reset_schedule(conn, due: int):
+    """Spread next_run_at over the coming week, then make `due` monitors due; drop queued jobs."""
+    now = datetime.now(timezone.utc)
+    ids = conn.execute(select(monitors_table.c.id).order_by(monitors_table.c.id)).scalars().all()
+    due_ids = set(ids[::max(1, len(ids) // due)][:due]) if due else set()
+    conn.execute(
+        update(monitors_table).where(monitors_table.c.id == bindparam("monitor_id")),
+        [{"monitor_id": monitor_id,
+          "next_run_at": now - timedelta(minutes=1) if monitor_id in due_ids
+          else now + timedelta(minutes=1 + n % WEEK_MINUTES)}
+         for n, monitor_id in enumerate(ids)],
+    )
+    conn.execute(delete(jobs_table).where(jobs_table.c.status != JOB_DONE))
+
+
+def vacuum(conn, dialect: str):
+    """Refresh statistics; on PostgreSQL also clear the dead index entries reset_schedule left behind."""
+    conn.commit()
+    if dialect == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as autocommit:
+            autocommit.execute(text("VACUUM ANALYZE monitored_urls, analysis_jobs"))
+    else:
+        conn.execute(text("ANALYZE"))
+        conn.commit()
+
+
+def explain(conn, dialect: str, statement) -> list[str]:
+    sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN (ANALYZE, BUFFERS) " if dialect == "postgresql" else "EXPLAIN QUERY PLAN "
+    rows = conn.execute(text(prefix + sql)).all()
+    if dialect == "postgresql":
+        return [row[0] for row in rows]
+    return [f"{'  ' * (row[1] > 0)}{row[-1]}" for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--monitors", type=int, default=30_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--due", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    dialect = engine.dialect.name
+    Base.metadata.create_all(engine)
+
+    with engine.connect() as conn:
+        if conn.execute(select(func.count()).select_from(monitors_table)).scalar() < args.monitors:
+            seed(conn, args)
+        reset_schedule(conn, due=0)
+        vacuum(conn, dialect)
+
+        print("\n===== idle: no monitor due =====")
+        for line in explain(conn, dialect, due_monitors_query(datetime.now(timezone.utc))):
+            print("   ", line)
+        durations = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            tick()
+            durations.append(time.perf_counter() - started)
+        print(f"  idle tick: {statistics.median(durations) * 1000:.2f} ms (median of {args.repeat})")
+
+        reset_schedule(conn, due=args.due)
+        vacuum(conn, dialect)
+        print(f"\n===== {args.due} monitors due =====")
+        for line in explain(conn, dialect, due_monitors_query(datetime.now(timezone.utc))):
+            print("   ", line)
+        started = time.perf_counter()
+        enqueued = tick()
+        print(f"  tick: {(time.perf_counter() - started) * 1000:.0f} ms, {enqueued} jobs enqueued")
+
+
+if __name__ == "__main__":
+    main()
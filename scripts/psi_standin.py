@@ -0,0 +1,140 @@
+"""
+Local PageSpeed Insights stand-in for testing batch runs without network access.
+
+Usage:
+    uvicorn scripts.psi_standin:app --port 8001
+    PAGESPEED_API_URL=http://127.0.0.1:8001/runPagespeed python -m app.commands.worker --concurrency 8
+    curl -X POST localhost:8000/analyse/batch -H 'Content-Type: application/json' \\
+         -d '{"sitemap_url": "http://127.0.0.1:8001/sitemap.xml?pages=200"}'
+
+Endpoints:
+    GET /runPagespeed   Lighthouse-shaped report; the score is derived from the URL, so runs are repeatable
+    GET /sitemap.xml    streamed sitemap with ?pages=N pages (use ?index=1 for a sitemap index)
+    GET /stats          requests served and the highest number of concurrent PSI calls seen
+
+Environment:
+    STANDIN_LATENCY      mean response time in seconds (default 0.5)
+    STANDIN_429_RATE     fraction of calls answered with 429 + Retry-After (default 0)
+    STANDIN_SCREENSHOT_KB  size of the embedded base64 screenshot (default 200)
+"""
+import os
+import json
+import random
+import asyncio
+import hashlib
+
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import Response, StreamingResponse
+
+LATENCY = float(os.getenv("STANDIN_LATENCY", "0.5"))
+THROTTLE_RATE = float(os.getenv("STANDIN_429_RATE", "0"))
+SCREENSHOT_KB = int(os.getenv("STANDIN_SCREENSHOT_KB", "200"))
+
+app = FastAPI(title="PSI stand-in")
+stats = {"requests": 0, "throttled": 0, "in_flight": 0, "max_in_flight": 0}
+
+
+def _seed(url: str, strategy: str) -> float:
+    digest = hashlib.sha256(f"{url}|{strategy}".encode()).digest()
+    return int.from_bytes(digest[:4], "big") / 2**32
+
+
+def make_report(url: str, strategy: str) -> dict:
+    rnd = random.Random(_seed(url, strategy))
+    score = round(0.2 + rnd.random() * 0.8, 2)
+    slow = 1.0 - score
+
+    def metric(key: str, title: str, value: float, unit: str = "ms") -> dict:
+        return {
+            "id": key,
+            "title": title,
+            "description": f"{title}. [Learn more](https://web.dev/{key}/)",
+            "score": round(max(0.0, 1.0 - slow * rnd.uniform(0.5, 1.5)), 2),
+            "numericValue": value,
+            "displayValue": f"{value / 1000:.1f} s" if unit == "ms" else f"{value:.3f}",
+        }
+
+    audits = {
+        "first-contentful-paint": metric("first-contentful-paint", "First Contentful Paint", 800 + slow * 4000),
+        "largest-contentful-paint": metric("largest-contentful-paint", "Largest Contentful Paint", 1200 + slow * 8000),
+        "total-blocking-time": metric("total-blocking-time", "Total Blocking Time", slow * 1500),
+        "cumulative-layout-shift": metric("cumulative-layout-shift", "Cumulative Layout Shift", slow * 0.4, unit=""),
+        "speed-index": metric("speed-index", "Speed Index", 1000 + slow * 6000),
+        "interactive": metric("interactive", "Time to Interactive", 1500 + slow * 10000),
+    }
+    for n in range(20):
+        key = f"opportunity-{n}"
+        audits[key] = {
+            "id": key,
+            "title": f"Opportunity {n}",
+            "description": "Reduce unused JavaScript. [Learn more](https://web.dev/unused-javascript/)",
+            "score": round(rnd.random(), 2),
+            "numericValue": rnd.random() * 2000,
+            "displayValue": f"Potential savings of {rnd.randint(1, 400)} KiB",
+            "details": {"type": "opportunity", "items": [
+                {"url": f"{url.rstrip('/')}/asset-{n}-{i}.js", "wastedBytes": rnd.randint(1000, 90000)}
+                for i in range(10)
+            ]},
+        }
+    audits["final-screenshot"] = {
+        "id": "final-screenshot", "title": "Final Screenshot", "score": None,
+        "details": {"type": "screenshot", "data": "data:image/jpeg;base64," + "A" * (SCREENSHOT_KB * 1024)},
+    }
+
+    return {
+        "id": url,
+        "lighthouseResult": {
+            "requestedUrl": url,
+            "finalUrl": url,
+            "configSettings": {"formFactor": strategy},
+            "categories": {"performance": {"id": "performance", "score": score}},
+            "audits": audits,
+        },
+    }
+
+
+@app.get("/runPagespeed")
+async def run_pagespeed(url: str, strategy: str = "mobile", key: str | None = None):
+    stats["requests"] += 1
+    stats["in_flight"] += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+    try:
+        await asyncio.sleep(random.uniform(0.5, 1.5) * LATENCY)
+        if THROTTLE_RATE and random.random() < THROTTLE_RATE:
+            stats["throttled"] += 1
+            return Response(status_code=429, headers={"Retry-After": "1"})
+        return Response(json.dumps(make_report(url, strategy)), media_type="application/json")
+    finally:
+        stats["in_flight"] -= 1
+
+
+@app.get("/sitemap.xml")
+async def sitemap(
+    request: Request,
+    pages: int = Query(100, le=100000),
+    base: str = "https://example.com",
+    index: bool = False,
+    part: int | None = None,
+    per_part: int = 50,
+):
+    def generate():
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        if index:
+            yield '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+            for n in range((pages + per_part - 1) // per_part):
+                loc = f"{request.base_url}sitemap.xml?pages={pages}&amp;base={base}&amp;part={n}&amp;per_part={per_part}"
+                yield f"  <sitemap><loc>{loc}</loc></sitemap>\n"
+            yield "</sitemapindex>\n"
+            return
+        first, last = (0, pages) if part is None else (part * per_part, min(pages, (part + 1) * per_part))
+        yield '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        for n in range(first, last):
+            yield f"  <url><loc>{base}/page-{n}</loc><changefreq>weekly</changefreq></url>\n"
+        yield "</urlset>\n"
+
+    return StreamingResponse(generate(), media_type="application/xml")
+
+
+@app.get("/stats")
+def get_stats():
+    return stats
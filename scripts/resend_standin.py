@@ -0,0 +1,121 @@
+"""
+Local Resend stand-in for running and benchmarking the e-mail sender without network access.
+
+Usage:
+    uvicorn scripts.resend_standin:app --port 8002
+    RESEND_API_URL=http://127.0.0.1:8002 RESEND_API_KEY=test python -m app.commands.email_sender
+
+Endpoints:
+    POST /emails         one e-mail, answers {"id": ...}
+    POST /emails/batch   up to 100 e-mails, answers {"data": [{"id": ...}, ...]}; all or nothing
+    GET  /stats          calls, e-mails accepted, errors and the highest number of concurrent calls seen
+
+Recipients ending in @invalid.test are rejected with 422 (a batch containing one is rejected
+whole, like Resend does), so dead-lettering can be tried out. Idempotency-Key is honoured like
+Resend does: a repeated key with the same body gets the stored answer without sending again,
+with a different body a 409. stats["duplicates"] counts e-mails accepted for a recipient that
+already got one.
+
+Environment:
+    STANDIN_LATENCY      mean response time in seconds (default 0.1)
+    STANDIN_429_RATE     fraction of calls answered with 429 + Retry-After (default 0)
+    STANDIN_ERROR_RATE   fraction of calls answered with 500 (default 0)
+    STANDIN_LOST_RATE    fraction of calls that send the e-mails but answer 500 anyway, like a
+                         response lost on the way back (default 0)
+"""
+import os
+import json
+import uuid
+import random
+import asyncio
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+LATENCY = float(os.getenv("STANDIN_LATENCY", "0.1"))
+THROTTLE_RATE = float(os.getenv("STANDIN_429_RATE", "0"))
+ERROR_RATE = float(os.getenv("STANDIN_ERROR_RATE", "0"))
+LOST_RATE = float(os.getenv("STANDIN_LOST_RATE", "0"))
+BATCH_LIMIT = 100
+
+app = FastAPI(title="Resend stand-in")
+stats = {"calls": 0, "emails": 0, "throttled": 0, "errors": 0, "rejected": 0, "lost": 0, "replayed": 0,
+         "conflicts": 0, "duplicates": 0, "in_flight": 0, "max_in_flight": 0}
+_idempotent: dict[str, tuple[str, dict]] = {}  # key -> (body, stored answer)
+_recipients: set[str] = set()
+
+
+def _invalid(message: dict) -> str | None:
+    for field in ("from", "to", "subject"):
+        if not message.get(field):
+            return f"Missing `{field}` field."
+    if any(address.endswith("@invalid.test") for address in message["to"]):
+        return "Invalid `to` field."
+    return None
+
+
+async def _handle(request: Request, messages: list[dict], batch: bool):
+    stats["calls"] += 1
+    stats["in_flight"] += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+    try:
+        await asyncio.sleep(random.uniform(0.5, 1.5) * LATENCY)
+        if not request.headers.get("authorization", "").startswith("Bearer "):
+            return JSONResponse({"statusCode": 401, "name": "missing_api_key", "message": "Missing API key"}, status_code=401)
+        if THROTTLE_RATE and random.random() < THROTTLE_RATE:
+            stats["throttled"] += 1
+            return JSONResponse({"statusCode": 429, "name": "rate_limit_exceeded", "message": "Too many requests"},
+                                status_code=429, headers={"Retry-After": "1"})
+        if ERROR_RATE and random.random() < ERROR_RATE:
+            stats["errors"] += 1
+            return JSONResponse({"statusCode": 500, "name": "internal_server_error", "message": "Try again"}, status_code=500)
+        if batch and not 1 <= len(messages) <= BATCH_LIMIT:
+            return JSONResponse({"statusCode": 422, "name": "validation_error",
+                                 "message": f"Batch must contain 1 to {BATCH_LIMIT} emails."}, status_code=422)
+        for message in messages:
+            error = _invalid(message)
+            if error:
+                stats["rejected"] += 1
+                return JSONResponse({"statusCode": 422, "name": "validation_error", "message": error}, status_code=422)
+
+        key = request.headers.get("idempotency-key")
+        body = json.dumps(messages, sort_keys=True)
+        if key in _idempotent:
+            stored_body, answer = _idempotent[key]
+            if stored_body != body:
+                stats["conflicts"] += 1
+                return JSONResponse({"statusCode": 409, "name": "invalid_idempotent_request",
+                                     "message": "Same idempotency key used with a different request payload."},
+                                    status_code=409)
+            stats["replayed"] += 1
+            return answer
+
+        stats["emails"] += len(messages)
+        for message in messages:
+            stats["duplicates"] += message["to"][0] in _recipients
+            _recipients.add(message["to"][0])
+        ids = [{"id": str(uuid.uuid4())} for _ in messages]
+        answer = {"data": ids} if batch else ids[0]
+        if key:
+            _idempotent[key] = (body, answer)
+        if LOST_RATE and random.random() < LOST_RATE:
+            stats["lost"] += 1
+            return JSONResponse({"statusCode": 500, "name": "internal_server_error", "message": "Response lost"}, status_code=500)
+        return answer
+    finally:
+        stats["in_flight"] -= 1
+
+
+@app.post("/emails")
+async def send(request: Request):
+    return await _handle(request, [await request.json()], batch=False)
+
+
+@app.post("/emails/batch")
+async def send_batch(request: Request):
+    return await _handle(request, await request.json(), batch=True)
+
+
+@app.get("/stats")
+def get_stats():
+    return stats